@@ -2,7 +2,7 @@ from __future__ import annotations
 import os
 import inspect
 import openai
-from typing import Any, TypedDict
+from typing import Any, AsyncGenerator, TypedDict
 
 
 class MongoStorageConfig(TypedDict):
@@ -32,6 +32,20 @@ class BaseLLMClient:
     ) -> Any:
         raise NotImplementedError
 
+    async def stream_response(
+        self, model: str, system_prompt: str | None, user_prompt: str, **kwargs
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Streams a response as {"type": "delta", "delta": str} events followed by a single
+        {"type": "completed", "response": <full response>} event.
+
+        Clients without streaming support emit only the completed event.
+        """
+        response = await self.fetch_response(
+            model=model, system_prompt=system_prompt, user_prompt=user_prompt, **kwargs
+        )
+        yield {"type": "completed", "response": response}
+
 
 class BaseAgent:
     def __init__(self, agent_name: str, agent_config: dict[str, dict] | None= None):
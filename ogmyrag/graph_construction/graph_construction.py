@@ -21,9 +21,9 @@ from ..util import (
     get_formatted_entities_and_relationships,
     get_formatted_current_datetime,
     get_formatted_similar_entities,
-    get_sliced_ontology,
     get_clean_json,
     get_current_datetime,
+    OntologyProvider,
 )
 from ..storage import (
     AsyncMongoDBStorage,
@@ -51,6 +51,7 @@ from .graph_construction_util import (
     get_formatted_entity_cache_for_db,
     get_formatted_relationship_cache_for_db,
     get_formatted_entities_and_relationships_for_db,
+    get_formatted_extraction_system_prompt,
 )
 
 graph_construction_logger = logging.getLogger("graph_construction")
@@ -68,23 +69,28 @@ class EntityRelationshipExtractionAgent(BaseAgent):
         """
         Parameters:
            ontology (dict): The ontology.
+           formatted_ontology (str | None): Pre-rendered ontology, takes precedence over `ontology`.
+           system_prompt (str | None): Pre-rendered system prompt, takes precedence over `ontology` and `formatted_ontology`.
            source_text (str): The source text to be parsed.
            source_text_publish_date (str): The date when the source text was published.
            source_text_constraints (str): The constraints to adhere while parsing the source text.
         """
         graph_construction_logger.info(f"EntityRelatonshipExtractionAgent is called")
 
-        formatted_ontology = get_formatted_ontology(
-            data=kwargs.get("ontology", {}) or {},
-        )
-        graph_construction_logger.debug(
-            f"EntityRelatonshipExtractionAgent\nOntology used:\n{formatted_ontology}"
-        )
+        system_prompt = kwargs.get("system_prompt")
+        if not system_prompt:
+            formatted_ontology = kwargs.get(
+                "formatted_ontology"
+            ) or get_formatted_ontology(
+                data=kwargs.get("ontology", {}) or {},
+            )
+            graph_construction_logger.debug(
+                f"EntityRelatonshipExtractionAgent\nOntology used:\n{formatted_ontology}"
+            )
 
-        system_prompt = PROMPT["ENTITIES_RELATIONSHIPS_PARSING"].format(
-            ontology=formatted_ontology,
-            publish_date=kwargs.get("source_text_publish_date", "NA") or "NA",
-        )
+            system_prompt = get_formatted_extraction_system_prompt(
+                formatted_ontology=formatted_ontology
+            )
         graph_construction_logger.debug(
             f"EntityRelatonshipExtractionAgent\System prompt used:\n{system_prompt}"
         )
@@ -104,7 +110,13 @@ class EntityRelationshipExtractionAgent(BaseAgent):
         )
         constraints = constraints_prefix + constraints_body
         source_text = kwargs.get("source_text") or "NA"
-        user_prompt = constraints + source_text
+        # Per-document values belong in the user prompt so the system prompt stays a cacheable prefix
+        publish_date = (
+            "Source Text Publish Date:\n"
+            + (kwargs.get("source_text_publish_date") or "NA")
+            + "\n\n"
+        )
+        user_prompt = publish_date + constraints + source_text
         graph_construction_logger.debug(f"User prompt used:\n{user_prompt}")
 
         graph_construction_logger.debug(
@@ -112,7 +124,10 @@ class EntityRelationshipExtractionAgent(BaseAgent):
         )
 
         response = await self.agent_system.llm_client.fetch_response(
-            system_prompt=system_prompt, user_prompt=user_prompt, **self.agent_config
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            agent_name=self.agent_name,
+            **self.agent_config,
         )
         graph_construction_logger.info(
             f"EntityRelatonshipExtractionAgent\nEntity-relationship extraction response details:\n{get_formatted_openai_response(response)}"
@@ -149,7 +164,10 @@ class EntityDeduplicationAgent(BaseAgent):
         )
 
         response = await self.agent_system.llm_client.fetch_response(
-            system_prompt=system_prompt, user_prompt=user_prompt, **self.agent_config
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            agent_name=self.agent_name,
+            **self.agent_config,
         )
         graph_construction_logger.info(
             f"EntityDeduplicationAgent\nEntity deduplication response details:\n{get_formatted_openai_response(response)}"
@@ -190,7 +208,10 @@ class RelationshipDeduplicationAgent(BaseAgent):
         )
 
         response = await self.agent_system.llm_client.fetch_response(
-            system_prompt=system_prompt, user_prompt=user_prompt, **self.agent_config
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            agent_name=self.agent_name,
+            **self.agent_config,
         )
         graph_construction_logger.info(
             f"RelationshipDeduplicationAgent\nRelationship deduplication response details:\n{get_formatted_openai_response(response)}"
@@ -253,6 +274,12 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
             self.async_mongo_storage_reports = AsyncMongoDBStorage(
                 async_mongo_client_reports
             )
+            self.ontology_provider = OntologyProvider(
+                async_mongo_storage=self.async_mongo_storage,
+                ontology_config=ontology_config,
+            )
+            # Rendered extraction system prompts keyed by (ontology version, slice size)
+            self._extraction_system_prompts: dict[tuple, list[str]] = {}
 
             # Both indices use the same OpenAI API Key and PineconeAPI Key at the current momment
             self.pinecone_storage = PineconeStorage(
@@ -280,6 +307,35 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
             graph_construction_logger.error(f"GraphConstructionSystem: {e}")
             raise RuntimeError(f"Failed to intialize GraphConstructionSystem: {e}")
 
+    async def _ensure_indexes(self, from_company: str) -> None:
+        """
+        Applies the registered MongoDB indexes to the collections queried by the pipelines.
+        Idempotent per storage instance, so it is called at the start of every pipeline step.
+        """
+        await self.async_mongo_storage.ensure_registered_indexes(
+            {
+                "ontology": self.ontology_config,
+                "entities": self.entity_config,
+                "relationships": self.relationship_config,
+                "entities_deduplication_pending_tasks": self.entities_deduplication_pending_tasks_config,
+            }
+        )
+        await self.async_mongo_storage_reports.ensure_registered_indexes(
+            {
+                "disclosures": self.disclosure_config,
+                "constraints": self.constraints_config,
+            }
+        )
+        # The caches are stored in one collection per company
+        await self.async_mongo_storage.ensure_indexes(
+            "entity_cache", self.entity_cache_config["database_name"], from_company
+        )
+        await self.async_mongo_storage.ensure_indexes(
+            "relationship_cache",
+            self.relationship_cache_config["database_name"],
+            from_company,
+        )
+
     async def extract_entities_relationships_from_unparsed_documents(
         self,
         from_company: str,
@@ -293,10 +349,15 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
         Process unparsed disclosure documents concurrently with controlled parallelism
         and guaranteed atomicity per document.
         """
+        await self._ensure_indexes(from_company)
+
         # Step 1 : Gather the ontology, constraints, and documents.
-        latest_onto = await self._get_latest_ontology()
+        # The system prompts (one per ontology slice) are rendered once and shared by every document in this run
+        extraction_system_prompts = await self._get_extraction_system_prompts(
+            num_of_relationships_per_onto=num_of_relationships_per_onto
+        )
         graph_construction_logger.info(
-            f"GraphConstructionSystem\Ontology fetched:\n{get_formatted_ontology(latest_onto)}"
+            f"GraphConstructionSystem\Ontology fetched:\n{await self.ontology_provider.get_formatted_ontology()}"
         )
         constraints = await self._get_parsing_constraints(
             from_company=from_company, published_at=published_at
@@ -330,10 +391,9 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
         processing_tasks = [
             self._process_single_document_pipeline(
                 document=doc,
-                ontology=latest_onto,
+                extraction_system_prompts=extraction_system_prompts,
                 constraints=constraints,
                 from_company=from_company,
-                num_of_relationships_per_onto=num_of_relationships_per_onto,
                 semaphore=semaphore,
             )
             for doc in unparsed_documents
@@ -347,11 +407,10 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
     async def _process_single_document_pipeline(
         self,
         document: dict,
-        ontology: dict,
+        extraction_system_prompts: list[str],
         constraints: str,
         from_company: str,
         semaphore: asyncio.Semaphore,
-        num_of_relationships_per_onto: int = 10,
     ):
         """
         A single, atomic pipeline for one document: Extract -> Insert -> Update Status.
@@ -363,10 +422,9 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
                     f"Pipeline started for document: {document.get('name')}"
                 )
                 extracted_data = await self._get_extracted_entities_and_relationships(
-                    ontology=ontology,
+                    extraction_system_prompts=extraction_system_prompts,
                     source_text_details=document,
                     source_text_constraints=constraints,
-                    num_of_relationships_per_onto=num_of_relationships_per_onto,
                 )
 
                 # Step 2 : Insertion and Status Update (DB transaction)
@@ -383,14 +441,39 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
 
     async def _get_latest_ontology(self) -> dict:
         try:
-            return (
-                await self.async_mongo_storage.get_database(
-                    self.ontology_config["database_name"]
-                )
-                .get_collection(self.ontology_config["collection_name"])
-                .read_documents({"is_latest": True})
-            )[0].get("ontology", {})
+            return await self.ontology_provider.get_ontology()
+        except Exception as e:
+            raise LookupError("Failed to fetch latest ontology") from e
 
+    async def _get_extraction_system_prompts(
+        self, num_of_relationships_per_onto: int
+    ) -> list[str]:
+        """
+        Returns one rendered extraction system prompt per ontology slice, memoized per
+        (ontology version, slice size).
+        """
+        try:
+            version = await self.ontology_provider.get_version()
+            key = (version, num_of_relationships_per_onto)
+            if key not in self._extraction_system_prompts:
+                formatted_sliced_ontologies = (
+                    await self.ontology_provider.get_formatted_sliced_ontologies(
+                        num_of_relationships_per_slice=num_of_relationships_per_onto
+                    )
+                )
+                # Prompts rendered from older ontology versions are no longer needed
+                self._extraction_system_prompts = {
+                    cached_key: prompts
+                    for cached_key, prompts in self._extraction_system_prompts.items()
+                    if cached_key[0] == version
+                }
+                self._extraction_system_prompts[key] = [
+                    get_formatted_extraction_system_prompt(
+                        formatted_ontology=formatted_sliced_ontology
+                    )
+                    for formatted_sliced_ontology in formatted_sliced_ontologies
+                ]
+            return self._extraction_system_prompts[key]
         except Exception as e:
             raise LookupError("Failed to fetch latest ontology") from e
 
@@ -406,7 +489,8 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
                         "from_company": from_company,
                         "type": "CONSTRAINTS",
                         "published_at": published_at,
-                    }
+                    },
+                    projection={"content": 1},
                 )
             )
         except Exception as e:
@@ -432,7 +516,10 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
                         "type": document_type,
                         "published_at": published_at,
                         "is_parsed": False,
-                    }
+                        # Filter on the server so the content of excluded documents is never transferred
+                        "name": {"$nin": exclude_documents},
+                    },
+                    projection={"name": 1, "published_at": 1, "content": 1},
                 )
             )
         except Exception as e:
@@ -445,27 +532,19 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
                 "content": doc.get("content", ""),
             }
             for doc in raw_documents
-            if doc.get("name", "") not in exclude_documents
         ]
 
     async def _get_extracted_entities_and_relationships(
         self,
-        ontology: dict,
+        extraction_system_prompts: list[str],
         source_text_details: dict,
         source_text_constraints: str,
-        num_of_relationships_per_onto: int,
     ) -> dict:
         all_tasks = []
-        num_of_relationships = len(ontology["relationships"])
 
-        for i in range(0, num_of_relationships, num_of_relationships_per_onto):
-            sliced_ontology = get_sliced_ontology(
-                ontology=ontology,
-                i=i,
-                k=min(i + num_of_relationships_per_onto, num_of_relationships),
-            )
+        for extraction_system_prompt in extraction_system_prompts:
             task = self.agents["EntityRelationshipExtractionAgent"].handle_task(
-                ontology=sliced_ontology,
+                system_prompt=extraction_system_prompt,
                 source_text=source_text_details.get("content"),
                 source_text_publish_date=source_text_details.get("published_at"),
                 source_text_constraints=source_text_constraints,
@@ -566,6 +645,8 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
         num_of_relationships_to_fetch: int = 5,
         max_wait_time_per_task: int = 5,
     ):
+        await self._ensure_indexes(from_company)
+
         while True:
             # Step 1 : Update the cache size
             await self._update_entities_cache_size(
@@ -721,13 +802,13 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
                     )
 
                 # Step 4a : Fetch the full candidate entity details after locking
-                candidate_entity = (
-                    await self.async_mongo_storage.get_database(
+                candidate_entity = await (
+                    self.async_mongo_storage.get_database(
                         self.entity_cache_config["database_name"]
                     )
                     .get_collection(from_company)
-                    .read_documents(query={"_id": ObjectId(candidate_entity_id)})
-                )[0]
+                    .find_one(query={"_id": ObjectId(candidate_entity_id)})
+                )
 
                 # Step 5a : Prepare entities details for LLM comparison
                 candidate_entity_details = (
@@ -854,6 +935,7 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
                         sort=[("last_modified_at", ASCENDING)],
                         limit=num_of_cache_to_remove,
                         session=session,
+                        projection={"_id": 1},
                     )
 
                     if not oldest_items:
@@ -927,6 +1009,7 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
                     ],
                 },
                 limit=num_of_relationships_to_fetch,
+                projection={"description": 1},
             )
         )
         return get_formatted_entity_details_for_deduplication(
@@ -1188,6 +1271,8 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
         max_cache_size: int,
         max_wait_time_per_task: int,
     ):
+        await self._ensure_indexes(from_company)
+
         while True:
             # Step 1 : Update relationships cache size
             await self._update_relationships_cache_size(
@@ -1247,22 +1332,23 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
         max_wait_time_minutes: int,
     ):
         # Step 1 : Find candidate relationship in cache
-        matches = await (
+        match = await (
             self.async_mongo_storage.get_database(
                 self.relationship_cache_config["database_name"]
             )
             .get_collection(from_company)
-            .read_documents(
+            .find_one(
                 query={
                     "source_id": relationship["source_id"],
                     "target_id": relationship["target_id"],
                     "type": relationship["type"],
-                }
+                },
+                projection={"_id": 1},
             )
         )
-        if matches:
+        if match:
             # Step 2a : If there is a matching relationship, attempt to acquire its write lock
-            candidate_relationship_id = matches[0]["_id"]
+            candidate_relationship_id = match["_id"]
             lock_acquired = False
             wait_time = timedelta(minutes=max_wait_time_minutes)
             poll_interval_seconds = 10
@@ -1313,13 +1399,13 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
                     )
 
                 # Step 4a : Refetch the candidate relalationship after locking
-                candidate_relationship = (
-                    await self.async_mongo_storage.get_database(
+                candidate_relationship = await (
+                    self.async_mongo_storage.get_database(
                         self.relationship_cache_config["database_name"]
                     )
                     .get_collection(from_company)
-                    .read_documents(query={"_id": candidate_relationship_id})
-                )[0]
+                    .find_one(query={"_id": candidate_relationship_id})
+                )
 
                 # Step 5a : Merge the relationships
                 await self._merge_relationships(
@@ -1489,6 +1575,7 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
                         sort=[("last_modified_at", ASCENDING)],
                         limit=num_of_cache_to_remove,
                         session=session,
+                        projection={"_id": 1},
                     )
 
                     if not oldest_items:
@@ -1576,6 +1663,7 @@ class GraphConstructionSystem(BaseMultiAgentSystem):
     async def upsert_entities_and_relationships_into_graph(
         self, from_company: str, batch_size: int= 100
     ):
+        await self._ensure_indexes(from_company)
         await self.upsert_entities_into_pinecone(from_company, batch_size)
         await self.upsert_entities_and_relationships_into_neo4j(
             from_company, batch_size
@@ -6,6 +6,7 @@ from ..util import get_clean_json, get_current_datetime
 from typing import Any
 
 from ..util import get_normalized_string, get_formatted_current_datetime
+from ..prompts import PROMPT
 
 
 def get_formatted_entities_and_relationships_for_db(
@@ -194,3 +195,11 @@ def get_formatted_entity_details_for_deduplication(
         output.append(f"  {i}. {relationship.get('description', '')}")
 
     return "\n".join(output)
+
+
+def get_formatted_extraction_system_prompt(formatted_ontology: str) -> str:
+    """
+    Renders the entity-relationship extraction system prompt. It only depends on the ontology slice,
+    so every document parsed with the same slice shares the whole system prompt as a cacheable prefix.
+    """
+    return PROMPT["ENTITIES_RELATIONSHIPS_PARSING"].format(ontology=formatted_ontology)
@@ -1 +1,4 @@
 from .graph_retrieval import GraphRetrievalSystem
+from .query_events import QueryEvent, QueryStage
+from .chat_session import ChatSession
+from .query_server import QueryServer
@@ -0,0 +1,23 @@
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ChatSession:
+    """
+    Conversation state of one user of a GraphRetrievalSystem.
+
+    The ChatAgent continues a conversation through `previous_response_id`, so each user needs their own
+    `current_chat_id`. `lock` serializes the requests of a session, since two concurrent turns would both
+    continue from the same response.
+    """
+
+    session_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    current_chat_id: str | None = None
+    last_active_at: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def touch(self) -> None:
+        self.last_active_at = time.monotonic()
@@ -3,18 +3,25 @@ from __future__ import annotations
 import logging
 import json
 import asyncio
-from typing import AsyncGenerator
+import time
+from typing import AsyncGenerator, Callable
 from motor.motor_asyncio import AsyncIOMotorClient
 
 from ogmyrag.report_retrieval.report_chunker import rag_answer_with_company_detection
+from ogmyrag.report_retrieval.answer_cache import SemanticAnswerCache, get_data_versions
+from ogmyrag.report_retrieval.company_catalog import get_company_catalog
+from ogmyrag.report_retrieval.embedding_batcher import EmbeddingBatcher
 
 from ..prompts import PROMPT
-from ..llm import fetch_responses_openai
+from ..llm import OpenAIAsyncClient
 from ..util import (
     get_clean_json,
     get_formatted_ontology,
     get_formatted_openai_response,
     get_formatted_similar_entities,
+    get_token_usage,
+    OntologyProvider,
+    JSONFieldStreamExtractor,
 )
 
 from ..storage import (
@@ -26,22 +33,61 @@ from ..storage import (
 from ..base import (
     BaseAgent,
     BaseMultiAgentSystem,
+    BaseLLMClient,
     MongoStorageConfig,
     PineconeStorageConfig,
     Neo4jStorageConfig,
 )
 
+from .text2cypher_cache import Text2CypherCache
+from .query_events import QueryEvent, QueryStage
+from .chat_session import ChatSession
 from .graph_retrieval_util import (
     get_stringified_cypher_retrieval_result,
     get_formatted_input_for_query_agent,
     get_formatted_cypher,
     get_formatted_validated_entities,
     get_formatted_decomposed_request,
+    get_formatted_truncation_note,
+    get_cypher_schema_errors,
+    get_formatted_cypher_validation_note,
+    get_merged_cypher_validation,
+    get_formatted_candidates_instruction,
+    get_normalized_text2cypher_response,
+    get_formatted_candidate_results,
+    get_compiled_cypher_retrieval_result,
+    get_formatted_step_timing,
+    get_latency_summary,
+    get_formatted_latency_summary,
 )
 
 graph_retrieval_logger = logging.getLogger("graph_retrieval")
 
 
+async def _fetch_agent_response(
+    llm_client: BaseLLMClient,
+    on_delta: Callable[[str], None] | None = None,
+    **kwargs,
+):
+    """
+    Calls `fetch_response`, or streams the call when `on_delta` is given, forwarding the decoded
+    "response" field of the agent's JSON output as it is generated.
+    """
+    if on_delta is None:
+        return await llm_client.fetch_response(**kwargs)
+
+    extractor = JSONFieldStreamExtractor("response")
+    response = None
+    async for event in llm_client.stream_response(**kwargs):
+        if event["type"] == "delta":
+            delta = extractor.feed(event["delta"])
+            if delta:
+                on_delta(delta)
+        elif event["type"] == "completed":
+            response = event["response"]
+    return response
+
+
 class ChatAgent(BaseAgent):
     """
     An agent responsible for interacting with the user.
@@ -52,22 +98,29 @@ class ChatAgent(BaseAgent):
         Parameters:
             chat_input (str),
             similarity_threshold(float),
-            previous_chat_id (str)
+            previous_chat_id (str),
+            on_delta (Callable[[str], None] | None): Receives the response text as it is generated
         """
         graph_retrieval_logger.info(f"ChatAgent is called")
 
-        system_prompt = PROMPT["CHAT"].format(
-            similarity_threshold=kwargs.get("similarity_threshold", 0.5) or 0.5,
-        )
+        # The system prompt carries no per-call values so that it stays a cacheable prefix
+        system_prompt = PROMPT["CHAT"].format()
         graph_retrieval_logger.debug(f"ChatAgent\nSystem prompt used:\n{system_prompt}")
 
-        user_prompt = kwargs.get("chat_input", "") or ""
+        user_prompt = (
+            (kwargs.get("chat_input", "") or "")
+            + "\n\nSimilarity threshold: "
+            + str(kwargs.get("similarity_threshold", 0.5) or 0.5)
+        )
         graph_retrieval_logger.debug(f"ChatAgent\nUser prompt used:\n{user_prompt}")
 
-        response = await fetch_responses_openai(
+        response = await _fetch_agent_response(
+            self.agent_system.llm_client,
+            on_delta=kwargs.get("on_delta"),
             model="o4-mini",
             system_prompt=system_prompt,
             user_prompt=user_prompt,
+            agent_name=self.agent_name,
             text={"format": {"type": "text"}},
             reasoning={"effort": "medium"},
             max_output_tokens=100000,
@@ -81,6 +134,7 @@ class ChatAgent(BaseAgent):
 
         formatted_response = get_clean_json(response.output_text)
         formatted_response["id"] = response.id
+        formatted_response["usage"] = get_token_usage(response)
 
         return formatted_response
 
@@ -90,7 +144,14 @@ class VectorRAGAgent(BaseAgent):
     An agent that runs Pinecone-based RAG and returns a structured payload.
     """
 
-    def __init__(self, agent_name: str, pinecone_config: dict):
+    def __init__(
+        self,
+        agent_name: str,
+        pinecone_config: dict,
+        answer_cache_size: int = 1000,
+        answer_cache_threshold: float = 0.95,
+        answer_cache_ttl: float | None = 3600.0,
+    ):
         super().__init__(agent_name)
         # pinecone storage for RAG
         self.pine = PineconeStorage(
@@ -105,6 +166,20 @@ class VectorRAGAgent(BaseAgent):
             region=pinecone_config["pinecone_environment"],
         )
         self.pinecone_config = pinecone_config
+        # Concurrent queries share embedding calls
+        self.embedder = EmbeddingBatcher(self.pine._embed_text)
+        # Set answer_cache_size to 0 to always run the RAG pipeline
+        self.answer_cache = (
+            SemanticAnswerCache(
+                embed_fn=self.embedder.embed,
+                data_versions=get_data_versions(self.pine, pinecone_config["index_name"]),
+                max_entries=answer_cache_size,
+                similarity_threshold=answer_cache_threshold,
+                ttl=answer_cache_ttl,
+            )
+            if answer_cache_size > 0
+            else None
+        )
 
     async def handle_task(self, **kwargs):
         """
@@ -126,6 +201,12 @@ class VectorRAGAgent(BaseAgent):
 
             # Concurrency:
             max_concurrency (int)                     [default: 4]
+
+            # Streaming:
+            on_delta (Callable[[str], None])          [optional, receives the synthesized answer as it is generated]
+
+            # Caching:
+            use_answer_cache (bool)                   [default: True]
         """
         graph_retrieval_logger.info("VectorRAGAgent is called")
 
@@ -167,6 +248,40 @@ class VectorRAGAgent(BaseAgent):
         hits_per_subquery = int(kwargs.get("hits_per_subquery", 5))
         hits_preview_chars = int(kwargs.get("hits_preview_chars", 240))
 
+        # ---- semantic answer cache ----
+        on_delta = kwargs.get("on_delta")
+        answer_cache = self.answer_cache if kwargs.get("use_answer_cache", True) else None
+        cache_lookup = None
+        if answer_cache is not None:
+            try:
+                detector = await get_company_catalog(
+                    self.pine, self.pinecone_config["index_name"], catalog_namespace
+                ).get_detector()
+                cached_answer, cache_lookup = await answer_cache.get(
+                    q,
+                    {
+                        "top_k": top_k,
+                        "data_namespace": data_namespace,
+                        "doc_type": doc_type,
+                        "report_type_name": report_type_name,
+                        "year": year,
+                        "score_threshold": score_threshold,
+                        "answer_model": answer_model,
+                    },
+                    detector,
+                )
+            except Exception as e:
+                graph_retrieval_logger.warning("VectorRAGAgent: answer cache lookup failed: %s", e)
+                cached_answer = None
+            if cached_answer is not None:
+                graph_retrieval_logger.info("VectorRAGAgent: answered query=%r from cache", q)
+                if on_delta is not None:
+                    on_delta(cached_answer)
+                return {
+                    "type": "RAG_RESPONSE",
+                    "payload": {"answer": cached_answer},
+                }
+
         # ---- call the new RAG (which returns {"RAG_RESPONSE": <final answer>}) ----
         try:
             res = await rag_answer_with_company_detection(
@@ -187,9 +302,18 @@ class VectorRAGAgent(BaseAgent):
                 return_hits=log_hits,
                 hits_per_subquery=hits_per_subquery,
                 hits_preview_chars=hits_preview_chars,
+                on_delta=on_delta,
+                embed_fn=self.embedder.embed,
             )
             graph_retrieval_logger.info("VectorRAGAgent: completed RAG for query=%r", q)
             final_answer = res.get("RAG_RESPONSE", "")
+            # Failures are not cached so that the next identical query retries
+            if (
+                answer_cache is not None
+                and cache_lookup is not None
+                and final_answer != "Failed to generate an answer."
+            ):
+                answer_cache.put(q, final_answer, cache_lookup)
             graph_retrieval_logger.debug(
                 "RAG_RESPONSE length=%d preview=%s",
                 len(final_answer or ""),
@@ -273,10 +397,11 @@ class RequestDecompositionAgent(BaseAgent):
             f"RequestDecompositionAgent\nUser prompt used:\n{user_prompt}"
         )
 
-        response = await fetch_responses_openai(
+        response = await self.agent_system.llm_client.fetch_response(
             model="gpt-5-mini",
             system_prompt=system_prompt,
             user_prompt=user_prompt,
+            agent_name=self.agent_name,
             text={"format": {"type": "text"}},
             reasoning={"effort": "medium"},
             max_output_tokens=100000,
@@ -288,6 +413,7 @@ class RequestDecompositionAgent(BaseAgent):
         )
 
         formatted_response = get_clean_json(response.output_text)
+        formatted_response["usage"] = get_token_usage(response)
 
         return formatted_response
 
@@ -302,12 +428,15 @@ class QueryAgent(BaseAgent):
         Parameters:
             user_request (str),
             ontology (dict),
+            formatted_ontology (str | None): Pre-rendered ontology, takes precedence over `ontology`
             previous_response_id (str | None)
+            on_delta (Callable[[str], None] | None): Receives the final response text as it is generated
         """
         graph_retrieval_logger.info(f"QueryAgent is called")
 
         system_prompt = PROMPT["QUERY"].format(
-            ontology=get_formatted_ontology(
+            ontology=kwargs.get("formatted_ontology")
+            or get_formatted_ontology(
                 data=kwargs.get("ontology", {}), exclude_entity_fields=["llm-guidance"]
             )
         )
@@ -318,10 +447,13 @@ class QueryAgent(BaseAgent):
         user_prompt = kwargs.get("user_request", "")
         graph_retrieval_logger.debug(f"QueryAgent\nUser prompt used:\n{user_prompt}")
 
-        response = await fetch_responses_openai(
+        response = await _fetch_agent_response(
+            self.agent_system.llm_client,
+            on_delta=kwargs.get("on_delta"),
             model="o4-mini",
             system_prompt=system_prompt,
             user_prompt=user_prompt,
+            agent_name=self.agent_name,
             text={"format": {"type": "text"}},
             reasoning={"effort": "high"},
             max_output_tokens=100000,
@@ -335,6 +467,7 @@ class QueryAgent(BaseAgent):
 
         formatted_response = get_clean_json(response.output_text)
         formatted_response["id"] = response.id
+        formatted_response["usage"] = get_token_usage(response)
 
         return formatted_response
 
@@ -350,13 +483,16 @@ class Text2CypherAgent(BaseAgent):
             user_query (str),
             validated_entities list(str),
             ontology (dict),
+            formatted_ontology (str | None): Pre-rendered ontology, takes precedence over `ontology`
             note (str | None)
             previous_response_id (str | None)
+            num_of_candidates (int): When greater than 1, alternative Cypher queries are returned in `candidates`
         """
         graph_retrieval_logger.info(f"Text2CypherAgent is called")
 
         system_prompt = PROMPT["TEXT2CYPHER"].format(
-            ontology=get_formatted_ontology(
+            ontology=kwargs.get("formatted_ontology")
+            or get_formatted_ontology(
                 data=kwargs.get("ontology", {}), exclude_entity_fields=["llm-guidance"]
             )
         )
@@ -373,14 +509,19 @@ class Text2CypherAgent(BaseAgent):
         user_prompt = (
             formatted_user_query + formatted_validated_entities + formattted_note
         )
+        num_of_candidates = kwargs.get("num_of_candidates", 1) or 1
+        if num_of_candidates > 1:
+            # Kept in the user prompt so the system prompt remains identical across modes
+            user_prompt += get_formatted_candidates_instruction(num_of_candidates)
         graph_retrieval_logger.debug(
             f"Text2CypherAgent\nUser prompt used:\n{user_prompt}"
         )
 
-        response = await fetch_responses_openai(
+        response = await self.agent_system.llm_client.fetch_response(
             model="o4-mini",
             system_prompt=system_prompt,
             user_prompt=user_prompt,
+            agent_name=self.agent_name,
             text={"format": {"type": "text"}},
             reasoning={"effort": "high"},
             max_output_tokens=100000,
@@ -392,8 +533,11 @@ class Text2CypherAgent(BaseAgent):
             f"Text2CypherAgent\nText2CypherAgent response details:\n{get_formatted_openai_response(response)}"
         )
 
-        formatted_response = get_clean_json(response.output_text)
+        formatted_response = get_normalized_text2cypher_response(
+            get_clean_json(response.output_text)
+        )
         formatted_response["id"] = response.id
+        formatted_response["usage"] = get_token_usage(response)
 
         return formatted_response
 
@@ -408,6 +552,7 @@ class RetrievalResultCompilationAgent(BaseAgent):
         Parameters:
             formatted_cypher_query (str),
             formatted_retrieval_result (str),
+            truncation_note (str | None): Set when the retrieval result was cut short by the query limits
         """
         graph_retrieval_logger.info(f"RetrievalResultCompilationAgent is called")
 
@@ -423,14 +568,17 @@ class RetrievalResultCompilationAgent(BaseAgent):
             "formatted_retrieval_result", ""
         )
         user_prompt = formatted_user_query + "\n" + formatted_retrieval_result
+        if kwargs.get("truncation_note"):
+            user_prompt += "\nNote: " + kwargs["truncation_note"]
         graph_retrieval_logger.debug(
             f"RetrievalResultCompilationAgent\nUser prompt used:\n{user_prompt}"
         )
 
-        response = await fetch_responses_openai(
+        response = await self.agent_system.llm_client.fetch_response(
             model="gpt-4.1-mini",
             system_prompt=system_prompt,
             user_prompt=user_prompt,
+            agent_name=self.agent_name,
             text={"format": {"type": "text"}},
             max_output_tokens=32768,
             tools=[],
@@ -440,7 +588,10 @@ class RetrievalResultCompilationAgent(BaseAgent):
             f"RetrievalResultCompilationAgent\nText2CypherAgent response details:\n{get_formatted_openai_response(response)}"
         )
 
-        return get_clean_json(response.output_text)
+        formatted_response = get_clean_json(response.output_text)
+        formatted_response["usage"] = get_token_usage(response)
+
+        return formatted_response
 
 
 class GraphRetrievalSystem(BaseMultiAgentSystem):
@@ -451,6 +602,14 @@ class GraphRetrievalSystem(BaseMultiAgentSystem):
         entity_vector_config: PineconeStorageConfig,
         graphdb_config: Neo4jStorageConfig,
         rag_vector_config: PineconeStorageConfig,
+        llm_client: BaseLLMClient | None = None,
+        text2cypher_cache_size: int = 1000,
+        cypher_max_rows: int = 200,
+        cypher_max_bytes: int = 100_000,
+        cypher_timeout: float = 30.0,
+        max_cypher_validation_retries: int = 2,
+        compilation_max_rows: int = 50,
+        compilation_max_chars: int = 8000,
     ):
         super().__init__(
             {
@@ -464,7 +623,8 @@ class GraphRetrievalSystem(BaseMultiAgentSystem):
                 "RetrievalResultCompilationAgent": RetrievalResultCompilationAgent(
                     "RetrievalResultCompilationAgent"
                 ),
-            }
+            },
+            llm_client=llm_client or OpenAIAsyncClient(),
         )
 
         try:
@@ -472,6 +632,10 @@ class GraphRetrievalSystem(BaseMultiAgentSystem):
             self.entity_vector_config = entity_vector_config
 
             self.async_mongo_storage = AsyncMongoDBStorage(mongo_client)
+            self.ontology_provider = OntologyProvider(
+                async_mongo_storage=self.async_mongo_storage,
+                ontology_config=ontology_config,
+            )
             self.pinecone_storage = PineconeStorage(
                 pinecone_api_key=entity_vector_config["pinecone_api_key"],
                 openai_api_key=entity_vector_config["openai_api_key"],
@@ -485,8 +649,28 @@ class GraphRetrievalSystem(BaseMultiAgentSystem):
             )
 
             self.graph_storage = AsyncNeo4jStorage(**graphdb_config)
+            # Limits applied to every generated Cypher query so a query without LIMIT cannot flood the prompt
+            self.cypher_max_rows = cypher_max_rows
+            self.cypher_max_bytes = cypher_max_bytes
+            self.cypher_timeout = cypher_timeout
+            self.max_cypher_validation_retries = max_cypher_validation_retries
+            # Results within these limits are rendered as a table instead of calling RetrievalResultCompilationAgent.
+            # Set compilation_max_rows to 0 to always use the LLM.
+            self.compilation_max_rows = compilation_max_rows
+            self.compilation_max_chars = compilation_max_chars
+
+            # Set text2cypher_cache_size to 0 to always call Text2CypherAgent
+            self.text2cypher_cache = (
+                Text2CypherCache(
+                    max_entries=text2cypher_cache_size,
+                    embed_fn=self.pinecone_storage._embed_text,
+                )
+                if text2cypher_cache_size > 0
+                else None
+            )
 
-            self.current_chat_id = None
+            # Conversation state used when no ChatSession is passed to query()
+            self.chat_session = ChatSession(session_id="default")
 
         except Exception as e:
             graph_retrieval_logger.error(f"GraphRetrievalSystem: {e}")
@@ -498,129 +682,469 @@ class GraphRetrievalSystem(BaseMultiAgentSystem):
         top_k_for_similarity: int,
         similarity_threshold: float = 0.5,
         max_tool_call: int = 3,
-    ):
-        yield "## Calling ChatAgent..."
+        speculative_candidates: int = 1,
+        deadline: float | None = None,
+        chat_session: ChatSession | None = None,
+        stream_deltas: bool = False,
+    ) -> AsyncGenerator[str, None]:
+        """
+        Streams the markdown messages of `query_events`.
+
+        Parameters:
+            stream_deltas (bool): Also yield the final response of ChatAgent token by token as it is generated.
+                                  The complete final response is then not yielded again.
+        """
+        final_response_streamed = False
+        async for event in self.query_events(
+            user_request=user_request,
+            top_k_for_similarity=top_k_for_similarity,
+            similarity_threshold=similarity_threshold,
+            max_tool_call=max_tool_call,
+            speculative_candidates=speculative_candidates,
+            deadline=deadline,
+            chat_session=chat_session,
+        ):
+            if event.stage == QueryStage.RESPONSE_DELTA:
+                # Deltas of other agents interleave across concurrent subrequests, only ChatAgent's are forwarded
+                if stream_deltas and event.agent == "ChatAgent":
+                    final_response_streamed = True
+                    yield event.message
+                continue
+            if event.stage == QueryStage.FINAL_RESPONSE and final_response_streamed:
+                final_response_streamed = False
+                continue
+            if event.message:
+                yield event.message
+
+    async def query_events(
+        self,
+        user_request: str,
+        top_k_for_similarity: int,
+        similarity_threshold: float = 0.5,
+        max_tool_call: int = 3,
+        speculative_candidates: int = 1,
+        deadline: float | None = None,
+        chat_session: ChatSession | None = None,
+    ) -> AsyncGenerator[QueryEvent, None]:
+        """
+        Answers a user request, streaming every step as a QueryEvent.
+
+        The pipeline runs in its own task, so closing this generator (e.g. when the client disconnects)
+        or reaching the deadline cancels every in-flight LLM call, vector lookup and Cypher query.
+        User-facing text (ChatAgent and QueryAgent final responses, the VectorRAG answer) is also streamed
+        as RESPONSE_DELTA events while it is generated.
+
+        Parameters:
+            speculative_candidates (int): Number of alternative Cypher queries Text2CypherAgent generates per
+                                          iteration. They are validated and executed concurrently and evaluated
+                                          together, trading extra database load for fewer refinement rounds.
+            deadline (float | None): Seconds after which the request is cancelled and an ERROR event is emitted.
+                                     None means no deadline; 0 cancels the request immediately.
+            chat_session (ChatSession | None): Conversation to continue, defaults to the system-wide session.
+        """
+        if deadline is not None and deadline < 0:
+            raise ValueError(f"deadline must be non-negative, got {deadline}")
+
+        queue = asyncio.Queue()
+        done = object()
+
+        async def produce():
+            try:
+                async for event in self._run_query(
+                    user_request=user_request,
+                    top_k_for_similarity=top_k_for_similarity,
+                    similarity_threshold=similarity_threshold,
+                    max_tool_call=max_tool_call,
+                    speculative_candidates=speculative_candidates,
+                    chat_session=chat_session or self.chat_session,
+                    emit=queue.put_nowait,
+                ):
+                    queue.put_nowait(event)
+            except Exception as e:
+                queue.put_nowait(e)
+            finally:
+                queue.put_nowait(done)
+
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + deadline if deadline is not None else None
+        task = asyncio.create_task(produce())
+        try:
+            while True:
+                timeout = (
+                    None if expires_at is None else max(expires_at - loop.time(), 0)
+                )
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    graph_retrieval_logger.warning(
+                        f"GraphRetrievalSystem\nDeadline of {deadline}s exceeded, cancelling the request"
+                    )
+                    yield QueryEvent(
+                        stage=QueryStage.ERROR,
+                        message=f"**The request exceeded its deadline of {deadline}s and was cancelled.**",
+                        payload={"reason": "DEADLINE_EXCEEDED"},
+                    )
+                    break
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Also reached when the consumer stops iterating, so abandoned requests stop immediately
+            if not task.done():
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _run_query(
+        self,
+        user_request: str,
+        top_k_for_similarity: int,
+        similarity_threshold: float,
+        max_tool_call: int,
+        speculative_candidates: int,
+        chat_session: ChatSession,
+        emit: Callable[[QueryEvent], None] | None = None,
+    ) -> AsyncGenerator[QueryEvent, None]:
+        yield QueryEvent(
+            stage=QueryStage.CHAT, message="## Calling ChatAgent...", agent="ChatAgent"
+        )
         chat_agent_response = await self.agents["ChatAgent"].handle_task(
             chat_input=user_request,
             similarity_threshold=similarity_threshold,
-            previous_chat_id=self.current_chat_id,
+            previous_chat_id=chat_session.current_chat_id,
+            on_delta=self._get_delta_handler(emit, "ChatAgent"),
         )
 
+        # The GraphRAGAgent usually follows entity validation, so the ontology is fetched in the meantime
+        ontology_context_task = None
         tool_call = 0
-        while True:
-            self._update_current_chat_id(chat_agent_response["id"])
+        try:
+            while True:
+                self._update_current_chat_id(chat_agent_response["id"], chat_session)
+
+                if chat_agent_response["type"] == "RESPONSE_GENERATION":
+                    yield QueryEvent(
+                        stage=QueryStage.FINAL_RESPONSE,
+                        message=chat_agent_response["payload"]["response"],
+                        agent="ChatAgent",
+                        payload=chat_agent_response["payload"],
+                        token_usage=chat_agent_response.get("usage"),
+                    )
+                    break
 
-            if chat_agent_response["type"] == "RESPONSE_GENERATION":
-                yield chat_agent_response["payload"]["response"]
-                break
+                if tool_call >= max_tool_call:
+                    yield QueryEvent(
+                        stage=QueryStage.CHAT,
+                        message=f"**Maximum number of tool calls ({max_tool_call}) reached. Forcing final response generation...**",
+                        agent="ChatAgent",
+                    )
+                    final_response_generation = await self.agents[
+                        "ChatAgent"
+                    ].handle_task(
+                        chat_input="You have reached the maximum number of tool calls. You must now generate the final result based on the information and context you have gathered so far, regardless of its quality. Do not call any more tools.",
+                        similarity_threshold=similarity_threshold,
+                        previous_chat_id=chat_session.current_chat_id,
+                        on_delta=self._get_delta_handler(emit, "ChatAgent"),
+                    )
+                    if final_response_generation["type"] == "RESPONSE_GENERATION":
+                        yield QueryEvent(
+                            stage=QueryStage.FINAL_RESPONSE,
+                            message=final_response_generation["payload"]["response"],
+                            agent="ChatAgent",
+                            payload=final_response_generation["payload"],
+                            token_usage=final_response_generation.get("usage"),
+                        )
+                    else:
+                        yield QueryEvent(
+                            stage=QueryStage.ERROR,
+                            message="**Agent failed to generate a final response after reaching the tool call limit.**",
+                            agent="ChatAgent",
+                        )
+                    break
 
-            if tool_call >= max_tool_call:
-                yield f"**Maximum number of tool calls ({max_tool_call}) reached. Forcing final response generation...**"
-                final_response_generation = await self.agents["ChatAgent"].handle_task(
-                    chat_input="You have reached the maximum number of tool calls. You must now generate the final result based on the information and context you have gathered so far, regardless of its quality. Do not call any more tools.",
-                    similarity_threshold=similarity_threshold,
-                    previous_chat_id=self.current_chat_id,
-                )
-                if final_response_generation["type"] == "RESPONSE_GENERATION":
-                    yield final_response_generation["payload"]["response"]
-                else:
-                    yield "**Agent failed to generate a final response after reaching the tool call limit.**"
-                break
-
-            if chat_agent_response["type"] == "CALLING_ENTITY_VALIDATION_TOOL":
-                yield "## Calling EntityValidationTool"
-                yield "**Validating entities in the query...**"
-                similar_entities = await self.pinecone_storage.get_index(
-                    self.entity_vector_config["index_name"]
-                ).get_similar_results(
-                    query_texts=chat_agent_response["payload"]["entities_to_validate"],
-                    top_k=top_k_for_similarity,
-                    score_threshold=similarity_threshold,
-                )
-                formatted_similar_entities = get_formatted_similar_entities(
-                    query_texts=chat_agent_response["payload"]["entities_to_validate"],
-                    results=similar_entities,
-                )
-                yield formatted_similar_entities
+                if chat_agent_response["type"] == "CALLING_ENTITY_VALIDATION_TOOL":
+                    if ontology_context_task is None:
+                        ontology_context_task = asyncio.create_task(
+                            self._get_ontology_context()
+                        )
+                        # Retrieve a failure here so it is not reported if no GraphRAGAgent call follows
+                        ontology_context_task.add_done_callback(
+                            lambda task: task.cancelled() or task.exception()
+                        )
 
-                yield "**Processing validated entities...**"
-                chat_agent_response = await self.agents["ChatAgent"].handle_task(
-                    chat_input=formatted_similar_entities,
-                    similarity_threshold=similarity_threshold,
-                    previous_chat_id=self.current_chat_id,
-                )
+                    yield QueryEvent(
+                        stage=QueryStage.ENTITY_VALIDATION,
+                        message="## Calling EntityValidationTool\n**Validating entities in the query...**",
+                        agent="EntityValidationTool",
+                        token_usage=chat_agent_response.get("usage"),
+                    )
+                    started_at = time.perf_counter()
+                    entities_to_validate = chat_agent_response["payload"][
+                        "entities_to_validate"
+                    ]
+                    similar_entities = await self.pinecone_storage.get_index(
+                        self.entity_vector_config["index_name"]
+                    ).get_similar_results(
+                        query_texts=entities_to_validate,
+                        top_k=top_k_for_similarity,
+                        score_threshold=similarity_threshold,
+                    )
+                    formatted_similar_entities = get_formatted_similar_entities(
+                        query_texts=entities_to_validate,
+                        results=similar_entities,
+                    )
+                    yield QueryEvent(
+                        stage=QueryStage.ENTITY_VALIDATION,
+                        message=formatted_similar_entities,
+                        agent="EntityValidationTool",
+                        payload={"entities_to_validate": entities_to_validate},
+                    )
+                    yield self._get_timing_event(
+                        "EntityValidationTool", time.perf_counter() - started_at
+                    )
 
-            elif chat_agent_response["type"] == "CALLING_GRAPH_RAG_AGENT":
-                yield "## Calling GraphRAGAgent..."
-                yield "## Calling RequestDecompositionAgent..."
-                request_decomposition_agent_response = await self.agents[
-                    "RequestDecompositionAgent"
-                ].handle_task(
-                    user_request=chat_agent_response["payload"]["request"],
-                    validated_entities=chat_agent_response["payload"][
-                        "validated_entities"
-                    ],
-                )
-                yield get_formatted_decomposed_request(
-                    request_decomposition_agent_response
-                )
+                    yield QueryEvent(
+                        stage=QueryStage.CHAT,
+                        message="**Processing validated entities...**",
+                        agent="ChatAgent",
+                    )
+                    chat_agent_response = await self.agents["ChatAgent"].handle_task(
+                        chat_input=formatted_similar_entities,
+                        similarity_threshold=similarity_threshold,
+                        previous_chat_id=chat_session.current_chat_id,
+                        on_delta=self._get_delta_handler(emit, "ChatAgent"),
+                    )
 
-                # Process the decomposed subrequests concurrently
-                subrequests = request_decomposition_agent_response["requests"]
-                latest_ontology = await self._get_latest_ontology()
-                gens = []
-
-                for i, subrequest in enumerate(subrequests, start=1):
-                    agent_name = f"Query Agent {i}"
-                    gens.append(
-                        self._process_subrequest(
-                            agent_name=agent_name,
-                            sub_request=subrequest["sub_request"],
-                            validated_entities=subrequest["validated_entities"],
-                            ontology=latest_ontology,
-                        )
+                elif chat_agent_response["type"] == "CALLING_GRAPH_RAG_AGENT":
+                    graph_rag_result = {}
+                    async for event in self._run_graph_rag(
+                        request=chat_agent_response["payload"]["request"],
+                        validated_entities=chat_agent_response["payload"][
+                            "validated_entities"
+                        ],
+                        speculative_candidates=speculative_candidates,
+                        ontology_context_task=ontology_context_task,
+                        result=graph_rag_result,
+                        emit=emit,
+                    ):
+                        yield event
+                    ontology_context_task = None
+
+                    # Generate final result
+                    yield QueryEvent(
+                        stage=QueryStage.CHAT,
+                        message="## Calling ChatAgent to process combined final response...",
+                        agent="ChatAgent",
+                    )
+                    chat_agent_response = await self.agents["ChatAgent"].handle_task(
+                        chat_input=graph_rag_result.get("response"),
+                        similarity_threshold=similarity_threshold,
+                        previous_chat_id=chat_session.current_chat_id,
+                        on_delta=self._get_delta_handler(emit, "ChatAgent"),
                     )
+                    tool_call += 1
+
+                elif chat_agent_response["type"] == "CALLING_VECTOR_RAG_AGENT":
+                    vector_rag_result = {}
+                    async for event in self._run_vector_rag(
+                        request=chat_agent_response["payload"]["request"],
+                        top_k=top_k_for_similarity,
+                        result=vector_rag_result,
+                        emit=emit,
+                    ):
+                        yield event
 
-                # Fan-in results from all subrequests
-                final_response = None
-                async for result in self._fan_in_generators(gens):
-                    yield result
-                    if isinstance(result, str) and result.startswith(
-                        "## Combined Final Response from QueryAgents"
+                    yield QueryEvent(
+                        stage=QueryStage.CHAT,
+                        message="## Calling ChatAgent to process combined final response...",
+                        agent="ChatAgent",
+                    )
+                    chat_agent_response = await self.agents["ChatAgent"].handle_task(
+                        chat_input=vector_rag_result.get("response"),
+                        similarity_threshold=similarity_threshold,
+                        previous_chat_id=chat_session.current_chat_id,
+                        on_delta=self._get_delta_handler(emit, "ChatAgent"),
+                    )
+                    tool_call += 1
+
+                elif (
+                    chat_agent_response["type"]
+                    == "CALLING_GRAPH_AND_VECTOR_RAG_AGENTS"
+                ):
+                    # Both retrievals are independent, so they run concurrently
+                    graph_rag_result, vector_rag_result = {}, {}
+                    async for event in self._merge_generators(
+                        [
+                            self._run_graph_rag(
+                                request=chat_agent_response["payload"][
+                                    "graph_request"
+                                ],
+                                validated_entities=chat_agent_response["payload"][
+                                    "validated_entities"
+                                ],
+                                speculative_candidates=speculative_candidates,
+                                ontology_context_task=ontology_context_task,
+                                result=graph_rag_result,
+                                emit=emit,
+                            ),
+                            self._run_vector_rag(
+                                request=chat_agent_response["payload"][
+                                    "vector_request"
+                                ],
+                                top_k=top_k_for_similarity,
+                                result=vector_rag_result,
+                                emit=emit,
+                            ),
+                        ]
                     ):
-                        final_response = result
+                        yield event
+                    ontology_context_task = None
 
-                # Generate final result
-                yield "## Calling ChatAgent to process combined final response..."
-                chat_agent_response = await self.agents["ChatAgent"].handle_task(
-                    chat_input=final_response,
-                    similarity_threshold=similarity_threshold,
-                    previous_chat_id=self.current_chat_id,
-                )
-                tool_call += 1
+                    yield QueryEvent(
+                        stage=QueryStage.CHAT,
+                        message="## Calling ChatAgent to process combined final response...",
+                        agent="ChatAgent",
+                    )
+                    chat_agent_response = await self.agents["ChatAgent"].handle_task(
+                        chat_input=(
+                            "GraphRAGAgent result:\n"
+                            + (graph_rag_result.get("response") or "NA")
+                            + "\n\nVectorRAGAgent result:\n"
+                            + (vector_rag_result.get("response") or "NA")
+                        ),
+                        similarity_threshold=similarity_threshold,
+                        previous_chat_id=chat_session.current_chat_id,
+                        on_delta=self._get_delta_handler(emit, "ChatAgent"),
+                    )
+                    tool_call += 1
 
-            elif chat_agent_response["type"] == "CALLING_VECTOR_RAG_AGENT":
-                yield "## Calling VectorRAGAgent..."
-                request = chat_agent_response["payload"]["request"]
-                rag_agent_response = await self.agents["VectorRAGAgent"].handle_task(
-                    user_query=request,
-                    top_k=top_k_for_similarity,
-                )
+                else:
+                    yield QueryEvent(
+                        stage=QueryStage.ERROR,
+                        message="**Unexpected error occured. Please contact the developer.**",
+                        payload=chat_agent_response,
+                    )
+                    break
+        finally:
+            if ontology_context_task is not None and not ontology_context_task.done():
+                ontology_context_task.cancel()
 
-                retrieved_result = rag_agent_response["payload"]["answer"]
+    async def _run_graph_rag(
+        self,
+        request: str,
+        validated_entities: list[str],
+        speculative_candidates: int,
+        ontology_context_task: asyncio.Task | None,
+        result: dict,
+        emit: Callable[[QueryEvent], None] | None = None,
+    ) -> AsyncGenerator[QueryEvent, None]:
+        """
+        Runs the GraphRAGAgent for a request and stores the combined QueryAgent responses in `result["response"]`.
+        The ontology is fetched while the request is decomposed, reusing `ontology_context_task` if already started.
+        """
+        started_at = time.perf_counter()
+        yield QueryEvent(
+            stage=QueryStage.REQUEST_DECOMPOSITION,
+            message="## Calling GraphRAGAgent...\n## Calling RequestDecompositionAgent...",
+            agent="RequestDecompositionAgent",
+        )
+        request_decomposition_agent_response, ontology_context = await asyncio.gather(
+            self.agents["RequestDecompositionAgent"].handle_task(
+                user_request=request,
+                validated_entities=validated_entities,
+            ),
+            ontology_context_task or self._get_ontology_context(),
+        )
+        formatted_ontology, ontology_version, ontology_schema = ontology_context
+        yield QueryEvent(
+            stage=QueryStage.REQUEST_DECOMPOSITION,
+            message=get_formatted_decomposed_request(
+                request_decomposition_agent_response
+            ),
+            agent="RequestDecompositionAgent",
+            payload=request_decomposition_agent_response,
+            token_usage=request_decomposition_agent_response.get("usage"),
+        )
+        yield self._get_timing_event(
+            "RequestDecompositionAgent", time.perf_counter() - started_at
+        )
 
-                yield f"**Retrieved result by the VectorRAGAgent:**\n{retrieved_result}"
-                yield "## Calling ChatAgent to process combined final response..."
-                chat_agent_response = await self.agents["ChatAgent"].handle_task(
-                    chat_input=retrieved_result,
-                    similarity_threshold=similarity_threshold,
-                    previous_chat_id=self.current_chat_id,
+        # Process the decomposed subrequests concurrently
+        gens = []
+        for i, subrequest in enumerate(
+            request_decomposition_agent_response["requests"], start=1
+        ):
+            gens.append(
+                self._process_subrequest(
+                    agent_name=f"Query Agent {i}",
+                    sub_request=subrequest["sub_request"],
+                    validated_entities=subrequest["validated_entities"],
+                    formatted_ontology=formatted_ontology,
+                    ontology_version=ontology_version,
+                    ontology_schema=ontology_schema,
+                    speculative_candidates=speculative_candidates,
+                    emit=emit,
                 )
-                tool_call += 1
+            )
 
-            else:
-                yield "**Unexpected error occured. Please contact the developer.**"
-                break
+        # Fan-in results from all subrequests
+        async for event in self._fan_in_generators(gens):
+            yield event
+            if event.stage == QueryStage.COMBINED_FINAL_RESPONSE:
+                result["response"] = event.message
+        yield self._get_timing_event("GraphRAGAgent", time.perf_counter() - started_at)
+
+    async def _run_vector_rag(
+        self,
+        request: str,
+        top_k: int,
+        result: dict,
+        emit: Callable[[QueryEvent], None] | None = None,
+    ) -> AsyncGenerator[QueryEvent, None]:
+        """
+        Runs the VectorRAGAgent for a request and stores its answer in `result["response"]`.
+        """
+        started_at = time.perf_counter()
+        yield QueryEvent(
+            stage=QueryStage.VECTOR_RAG,
+            message="## Calling VectorRAGAgent...",
+            agent="VectorRAGAgent",
+        )
+        rag_agent_response = await self.agents["VectorRAGAgent"].handle_task(
+            user_query=request,
+            top_k=top_k,
+            on_delta=self._get_delta_handler(emit, "VectorRAGAgent"),
+        )
+        result["response"] = rag_agent_response["payload"]["answer"]
+
+        yield QueryEvent(
+            stage=QueryStage.VECTOR_RAG,
+            message=f"**Retrieved result by the VectorRAGAgent:**\n{result['response']}",
+            agent="VectorRAGAgent",
+            payload=rag_agent_response["payload"],
+        )
+        yield self._get_timing_event("VectorRAGAgent", time.perf_counter() - started_at)
+
+    def _get_delta_handler(
+        self, emit: Callable[[QueryEvent], None] | None, agent_name: str
+    ) -> Callable[[str], None] | None:
+        """
+        Returns an `on_delta` callback forwarding streamed text as RESPONSE_DELTA events, or None to disable streaming.
+        """
+        if emit is None:
+            return None
+        return lambda delta: emit(
+            QueryEvent(stage=QueryStage.RESPONSE_DELTA, message=delta, agent=agent_name)
+        )
+
+    def _get_timing_event(self, step: str, seconds: float) -> QueryEvent:
+        return QueryEvent(
+            stage=QueryStage.TIMING,
+            message=get_formatted_step_timing(step, seconds),
+            agent=step,
+            elapsed=seconds,
+        )
 
     async def rag_query(
         self,
@@ -638,55 +1162,229 @@ class GraphRetrievalSystem(BaseMultiAgentSystem):
         # Call VectorRAGAgent (now single-query mode)
         yield "## Calling VectorRAGAgent..."
 
-        multi = len(queries) > 1
-
-        # run sequentially with minimal changes
-        for q in queries:
+        if len(queries) == 1:
             try:
                 rag_agent_response = await self.agents["VectorRAGAgent"].handle_task(
-                    user_query=q,
+                    user_query=queries[0],
                     top_k=top_k_for_similarity,
                 )
                 answer = (rag_agent_response.get("payload") or {}).get("answer") or ""
             except Exception as e:
                 answer = f"Failed to generate an answer. Error: {e}"
+            yield answer
+            return
+
+        # Answers are yielded as they complete, numbered by their position in the request
+        async for event in self.rag_query_batch(queries, top_k_for_similarity):
+            if event["type"] == "result":
+                answer = event["answer"] or f"Failed to generate an answer. Error: {event['error']}"
+                yield f"### [{event['index'] + 1}] {event['query']}\n{answer}"
+            else:
+                yield get_formatted_latency_summary(event)
+
+    async def rag_query_batch(
+        self,
+        queries: list[str],
+        top_k_for_similarity: int,
+        max_concurrency: int = 8,
+        **rag_options,
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Runs VectorRAGAgent over many queries with bounded concurrency, e.g. for evaluation sets.
 
-            yield f"### {q}\n{answer}" if multi else answer
+        The company catalog is loaded once up front and the query embeddings of concurrent queries are
+        batched by the agent's EmbeddingBatcher.
 
-    def _update_current_chat_id(self, new_chat_id: str):
-        self.current_chat_id = new_chat_id
+        Parameters:
+            queries (list[str]): The queries to answer.
+            top_k_for_similarity (int): top_k of each query.
+            max_concurrency (int): Maximum number of queries in flight.
+            rag_options: Extra VectorRAGAgent.handle_task options applied to all queries.
+
+        Yields:
+            {"type": "result", "index", "query", "answer", "error", "latency"} as each query completes, then
+            {"type": "summary", "count", "failed", "wall_time", "throughput", "mean", "p50", "p95", "p99", "max"}.
+        """
+        rag_agent = self.agents["VectorRAGAgent"]
+        try:
+            await get_company_catalog(
+                rag_agent.pine,
+                rag_agent.pinecone_config["index_name"],
+                rag_options.get("catalog_namespace", "company-catalog"),
+            ).get_detector()
+        except Exception as e:
+            graph_retrieval_logger.warning(f"GraphRetrievalSystem\nFailed to warm up company catalog: {e}")
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(index: int, query: str) -> dict:
+            async with semaphore:
+                start = time.perf_counter()
+                answer, error = "", None
+                try:
+                    rag_agent_response = await rag_agent.handle_task(
+                        user_query=query,
+                        top_k=top_k_for_similarity,
+                        **rag_options,
+                    )
+                    answer = (rag_agent_response.get("payload") or {}).get("answer") or ""
+                except Exception as e:
+                    error = str(e)
+                return {
+                    "type": "result",
+                    "index": index,
+                    "query": query,
+                    "answer": answer,
+                    "error": error,
+                    "latency": time.perf_counter() - start,
+                }
+
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(run(i, q)) for i, q in enumerate(queries)]
+        latencies, failed = [], 0
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                latencies.append(result["latency"])
+                if result["error"] is not None:
+                    failed += 1
+                yield result
+        finally:
+            # Closing the generator early cancels the queries still in flight
+            for task in tasks:
+                task.cancel()
+
+        summary = get_latency_summary(latencies, time.perf_counter() - start, failed)
+        graph_retrieval_logger.info(f"GraphRetrievalSystem\nrag_query_batch summary: {summary}")
+        yield {"type": "summary", **summary}
+
+    @property
+    def current_chat_id(self) -> str | None:
+        return self.chat_session.current_chat_id
+
+    def _update_current_chat_id(
+        self, new_chat_id: str, chat_session: ChatSession | None = None
+    ):
+        (chat_session or self.chat_session).current_chat_id = new_chat_id
 
     async def _get_latest_ontology(self) -> dict:
         try:
-            return (
-                await self.async_mongo_storage.get_database(
-                    self.ontology_config["database_name"]
-                )
-                .get_collection(self.ontology_config["collection_name"])
-                .read_documents({"is_latest": True})
-            )[0].get("ontology", {})
+            return await self.ontology_provider.get_ontology()
+        except Exception as e:
+            raise LookupError("Failed to fetch latest ontology") from e
 
+    async def _get_formatted_ontology(self) -> str:
+        """
+        Returns the latest ontology as rendered for QueryAgent and Text2CypherAgent.
+        """
+        try:
+            return await self.ontology_provider.get_formatted_ontology(
+                exclude_entity_fields=["llm-guidance"]
+            )
         except Exception as e:
             raise LookupError("Failed to fetch latest ontology") from e
 
-    async def _fan_in_generators(self, gens: list[AsyncGenerator[str, None]]):
+    async def _get_ontology_context(self) -> tuple[str, str, dict]:
+        """
+        Returns the formatted ontology, its version and its schema for the subrequest pipeline.
+        """
+        return await asyncio.gather(
+            self._get_formatted_ontology(),
+            self.ontology_provider.get_version(),
+            self._get_ontology_schema(),
+        )
+
+    async def _get_ontology_schema(self) -> dict:
+        """
+        Returns the entity types and relationship types defined in the latest ontology.
+        """
+        ontology = await self._get_latest_ontology()
+        return {
+            "entity_types": list(ontology.get("entities", {}).keys()),
+            "relationship_types": list(ontology.get("relationships", {}).keys()),
+        }
+
+    def _get_compiled_retrieval_result(
+        self, executed: list[tuple[dict, str, dict]], truncation_note: str
+    ) -> str | None:
+        """
+        Renders the executed candidates' results without an LLM call.
+
+        Returns:
+            The compiled result, or None if any result is too large or heterogeneous for the deterministic compiler.
+        """
+        if self.compilation_max_rows <= 0:
+            return None
+
+        compiled_results = []
+        for _, formatted_cypher, result in executed:
+            compiled_result = get_compiled_cypher_retrieval_result(
+                result["records"],
+                max_rows=self.compilation_max_rows,
+                max_chars=self.compilation_max_chars,
+            )
+            if compiled_result is None:
+                return None
+            compiled_results.append((formatted_cypher, compiled_result))
+
+        if len(compiled_results) == 1:
+            output = compiled_results[0][1]
+        else:
+            output = get_formatted_candidate_results(compiled_results)
+        if len(output) > self.compilation_max_chars:
+            return None
+        if truncation_note:
+            output = f"{truncation_note}\n{output}"
+        return output
+
+    async def _validate_cypher(
+        self, text2cypher_agent_response: dict, ontology_schema: dict | None
+    ) -> dict:
+        """
+        Validates a Text2CypherAgent output against the ontology and with EXPLAIN, without executing it.
+        """
+        query = text2cypher_agent_response.get("cypher_query") or ""
+        if not query.strip():
+            return {
+                "valid": False,
+                "errors": ["No Cypher query was generated."],
+                "warnings": [],
+            }
+
+        if ontology_schema:
+            schema_errors = get_cypher_schema_errors(
+                query=query,
+                entity_types=ontology_schema["entity_types"],
+                relationship_types=ontology_schema["relationship_types"],
+            )
+            if schema_errors:
+                return {"valid": False, "errors": schema_errors, "warnings": []}
+
+        return await self.graph_storage.validate_query(
+            query=query, parameters=text2cypher_agent_response.get("parameters")
+        )
+
+    async def _merge_generators(self, gens: list[AsyncGenerator[QueryEvent, None]]):
         """
         Runs multiple async generators concurrently and yields their results as soon as they are available.
+        The generators are cancelled if the caller stops iterating or is cancelled.
         """
         queue = asyncio.Queue()
-        final_responses = []
 
-        async def consume(gen: AsyncGenerator[str, None]):
+        async def consume(gen: AsyncGenerator[QueryEvent, None]):
             try:
                 async for item in gen:
-                    # Detect if this is a final response line
-                    if item.startswith("**") and "Final Response" in item:
-                        final_responses.append(item)
                     await queue.put(item)
             except Exception as e:
                 graph_retrieval_logger.error(
                     f"GraphRetrievalSystem: Error when retrieving result {e}"
                 )
+                await queue.put(
+                    QueryEvent(
+                        stage=QueryStage.ERROR,
+                        message=f"**Error when retrieving result:** {e}",
+                    )
+                )
             finally:
                 await queue.put(None)
 
@@ -694,15 +1392,29 @@ class GraphRetrievalSystem(BaseMultiAgentSystem):
         tasks = [asyncio.create_task(consume(gen)) for gen in gens]
         active = len(tasks)
 
-        while active > 0:
-            item = await queue.get()
-            if item is None:
-                active -= 1
-            else:
-                yield item
+        try:
+            while active > 0:
+                item = await queue.get()
+                if item is None:
+                    active -= 1
+                else:
+                    yield item
+        finally:
+            # Ensure cleanup, cancelling the generators that are still running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _fan_in_generators(self, gens: list[AsyncGenerator[QueryEvent, None]]):
+        """
+        Merges the subrequest generators and finally yields the combined final responses of the QueryAgents.
+        """
+        final_responses = []
 
-        # Ensure cleanup
-        await asyncio.gather(*tasks)
+        async for event in self._merge_generators(gens):
+            if event.stage == QueryStage.SUBREQUEST_FINAL_RESPONSE:
+                final_responses.append(event.message)
+            yield event
 
         final_response_str = "\n".join(final_responses)
         graph_retrieval_logger.debug(
@@ -711,16 +1423,24 @@ class GraphRetrievalSystem(BaseMultiAgentSystem):
 
         if final_responses:
             combined = "\n\n".join(final_responses)
-            yield "## Combined Final Response from QueryAgents" + "\n" + combined
+            yield QueryEvent(
+                stage=QueryStage.COMBINED_FINAL_RESPONSE,
+                message="## Combined Final Response from QueryAgents" + "\n" + combined,
+                agent="GraphRAGAgent",
+            )
 
     async def _process_subrequest(
         self,
         agent_name: str,
         sub_request: str,
         validated_entities: list[str],
-        ontology: dict,
+        formatted_ontology: str,
+        ontology_version: str | None = None,
+        ontology_schema: dict | None = None,
         max_iteration: int = 3,
-    ) -> AsyncGenerator[str, None]:
+        speculative_candidates: int = 1,
+        emit: Callable[[QueryEvent], None] | None = None,
+    ) -> AsyncGenerator[QueryEvent, None]:
         """
         Handles a sub-request by coordinating between QueryAgent and Text2CypherAgent.
         Iteratively generates queries, translates them to Cypher, executes them,
@@ -731,9 +1451,15 @@ class GraphRetrievalSystem(BaseMultiAgentSystem):
         text2cypher_agent_response = None
         previous_query_agent_response_id = None
         previous_text2_cypher_agent_response_id = None
+        # Text2Cypher output awaiting confirmation by the QueryAgent before it is cached
+        cache_candidate = None
 
         # Step 1: Initial query generation
-        yield f"## Calling Query Agent ({agent_name}) for sub-request'{sub_request}'..."
+        yield QueryEvent(
+            stage=QueryStage.QUERY_GENERATION,
+            message=f"## Calling Query Agent ({agent_name}) for sub-request'{sub_request}'...",
+            agent=agent_name,
+        )
         query_agent_response = await self.agents["QueryAgent"].handle_task(
             user_request=get_formatted_input_for_query_agent(
                 type="QUERY_GENERATION",
@@ -742,77 +1468,314 @@ class GraphRetrievalSystem(BaseMultiAgentSystem):
                     "validated_entities": validated_entities,
                 },
             ),
-            ontology=ontology,
+            formatted_ontology=formatted_ontology,
         )
         previous_query_agent_response_id = query_agent_response["id"]
 
         # Check if the initial call failed to produce a query
         if query_agent_response["type"] != "QUERY":
-            yield f"**{agent_name}:** Failed to generate initial query. Aborting."
+            yield QueryEvent(
+                stage=QueryStage.ERROR,
+                message=f"**{agent_name}:** Failed to generate initial query. Aborting.",
+                agent=agent_name,
+                token_usage=query_agent_response.get("usage"),
+            )
             return
 
-        yield (
-            f"**{agent_name}**:\n"
-            f"**Query:** {query_agent_response['payload']['query']}\n"
-            f"**Validated Entities:** {query_agent_response['payload']['validated_entities']}\n"
-            f"**Note:** {query_agent_response['payload']['note'] or 'NA'}"
+        yield QueryEvent(
+            stage=QueryStage.QUERY_GENERATION,
+            message=(
+                f"**{agent_name}**:\n"
+                f"**Query:** {query_agent_response['payload']['query']}\n"
+                f"**Validated Entities:** {query_agent_response['payload']['validated_entities']}\n"
+                f"**Note:** {query_agent_response['payload']['note'] or 'NA'}"
+            ),
+            agent=agent_name,
+            payload=query_agent_response["payload"],
+            token_usage=query_agent_response.get("usage"),
         )
 
         # Step 2: Iterative Refinement Loop
         for current_iteration in range(max_iteration):
 
-            # Step 2.1: Convert Natural Language Query to Cypher
-            yield f"## Calling Text2Cypher Agent for {agent_name} (Iteration {current_iteration + 1}/{max_iteration})..."
-            text2cypher_agent_response = await self.agents[
-                "Text2CypherAgent"
-            ].handle_task(
-                user_query=query_agent_response["payload"]["query"],
-                validated_entities=query_agent_response["payload"][
-                    "validated_entities"
-                ],
-                ontology=ontology,
-                note=query_agent_response["payload"]["note"],
-                previous_response_id=previous_text2_cypher_agent_response_id,
-            )
-            previous_text2_cypher_agent_response_id = text2cypher_agent_response["id"]
+            # Step 2.1: Convert Natural Language Query to Cypher (reusing a cached translation if any)
+            user_query = query_agent_response["payload"]["query"]
+            query_validated_entities = query_agent_response["payload"][
+                "validated_entities"
+            ]
+            text2cypher_agent_response = None
+            if self.text2cypher_cache and ontology_version:
+                text2cypher_agent_response = await self.text2cypher_cache.get(
+                    query=user_query,
+                    validated_entities=query_validated_entities,
+                    ontology_version=ontology_version,
+                )
 
-            # Step 2.2: Execute the Cypher query
-            formatted_cypher = get_formatted_cypher(
-                query=text2cypher_agent_response["cypher_query"],
-                params=text2cypher_agent_response["parameters"],
-            )
-            yield f"**Executing the generated Cypher query:**\n{formatted_cypher}"
-            cypher_retrieval_result = await self.graph_storage.run_query(
-                query=text2cypher_agent_response["cypher_query"],
-                parameters=text2cypher_agent_response["parameters"],
-            )
-            stringified_cypher_retrieval_result = (
-                get_stringified_cypher_retrieval_result(cypher_retrieval_result)
+            if text2cypher_agent_response:
+                yield QueryEvent(
+                    stage=QueryStage.TEXT2CYPHER,
+                    message=f"**Reusing cached Cypher query for {agent_name} (Iteration {current_iteration + 1}/{max_iteration})...**",
+                    agent=agent_name,
+                    payload={"from_cache": True},
+                )
+            else:
+                yield QueryEvent(
+                    stage=QueryStage.TEXT2CYPHER,
+                    message=f"## Calling Text2Cypher Agent for {agent_name} (Iteration {current_iteration + 1}/{max_iteration})...",
+                    agent=agent_name,
+                )
+                text2cypher_agent_response = await self.agents[
+                    "Text2CypherAgent"
+                ].handle_task(
+                    user_query=user_query,
+                    validated_entities=query_validated_entities,
+                    formatted_ontology=formatted_ontology,
+                    note=query_agent_response["payload"]["note"],
+                    previous_response_id=previous_text2_cypher_agent_response_id,
+                    num_of_candidates=speculative_candidates,
+                )
+                previous_text2_cypher_agent_response_id = text2cypher_agent_response[
+                    "id"
+                ]
+
+            # Step 2.2: Validate the Cypher candidates with EXPLAIN, letting Text2Cypher correct them if none is valid
+            candidates = text2cypher_agent_response.get("candidates") or [
+                text2cypher_agent_response
+            ]
+            validations = await asyncio.gather(
+                *(
+                    self._validate_cypher(candidate, ontology_schema)
+                    for candidate in candidates
+                )
             )
-            graph_retrieval_logger.debug(stringified_cypher_retrieval_result)
+            validation_attempt = 0
+            while (
+                not any(validation["valid"] for validation in validations)
+                and validation_attempt < self.max_cypher_validation_retries
+            ):
+                validation_attempt += 1
+                # Every candidate failed, so the correction needs the errors of all of them
+                merged_validation = get_merged_cypher_validation(validations)
+                formatted_errors = "\n".join(merged_validation["errors"])
+                yield QueryEvent(
+                    stage=QueryStage.CYPHER_VALIDATION,
+                    message=(
+                        f"**Generated Cypher query failed validation, calling Text2Cypher Agent for {agent_name} to correct it "
+                        f"({validation_attempt}/{self.max_cypher_validation_retries}):**\n{formatted_errors}"
+                    ),
+                    agent=agent_name,
+                    payload=merged_validation,
+                )
+                text2cypher_agent_response = await self.agents[
+                    "Text2CypherAgent"
+                ].handle_task(
+                    user_query=user_query,
+                    validated_entities=query_validated_entities,
+                    formatted_ontology=formatted_ontology,
+                    note=get_formatted_cypher_validation_note(
+                        merged_validation["errors"], merged_validation["warnings"]
+                    ),
+                    previous_response_id=previous_text2_cypher_agent_response_id,
+                    num_of_candidates=speculative_candidates,
+                )
+                previous_text2_cypher_agent_response_id = text2cypher_agent_response[
+                    "id"
+                ]
+                candidates = text2cypher_agent_response.get("candidates") or [
+                    text2cypher_agent_response
+                ]
+                validations = await asyncio.gather(
+                    *(
+                        self._validate_cypher(candidate, ontology_schema)
+                        for candidate in candidates
+                    )
+                )
 
-            # Step 2.3: Compile the Cypher retrieval result
-            yield "**Compiling the Cypher retrieval result...**"
-            result = await self.agents["RetrievalResultCompilationAgent"].handle_task(
-                formatted_cypher_query=formatted_cypher,
-                formatted_retrieval_result=stringified_cypher_retrieval_result,
-            )
-            formatted_retrieval_result = result["compiled_result"]
+            valid_candidates = [
+                candidate
+                for candidate, validation in zip(candidates, validations)
+                if validation["valid"]
+            ]
+            warnings = [
+                warning
+                for candidate, validation in zip(candidates, validations)
+                if validation["valid"]
+                for warning in validation["warnings"]
+            ]
+            if warnings:
+                formatted_warnings = "\n".join(warnings)
+                yield QueryEvent(
+                    stage=QueryStage.CYPHER_VALIDATION,
+                    message=f"**Cypher query planner warnings:**\n{formatted_warnings}",
+                    agent=agent_name,
+                    payload={"warnings": warnings},
+                )
+
+            if not valid_candidates:
+                # Do not spend a database round trip on a query that cannot run
+                cache_candidate = None
+                formatted_cypher = get_formatted_cypher(
+                    query=candidates[0].get("cypher_query") or "",
+                    params=candidates[0].get("parameters") or {},
+                )
+                formatted_retrieval_result = (
+                    "NA. The Cypher query was not executed because it failed validation:\n"
+                    + "\n".join(get_merged_cypher_validation(validations)["errors"])
+                )
+            else:
+                # Step 2.3: Execute the valid Cypher candidates concurrently
+                formatted_cyphers = [
+                    get_formatted_cypher(
+                        query=candidate["cypher_query"],
+                        params=candidate["parameters"],
+                    )
+                    for candidate in valid_candidates
+                ]
+                formatted_executed_cyphers = "\n".join(formatted_cyphers)
+                yield QueryEvent(
+                    stage=QueryStage.CYPHER_EXECUTION,
+                    message=f"**Executing the generated Cypher query:**\n{formatted_executed_cyphers}",
+                    agent=agent_name,
+                    payload={"cypher_queries": formatted_cyphers},
+                )
+                started_at = time.perf_counter()
+                bounded_retrieval_results = await asyncio.gather(
+                    *(
+                        self.graph_storage.run_bounded_query(
+                            query=candidate["cypher_query"],
+                            parameters=candidate["parameters"],
+                            max_rows=self.cypher_max_rows,
+                            max_bytes=self.cypher_max_bytes,
+                            timeout=self.cypher_timeout,
+                        )
+                        for candidate in valid_candidates
+                    )
+                )
+
+                # Only non-empty results are worth evaluating; keep the first candidate if all are empty
+                executed = [
+                    (candidate, formatted, result)
+                    for candidate, formatted, result in zip(
+                        valid_candidates, formatted_cyphers, bounded_retrieval_results
+                    )
+                    if result["records"]
+                ] or [
+                    (
+                        valid_candidates[0],
+                        formatted_cyphers[0],
+                        bounded_retrieval_results[0],
+                    )
+                ]
+                text2cypher_agent_response = {
+                    **text2cypher_agent_response,
+                    **executed[0][0],
+                }
+
+                truncation_note = "\n".join(
+                    note
+                    for note in (
+                        get_formatted_truncation_note(result)
+                        for _, _, result in executed
+                    )
+                    if note
+                )
+                yield self._get_timing_event(
+                    f"Cypher execution ({agent_name})", time.perf_counter() - started_at
+                )
+                if truncation_note:
+                    yield QueryEvent(
+                        stage=QueryStage.CYPHER_EXECUTION,
+                        message=f"**{truncation_note}**",
+                        agent=agent_name,
+                        payload={"truncated": True},
+                    )
+
+                if len(executed) == 1:
+                    formatted_cypher = executed[0][1]
+                    stringified_cypher_retrieval_result = (
+                        get_stringified_cypher_retrieval_result(
+                            executed[0][2]["records"]
+                        )
+                    )
+                else:
+                    formatted_cypher = "\n".join(
+                        f"Candidate {index}: {formatted}"
+                        for index, (_, formatted, _) in enumerate(executed, start=1)
+                    )
+                    stringified_cypher_retrieval_result = (
+                        get_formatted_candidate_results(
+                            [
+                                (
+                                    formatted,
+                                    get_stringified_cypher_retrieval_result(
+                                        result["records"]
+                                    ),
+                                )
+                                for _, formatted, result in executed
+                            ]
+                        )
+                    )
 
-            yield (
-                f"**Response by Text2CypherAgent to {agent_name}:**\n"
-                f"**Cypher Query:** {formatted_cypher}\n"
-                f"**Note:** {text2cypher_agent_response['note']}\n"
-                f"**Retrieval Result:**\n{formatted_retrieval_result}"
+                cache_candidate = next(
+                    (
+                        (user_query, query_validated_entities, candidate)
+                        for candidate, _, result in executed
+                        if result["records"] and not candidate.get("from_cache")
+                    ),
+                    None,
+                )
+                graph_retrieval_logger.debug(stringified_cypher_retrieval_result)
+
+                # Step 2.4: Compile the Cypher retrieval result, deterministically when it is small and tabular
+                formatted_retrieval_result = self._get_compiled_retrieval_result(
+                    executed, truncation_note
+                )
+                if formatted_retrieval_result is None:
+                    yield QueryEvent(
+                        stage=QueryStage.RESULT_COMPILATION,
+                        message="**Compiling the Cypher retrieval result...**",
+                        agent=agent_name,
+                    )
+                    result = await self.agents[
+                        "RetrievalResultCompilationAgent"
+                    ].handle_task(
+                        formatted_cypher_query=formatted_cypher,
+                        formatted_retrieval_result=stringified_cypher_retrieval_result,
+                        truncation_note=truncation_note,
+                    )
+                    formatted_retrieval_result = result["compiled_result"]
+
+            yield QueryEvent(
+                stage=QueryStage.RESULT_COMPILATION,
+                message=(
+                    f"**Response by Text2CypherAgent to {agent_name}:**\n"
+                    f"**Cypher Query:** {formatted_cypher}\n"
+                    f"**Note:** {text2cypher_agent_response['note']}\n"
+                    f"**Retrieval Result:**\n{formatted_retrieval_result}"
+                ),
+                agent=agent_name,
+                payload={
+                    "cypher_query": formatted_cypher,
+                    "retrieval_result": formatted_retrieval_result,
+                },
+                token_usage=text2cypher_agent_response.get("usage"),
             )
 
-            # Step 2.4: Evaluate the retrieval result
+            # Step 2.5: Evaluate the retrieval result
             is_last_iteration = current_iteration == max_iteration - 1
 
             if is_last_iteration:
-                yield f"**Max iteration reached for {agent_name}, forcing final report generation...**"
+                yield QueryEvent(
+                    stage=QueryStage.RESULT_EVALUATION,
+                    message=f"**Max iteration reached for {agent_name}, forcing final report generation...**",
+                    agent=agent_name,
+                )
             else:
-                yield f"## Calling Query Agent ({agent_name}) to evaluate retrieval result..."
+                yield QueryEvent(
+                    stage=QueryStage.RESULT_EVALUATION,
+                    message=f"## Calling Query Agent ({agent_name}) to evaluate retrieval result...",
+                    agent=agent_name,
+                )
 
             query_agent_response = await self.agents["QueryAgent"].handle_task(
                 user_request=get_formatted_input_for_query_agent(
@@ -827,28 +1790,54 @@ class GraphRetrievalSystem(BaseMultiAgentSystem):
                         "note": text2cypher_agent_response["note"],
                     },
                 ),
-                ontology=ontology,
+                formatted_ontology=formatted_ontology,
                 previous_response_id=previous_query_agent_response_id,
+                on_delta=self._get_delta_handler(emit, agent_name),
             )
             previous_query_agent_response_id = query_agent_response["id"]
 
-            # Step 2.5: Decide continue or break
+            # Step 2.6: Decide continue or break
             if query_agent_response["type"] == "QUERY":
-                yield (
-                    f"**{agent_name} (Refining Query)**:\n"
-                    f"**New Query:** {query_agent_response['payload']['query']}\n"
-                    f"**Validated Entities:** {query_agent_response['payload']['validated_entities']}\n"
-                    f"**Note:** {query_agent_response['payload']['note'] or 'NA'}"
+                yield QueryEvent(
+                    stage=QueryStage.QUERY_GENERATION,
+                    message=(
+                        f"**{agent_name} (Refining Query)**:\n"
+                        f"**New Query:** {query_agent_response['payload']['query']}\n"
+                        f"**Validated Entities:** {query_agent_response['payload']['validated_entities']}\n"
+                        f"**Note:** {query_agent_response['payload']['note'] or 'NA'}"
+                    ),
+                    agent=agent_name,
+                    payload=query_agent_response["payload"],
+                    token_usage=query_agent_response.get("usage"),
                 )
 
             elif query_agent_response["type"] == "FINAL_RESPONSE":
-                yield (
-                    f"**{agent_name}**:\n"
-                    f"**Final Response:** {query_agent_response['payload']['response']}\n"
-                    f"**Note:** {query_agent_response['payload']['note'] or 'NA'}"
+                # The QueryAgent accepted a non-empty result, so the translation is worth reusing
+                if cache_candidate and self.text2cypher_cache and ontology_version:
+                    await self.text2cypher_cache.put(
+                        query=cache_candidate[0],
+                        validated_entities=cache_candidate[1],
+                        ontology_version=ontology_version,
+                        text2cypher_response=cache_candidate[2],
+                    )
+                yield QueryEvent(
+                    stage=QueryStage.SUBREQUEST_FINAL_RESPONSE,
+                    message=(
+                        f"**{agent_name}**:\n"
+                        f"**Final Response:** {query_agent_response['payload']['response']}\n"
+                        f"**Note:** {query_agent_response['payload']['note'] or 'NA'}"
+                    ),
+                    agent=agent_name,
+                    payload=query_agent_response["payload"],
+                    token_usage=query_agent_response.get("usage"),
                 )
                 return
 
             else:
-                yield f"**{agent_name}:** Unexpected occurred from QueryAgent. Aborting."
+                yield QueryEvent(
+                    stage=QueryStage.ERROR,
+                    message=f"**{agent_name}:** Unexpected occurred from QueryAgent. Aborting.",
+                    agent=agent_name,
+                    payload=query_agent_response,
+                )
                 return
@@ -1,4 +1,6 @@
 import json
+import math
+import re
 
 
 def get_formatted_decomposed_request(data: dict) -> str:
@@ -39,6 +41,286 @@ def get_stringified_cypher_retrieval_result(data: list[dict]) -> str:
     )
 
 
+def _is_scalar(value) -> bool:
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+def _is_flat(value) -> bool:
+    return _is_scalar(value) or (
+        isinstance(value, (list, tuple)) and all(_is_scalar(item) for item in value)
+    )
+
+
+def _is_node(value) -> bool:
+    return isinstance(value, dict) and all(_is_flat(item) for item in value.values())
+
+
+def _is_relationship(value) -> bool:
+    # record.data() renders a relationship as (start node properties, type, end node properties)
+    return (
+        isinstance(value, tuple)
+        and len(value) == 3
+        and _is_node(value[0])
+        and isinstance(value[1], str)
+        and _is_node(value[2])
+    )
+
+
+def _get_node_name(node: dict) -> str:
+    return str(node.get("name") or node.get("id") or json.dumps(node, ensure_ascii=False))
+
+
+def _get_formatted_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        value = ", ".join(_get_formatted_cell(item) for item in value)
+    return str(value).replace("|", "\\|").replace("\n", " ").strip()
+
+
+def get_compiled_cypher_retrieval_result(
+    data: list[dict], max_rows: int = 50, max_chars: int = 8000
+) -> str | None:
+    """
+    Deterministically renders a Cypher retrieval result as a markdown table.
+
+    Node values are rendered once in a separate section and referenced by name in the table, so
+    properties repeated across rows are not duplicated. Columns holding the same value in every row
+    are listed once above the table.
+
+    Returns:
+        The rendered result, or None if it exceeds `max_rows`/`max_chars` or contains values other than
+        scalars, flat lists, nodes and relationships, in which case the result should be compiled by the LLM.
+    """
+    if not data:
+        return "No records were retrieved by the Cypher query."
+    if len(data) > max_rows or not all(isinstance(row, dict) for row in data):
+        return None
+
+    columns = list(data[0].keys())
+    if any(list(row.keys()) != columns for row in data):
+        return None
+
+    nodes: dict[str, dict] = {}
+
+    def get_reference(node: dict) -> str:
+        name = _get_node_name(node)
+        if name in nodes and nodes[name] != node:
+            # Different nodes sharing a name cannot be referenced unambiguously
+            raise ValueError(name)
+        nodes[name] = node
+        return name
+
+    rows = []
+    try:
+        for row in data:
+            cells = []
+            for column in columns:
+                value = row[column]
+                if _is_flat(value):
+                    cells.append(_get_formatted_cell(value))
+                elif _is_node(value):
+                    cells.append(get_reference(value))
+                elif _is_relationship(value):
+                    cells.append(
+                        f"({get_reference(value[0])})-[{value[1]}]->({get_reference(value[2])})"
+                    )
+                else:
+                    return None
+            rows.append(cells)
+    except ValueError:
+        return None
+
+    # Drop duplicate rows while keeping their order
+    rows = list(dict.fromkeys(tuple(cells) for cells in rows))
+
+    common = []
+    if len(rows) > 1:
+        constant = [
+            i for i in range(len(columns)) if len({cells[i] for cells in rows}) == 1
+        ]
+        if len(constant) < len(columns):
+            common = [(columns[i], rows[0][i]) for i in constant]
+            columns = [column for i, column in enumerate(columns) if i not in constant]
+            rows = [
+                tuple(cell for i, cell in enumerate(cells) if i not in constant)
+                for cells in rows
+            ]
+
+    output = [f"Retrieved {len(rows)} record(s)."]
+    if common:
+        output.append("Common to all records:")
+        output.extend(f"  - {column}: {value}" for column, value in common)
+    output.append("")
+    output.append("| " + " | ".join(columns) + " |")
+    output.append("|" + "---|" * len(columns))
+    output.extend("| " + " | ".join(cells) + " |" for cells in rows)
+
+    if nodes:
+        output.append("")
+        output.append("Nodes:")
+        for name, node in nodes.items():
+            properties = "; ".join(
+                f"{key}: {_get_formatted_cell(value)}"
+                for key, value in node.items()
+                if key not in ("id", "name") and value not in (None, "", [])
+            )
+            output.append(f"  - {name}" + (f" ({properties})" if properties else ""))
+
+    compiled_result = "\n".join(output)
+    if len(compiled_result) > max_chars:
+        return None
+    return compiled_result
+
+
+def get_formatted_step_timing(step: str, seconds: float) -> str:
+    return f"*{step} completed in {seconds:.2f}s*"
+
+
+def get_latency_summary(latencies: list[float], wall_time: float, failed: int = 0) -> dict:
+    """
+    Summarizes per-query latencies (in seconds) of a batch: throughput and nearest-rank percentiles.
+    """
+    ordered = sorted(latencies)
+
+    def percentile(p: float) -> float:
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+    return {
+        "count": len(ordered),
+        "failed": failed,
+        "wall_time": wall_time,
+        "throughput": len(ordered) / wall_time if wall_time > 0 else 0.0,
+        "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+        "p50": percentile(50),
+        "p95": percentile(95),
+        "p99": percentile(99),
+        "max": ordered[-1] if ordered else 0.0,
+    }
+
+
+def get_formatted_latency_summary(summary: dict) -> str:
+    return (
+        f"*{summary['count']} queries ({summary['failed']} failed) in {summary['wall_time']:.2f}s · "
+        f"{summary['throughput']:.2f} queries/s · p50 {summary['p50']:.2f}s · "
+        f"p95 {summary['p95']:.2f}s · p99 {summary['p99']:.2f}s*"
+    )
+
+
+def get_formatted_truncation_note(bounded_result: dict) -> str:
+    if not bounded_result.get("truncated"):
+        return ""
+    reasons = {
+        "ROW_LIMIT": "the row limit was reached",
+        "BYTE_LIMIT": "the size limit was reached",
+        "TIMEOUT": "the query timed out",
+    }
+    reason = reasons.get(bounded_result.get("truncation_reason"), "a limit was reached")
+    return (
+        f"The retrieval result is truncated because {reason}; only the first "
+        f"{len(bounded_result.get('records', []))} record(s) are shown. Do not treat it as complete."
+    )
+
+
+def get_cypher_schema_errors(
+    query: str, entity_types: list[str], relationship_types: list[str]
+) -> list[str]:
+    """
+    Checks the node labels and relationship types used in a Cypher query against the ontology.
+    """
+    errors = []
+    # Node patterns such as (n:Person) or (:Company:Listed)
+    for labels in re.findall(r"\(\s*\w*\s*((?::\s*`?\w+`?\s*)+)", query):
+        for label in re.findall(r"`?(\w+)`?", labels):
+            if label not in entity_types:
+                errors.append(f"Unknown node label '{label}', not defined in the ontology.")
+    # Relationship patterns such as [r:hasDirector] or [:supplies|buysFrom*1..2]
+    for types in re.findall(r"\[\s*\w*\s*:\s*([`\w\s|:]+)", query):
+        for rel_type in re.findall(r"`?(\w+)`?", types):
+            if rel_type not in relationship_types:
+                errors.append(
+                    f"Unknown relationship type '{rel_type}', not defined in the ontology."
+                )
+    return list(dict.fromkeys(errors))
+
+
+def get_formatted_cypher_validation_note(errors: list[str], warnings: list[str]) -> str:
+    output = ["The previously generated Cypher query failed validation and was not executed."]
+    if errors:
+        output.append("Errors:")
+        output.extend(f"  - {error}" for error in errors)
+    if warnings:
+        output.append("Warnings:")
+        output.extend(f"  - {warning}" for warning in warnings)
+    output.append("Generate a corrected Cypher query.")
+    return "\n".join(output)
+
+
+def get_merged_cypher_validation(validations: list[dict]) -> dict:
+    """
+    Merges the EXPLAIN validations of the speculative Cypher candidates, labelling each error and
+    warning with its candidate when there are several.
+    """
+
+    def get_labelled(index: int, message: str) -> str:
+        return f"Candidate {index}: {message}" if len(validations) > 1 else message
+
+    return {
+        "valid": any(validation["valid"] for validation in validations),
+        "errors": [
+            get_labelled(index, error)
+            for index, validation in enumerate(validations, start=1)
+            for error in validation["errors"]
+        ],
+        "warnings": [
+            get_labelled(index, warning)
+            for index, validation in enumerate(validations, start=1)
+            for warning in validation["warnings"]
+        ],
+    }
+
+
+def get_formatted_candidates_instruction(num_of_candidates: int) -> str:
+    return (
+        f"\n\nGenerate {num_of_candidates} alternative Cypher queries that answer the user query in different ways "
+        "(e.g. different relationship paths, directions, or looser matching), ordered from most to least likely to succeed. "
+        "Return them strictly in JSON as "
+        '{"candidates": [{"cypher_query": "<your_cypher_query>", "parameters": {}, "note": ""}]}.'
+    )
+
+
+def get_normalized_text2cypher_response(response: dict) -> dict:
+    """
+    Normalizes a Text2CypherAgent output that may contain a `candidates` list, exposing the
+    first candidate through the usual `cypher_query`, `parameters` and `note` keys.
+    """
+    candidates = [
+        {
+            "cypher_query": candidate.get("cypher_query", "") or "",
+            "parameters": candidate.get("parameters", {}) or {},
+            "note": candidate.get("note", "") or "",
+        }
+        for candidate in response.get("candidates", []) or []
+        if isinstance(candidate, dict)
+    ]
+    if not candidates:
+        return response
+    return {**candidates[0], "candidates": candidates}
+
+
+def get_formatted_candidate_results(candidate_results: list[tuple[str, str]]) -> str:
+    output = []
+    for i, (formatted_cypher, stringified_result) in enumerate(
+        candidate_results, start=1
+    ):
+        output.append(f"Candidate {i} Cypher query: {formatted_cypher}")
+        output.append(f"Candidate {i} retrieval result:\n{stringified_result}")
+        output.append("")
+    return "\n".join(output).strip()
+
+
 def get_formatted_input_for_query_agent(type: str, payload: dict):
     output = []
     if type == "QUERY_GENERATION":
@@ -0,0 +1,52 @@
+import time
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from typing import Any
+
+
+class QueryStage(str, Enum):
+    CHAT = "CHAT"
+    ENTITY_VALIDATION = "ENTITY_VALIDATION"
+    REQUEST_DECOMPOSITION = "REQUEST_DECOMPOSITION"
+    QUERY_GENERATION = "QUERY_GENERATION"
+    TEXT2CYPHER = "TEXT2CYPHER"
+    CYPHER_VALIDATION = "CYPHER_VALIDATION"
+    CYPHER_EXECUTION = "CYPHER_EXECUTION"
+    RESULT_COMPILATION = "RESULT_COMPILATION"
+    RESULT_EVALUATION = "RESULT_EVALUATION"
+    SUBREQUEST_FINAL_RESPONSE = "SUBREQUEST_FINAL_RESPONSE"
+    COMBINED_FINAL_RESPONSE = "COMBINED_FINAL_RESPONSE"
+    VECTOR_RAG = "VECTOR_RAG"
+    TIMING = "TIMING"
+    FINAL_RESPONSE = "FINAL_RESPONSE"
+    RESPONSE_DELTA = "RESPONSE_DELTA"
+    ERROR = "ERROR"
+
+
+@dataclass
+class QueryEvent:
+    """
+    A single step reported by `GraphRetrievalSystem.query_events`.
+
+    Attributes:
+        stage: The pipeline stage that produced the event.
+        message: A markdown rendering of the event, as streamed by `GraphRetrievalSystem.query`.
+        agent: The agent (or QueryAgent instance, e.g. "Query Agent 1") the event belongs to.
+        payload: Structured data of the event, such as the parsed agent response.
+        elapsed: Seconds spent on the step, set on TIMING events.
+        token_usage: LLM token usage of the call that produced the event, if any.
+        created_at: Unix timestamp of the event.
+    """
+
+    stage: QueryStage
+    message: str = ""
+    agent: str | None = None
+    payload: Any = None
+    elapsed: float | None = None
+    token_usage: dict | None = None
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        event = asdict(self)
+        event["stage"] = self.stage.value
+        return event
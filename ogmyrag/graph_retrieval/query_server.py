@@ -0,0 +1,316 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncGenerator, Awaitable, Callable
+
+from .chat_session import ChatSession
+from .graph_retrieval import GraphRetrievalSystem
+
+graph_retrieval_logger = logging.getLogger("graph_retrieval")
+
+Scope = dict[str, Any]
+Receive = Callable[[], Awaitable[dict]]
+Send = Callable[[dict], Awaitable[None]]
+
+
+class RequestBodyTooLargeError(Exception):
+    """
+    Raised when a request body exceeds `QueryServer.max_body_bytes`.
+    """
+
+
+def get_formatted_sse(event: str, data: Any) -> bytes:
+    """
+    Encodes one server-sent event.
+    """
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    lines = [f"event: {event}"] + [f"data: {line}" for line in payload.splitlines()]
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class QueryServer:
+    """
+    A dependency-free ASGI application serving a shared GraphRetrievalSystem as server-sent event streams.
+
+    All requests share the storage clients and agents of one GraphRetrievalSystem, while the chat state is kept
+    per session. At most `max_concurrent_requests` requests run at a time and up to `max_queued_requests` more
+    wait for a slot; further requests are rejected with 503 so that load is pushed back to the clients instead of
+    accumulating in memory. A client disconnect cancels its request, including the in-flight LLM calls.
+
+    Endpoints:
+        POST /query           {"request", "session_id"?, "top_k_for_similarity"?, "similarity_threshold"?,
+                               "max_tool_call"?, "speculative_candidates"?, "deadline"?}
+        POST /rag_query       {"request" (str | list[str]), "top_k_for_similarity"?, "similarity_threshold"?}
+        DELETE /sessions/{id}
+        GET /health
+
+    Example:
+        server = QueryServer(GraphRetrievalSystem(...))
+        uvicorn.run(server, host="0.0.0.0", port=8000)
+    """
+
+    def __init__(
+        self,
+        graph_retrieval_system: GraphRetrievalSystem,
+        max_concurrent_requests: int = 8,
+        max_queued_requests: int = 32,
+        session_ttl: float = 3600.0,
+        default_top_k_for_similarity: int = 20,
+        default_similarity_threshold: float = 0.6,
+        default_deadline: float | None = 300.0,
+        max_body_bytes: int = 64 * 1024,
+    ):
+        self.graph_retrieval_system = graph_retrieval_system
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_queued_requests = max_queued_requests
+        self.session_ttl = session_ttl
+        self.default_top_k_for_similarity = default_top_k_for_similarity
+        self.default_similarity_threshold = default_similarity_threshold
+        self.default_deadline = default_deadline
+        self.max_body_bytes = max_body_bytes
+
+        self.sessions: dict[str, ChatSession] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrent_requests)
+        self._pending_requests = 0
+        self.stats = {"served": 0, "rejected": 0, "cancelled": 0, "failed": 0}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._handle_lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        method, path = scope["method"], scope["path"].rstrip("/")
+        try:
+            if method == "GET" and path == "/health":
+                await self._send_json(send, 200, self._get_health())
+            elif method == "POST" and path in ("/query", "/rag_query"):
+                body = await self._read_json_body(receive)
+                if body is None:
+                    await self._send_json(send, 400, {"error": "Invalid JSON body"})
+                    return
+                if not body.get("request"):
+                    await self._send_json(send, 400, {"error": "Missing 'request'"})
+                    return
+                await self._handle_query(path, body, receive, send)
+            elif method == "DELETE" and path.startswith("/sessions/"):
+                session_id = path.removeprefix("/sessions/")
+                removed = self.sessions.pop(session_id, None) is not None
+                await self._send_json(send, 200 if removed else 404, {"removed": removed})
+            else:
+                await self._send_json(send, 404, {"error": "Not found"})
+        except RequestBodyTooLargeError as e:
+            await self._send_json(send, 413, {"error": str(e)})
+
+    async def _handle_lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _handle_query(
+        self, path: str, body: dict, receive: Receive, send: Send
+    ) -> None:
+        # Backpressure: reject instead of queueing without bound
+        if self._pending_requests >= self.max_concurrent_requests + self.max_queued_requests:
+            self.stats["rejected"] += 1
+            await self._send_json(
+                send,
+                503,
+                {"error": "Server is busy, retry later"},
+                headers=[(b"retry-after", b"5")],
+            )
+            return
+
+        self._pending_requests += 1
+        try:
+            if path == "/query":
+                chat_session = self._get_session(body.get("session_id"))
+                events = self._get_query_events(body, chat_session)
+            else:
+                events = self._get_rag_query_events(body)
+            await self._stream(events, receive, send)
+        finally:
+            self._pending_requests -= 1
+
+    async def _get_query_events(
+        self, body: dict, chat_session: ChatSession
+    ) -> AsyncGenerator[tuple[str, Any], None]:
+        yield "session", {"session_id": chat_session.session_id}
+        # Turns of the same session continue from each other's responses, so they cannot overlap
+        async with chat_session.lock, self._semaphore:
+            async for event in self.graph_retrieval_system.query_events(
+                user_request=body["request"],
+                top_k_for_similarity=body.get(
+                    "top_k_for_similarity", self.default_top_k_for_similarity
+                ),
+                similarity_threshold=body.get(
+                    "similarity_threshold", self.default_similarity_threshold
+                ),
+                max_tool_call=body.get("max_tool_call", 3),
+                speculative_candidates=body.get("speculative_candidates", 1),
+                deadline=body.get("deadline", self.default_deadline),
+                chat_session=chat_session,
+            ):
+                yield event.stage.value, event.to_dict()
+            chat_session.touch()
+
+    async def _get_rag_query_events(
+        self, body: dict
+    ) -> AsyncGenerator[tuple[str, Any], None]:
+        async with self._semaphore:
+            async for message in self.graph_retrieval_system.rag_query(
+                user_request=body["request"],
+                top_k_for_similarity=body.get(
+                    "top_k_for_similarity", self.default_top_k_for_similarity
+                ),
+                similarity_threshold=body.get(
+                    "similarity_threshold", self.default_similarity_threshold
+                ),
+            ):
+                yield "message", {"message": message}
+
+    async def _stream(
+        self,
+        events: AsyncGenerator[tuple[str, Any], None],
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream; charset=utf-8"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+
+        async def pump():
+            try:
+                async for event, data in events:
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": get_formatted_sse(event, data),
+                            "more_body": True,
+                        }
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["failed"] += 1
+                graph_retrieval_logger.error(
+                    f"QueryServer\nError while processing request: {e}"
+                )
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": get_formatted_sse("error", {"error": str(e)}),
+                        "more_body": True,
+                    }
+                )
+            finally:
+                await events.aclose()
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": get_formatted_sse("done", {}),
+                    "more_body": False,
+                }
+            )
+
+        pump_task = asyncio.create_task(pump())
+        disconnect_task = asyncio.create_task(self._wait_for_disconnect(receive))
+        done, _ = await asyncio.wait(
+            {pump_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED
+        )
+
+        if pump_task in done:
+            disconnect_task.cancel()
+            self.stats["served"] += 1
+        else:
+            # Closing the event generator cancels the in-flight agents of this request
+            graph_retrieval_logger.info("QueryServer\nClient disconnected, cancelling request")
+            pump_task.cancel()
+            self.stats["cancelled"] += 1
+        await asyncio.gather(pump_task, disconnect_task, return_exceptions=True)
+
+    async def _wait_for_disconnect(self, receive: Receive) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+
+    async def _read_json_body(self, receive: Receive) -> dict | None:
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body_bytes:
+                raise RequestBodyTooLargeError(f"Request body exceeds {self.max_body_bytes} bytes")
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        try:
+            body = json.loads(b"".join(chunks) or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        return body if isinstance(body, dict) else None
+
+    async def _send_json(
+        self,
+        send: Send,
+        status: int,
+        data: dict,
+        headers: list[tuple[bytes, bytes]] | None = None,
+    ) -> None:
+        body = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json")] + (headers or []),
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    def _get_session(self, session_id: str | None) -> ChatSession:
+        self._evict_expired_sessions()
+        chat_session = self.sessions.get(session_id) if session_id else None
+        if chat_session is None:
+            chat_session = (
+                ChatSession(session_id=session_id) if session_id else ChatSession()
+            )
+            self.sessions[chat_session.session_id] = chat_session
+        chat_session.touch()
+        return chat_session
+
+    def _evict_expired_sessions(self) -> None:
+        now = time.monotonic()
+        for session_id, chat_session in list(self.sessions.items()):
+            if (
+                now - chat_session.last_active_at > self.session_ttl
+                and not chat_session.lock.locked()
+            ):
+                del self.sessions[session_id]
+
+    def _get_health(self) -> dict:
+        return {
+            "status": "ok",
+            "sessions": len(self.sessions),
+            "pending_requests": self._pending_requests,
+            "max_concurrent_requests": self.max_concurrent_requests,
+            "max_queued_requests": self.max_queued_requests,
+            **self.stats,
+        }
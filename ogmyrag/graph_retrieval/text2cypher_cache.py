@@ -0,0 +1,190 @@
+import copy
+import logging
+import math
+import re
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+graph_retrieval_logger = logging.getLogger("graph_retrieval")
+
+ENTITY_PLACEHOLDER_KEY = "__entity__"
+
+
+def get_query_template(query: str, validated_entities: list[str]) -> str:
+    """
+    Normalizes a natural-language query into a template by replacing each validated entity
+    with a positional placeholder (<ENTITY_1>, <ENTITY_2>, ...), lowercasing and collapsing
+    punctuation and whitespace.
+    """
+    template = query
+    # Replace longer names first so that an entity contained in another one is not split
+    for index, entity in sorted(
+        enumerate(validated_entities, start=1), key=lambda item: -len(item[1])
+    ):
+        if entity:
+            template = re.sub(
+                re.escape(entity), f" ENTITYPLACEHOLDER{index} ", template, flags=re.I
+            )
+    template = template.lower()
+    template = re.sub(r"[^\w\s]", " ", template)
+    template = re.sub(r"entityplaceholder(\d+)", r"<ENTITY_\1>", template)
+    return re.sub(r"\s+", " ", template).strip()
+
+
+def _get_parameter_template(value: Any, validated_entities: list[str]) -> Any:
+    if isinstance(value, str):
+        for index, entity in enumerate(validated_entities):
+            if value.casefold() == entity.casefold():
+                return {ENTITY_PLACEHOLDER_KEY: index}
+        return value
+    if isinstance(value, list):
+        return [_get_parameter_template(item, validated_entities) for item in value]
+    if isinstance(value, dict):
+        return {
+            key: _get_parameter_template(item, validated_entities)
+            for key, item in value.items()
+        }
+    return value
+
+
+def _get_bound_parameter(value: Any, validated_entities: list[str]) -> Any:
+    if isinstance(value, dict):
+        if set(value) == {ENTITY_PLACEHOLDER_KEY}:
+            return validated_entities[value[ENTITY_PLACEHOLDER_KEY]]
+        return {
+            key: _get_bound_parameter(item, validated_entities)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_get_bound_parameter(item, validated_entities) for item in value]
+    return value
+
+
+def _get_cosine_similarity(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class Text2CypherCache:
+    """
+    An in-memory LRU cache of Text2CypherAgent outputs.
+
+    Entries are keyed by (ontology version, query template, number of validated entities), where the
+    template is the query with its validated entities replaced by positional placeholders. Parameters
+    holding an entity name are stored as placeholders too, so a cached Cypher query is re-bound to the
+    entities of the new request. Only queries that reference entities exclusively through parameters
+    are cached, since literal names inside the Cypher text cannot be re-bound safely.
+
+    When an `embed_fn` is given, a miss on the exact template falls back to the most similar template
+    of the same ontology version and entity count, provided its cosine similarity reaches
+    `similarity_threshold`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        similarity_threshold: float = 0.95,
+        embed_fn: Callable[[str], Awaitable[list[float]]] | None = None,
+    ):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn
+        self._entries: OrderedDict[tuple, dict] = OrderedDict()
+        self.stats = {"hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0}
+
+    async def _get_embedding(self, template: str) -> list[float] | None:
+        if not self.embed_fn:
+            return None
+        try:
+            return await self.embed_fn(template)
+        except Exception as e:
+            graph_retrieval_logger.warning(
+                f"Text2CypherCache\nFailed to embed query template, skipping semantic lookup: {e}"
+            )
+            return None
+
+    async def get(
+        self, query: str, validated_entities: list[str], ontology_version: str
+    ) -> dict | None:
+        """
+        Returns a Text2CypherAgent-shaped response ("cypher_query", "parameters", "note") bound to the
+        given entities, or None on a miss.
+        """
+        template = get_query_template(query, validated_entities)
+        key = (ontology_version, template, len(validated_entities))
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.stats["hits"] += 1
+        else:
+            embedding = await self._get_embedding(template)
+            if embedding is not None:
+                best_key, best_score = None, 0.0
+                for candidate_key, candidate in self._entries.items():
+                    if candidate_key[0] != key[0] or candidate_key[2] != key[2]:
+                        continue
+                    if candidate.get("embedding") is None:
+                        continue
+                    score = _get_cosine_similarity(embedding, candidate["embedding"])
+                    if score > best_score:
+                        best_key, best_score = candidate_key, score
+                if best_key is not None and best_score >= self.similarity_threshold:
+                    key, entry = best_key, self._entries[best_key]
+                    self.stats["semantic_hits"] += 1
+                    graph_retrieval_logger.info(
+                        f"Text2CypherCache\nSemantic hit ({best_score:.3f}) for template: {template}"
+                    )
+
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        return {
+            "cypher_query": entry["cypher_query"],
+            "parameters": _get_bound_parameter(
+                copy.deepcopy(entry["parameters"]), validated_entities
+            ),
+            "note": entry["note"],
+            "id": None,
+            "from_cache": True,
+        }
+
+    async def put(
+        self,
+        query: str,
+        validated_entities: list[str],
+        ontology_version: str,
+        text2cypher_response: dict,
+    ) -> bool:
+        """
+        Stores a validated Text2CypherAgent response. Returns False if it cannot be re-bound safely.
+        """
+        cypher_query = text2cypher_response.get("cypher_query") or ""
+        if not cypher_query:
+            return False
+        for entity in validated_entities:
+            if entity and entity.casefold() in cypher_query.casefold():
+                # The entity is embedded in the Cypher text and would leak into other requests
+                return False
+
+        template = get_query_template(query, validated_entities)
+        key = (ontology_version, template, len(validated_entities))
+        self._entries[key] = {
+            "cypher_query": cypher_query,
+            "parameters": _get_parameter_template(
+                text2cypher_response.get("parameters") or {}, validated_entities
+            ),
+            "note": text2cypher_response.get("note", ""),
+            "embedding": await self._get_embedding(template),
+        }
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        self.stats["stores"] += 1
+        return True
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -1 +1 @@
-from .openai import OpenAIAsyncClient
\ No newline at end of file
+from .openai import OpenAIAsyncClient
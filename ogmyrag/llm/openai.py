@@ -1,6 +1,8 @@
+import asyncio
 import os
 import logging
 from datetime import datetime
+from typing import AsyncGenerator
 from openai import (
     AsyncOpenAI,
     APIConnectionError,
@@ -14,11 +16,14 @@ from tenacity import (
     wait_exponential,
     retry_if_exception_type,
 )
-from ..util import limit_concurrency
+from ..util import limit_concurrency, get_prompt_cache_usage
 from ..base import BaseLLMClient
 
 openai_logger = logging.getLogger("openai")
 
+# Shared by fetched and streamed Responses API calls; a streamed call holds its slot until the stream ends
+RESPONSES_API_SEMAPHORE = asyncio.Semaphore(20)
+
 
 class OpenAIAsyncClient(BaseLLMClient):
     def __init__(self, api_key: str | None = None):
@@ -27,8 +32,10 @@ class OpenAIAsyncClient(BaseLLMClient):
             openai_logger.error("OPENAI_API_KEY is not set.")
             raise Exception("OPENAI_API_KEY is required but missing.")
         self.client = AsyncOpenAI(api_key=api_key)
+        # Prompt-cache usage accumulated per agent (or per model when no agent name is given)
+        self.prompt_cache_stats: dict[str, dict[str, int]] = {}
 
-    @limit_concurrency(max_concurrent_tasks=20)
+    @limit_concurrency(semaphore=RESPONSES_API_SEMAPHORE)
     @retry(
         stop=stop_after_attempt(5),
         wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -37,7 +44,12 @@ class OpenAIAsyncClient(BaseLLMClient):
         ),
     )
     async def fetch_response(
-        self, model: str, user_prompt: str, system_prompt: str | None = None, **kwargs
+        self,
+        model: str,
+        user_prompt: str,
+        system_prompt: str | None = None,
+        agent_name: str | None = None,
+        **kwargs,
     ):
         start = datetime.now().strftime("%H:%M:%S.%f")[:-3]
         openai_logger.info(f"Started at {start} for prompt: {user_prompt[:30]}...")
@@ -61,4 +73,101 @@ class OpenAIAsyncClient(BaseLLMClient):
         end = datetime.now().strftime("%H:%M:%S.%f")[:-3]
         openai_logger.info(f"Ended at {end} for prompt: {user_prompt[:30]}...")
 
+        self._record_prompt_cache_usage(agent_name or model, response)
+
         return response
+
+    @retry(
+        stop=stop_after_attempt(5),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type(
+            (RateLimitError, APIConnectionError, APITimeoutError)
+        ),
+    )
+    async def _open_response_stream(self, model: str, messages: list[dict], **kwargs):
+        # Only opening the stream is retried, since deltas may already have been forwarded afterwards
+        return await self.client.responses.create(
+            model=model, input=messages, stream=True, **kwargs
+        )
+
+    async def stream_response(
+        self,
+        model: str,
+        user_prompt: str,
+        system_prompt: str | None = None,
+        agent_name: str | None = None,
+        **kwargs,
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Streams a Responses API call as {"type": "delta", "delta": str} events for the output text,
+        followed by {"type": "completed", "response": <Response>} carrying the same object `fetch_response` returns.
+
+        The call holds a slot of the concurrency limit shared with `fetch_response` until the stream ends.
+        Closing the generator early (e.g. on cancellation) closes the HTTP stream.
+        """
+        start = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+        openai_logger.info(f"Started at {start} for prompt: {user_prompt[:30]}...")
+
+        messages = (
+            [{"role": "developer", "content": system_prompt}] if system_prompt else []
+        )
+        messages.append({"role": "user", "content": user_prompt})
+
+        openai_logger.info(f"Streaming query to {model} using ResponsesAPI")
+
+        async with RESPONSES_API_SEMAPHORE:
+            try:
+                stream = await self._open_response_stream(model, messages, **kwargs)
+                response = None
+                try:
+                    async for event in stream:
+                        if event.type == "response.output_text.delta":
+                            yield {"type": "delta", "delta": event.delta}
+                        elif event.type in ("response.completed", "response.incomplete"):
+                            response = event.response
+                        elif event.type in ("response.failed", "error"):
+                            raise OpenAIError(f"Streaming response failed: {event}")
+                finally:
+                    await stream.close()
+            except (APIConnectionError, RateLimitError, APITimeoutError, OpenAIError) as e:
+                openai_logger.error(f"OpenAI API Error: {e}")
+                raise
+
+        if response is None:
+            raise OpenAIError("Stream ended without a completed response")
+
+        openai_logger.debug(f"Received response from ResponsesAPI:\n {str(response)}")
+        end = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+        openai_logger.info(f"Ended at {end} for prompt: {user_prompt[:30]}...")
+
+        self._record_prompt_cache_usage(agent_name or model, response)
+
+        yield {"type": "completed", "response": response}
+
+    def _record_prompt_cache_usage(self, key: str, response) -> None:
+        usage = get_prompt_cache_usage(response)
+        stats = self.prompt_cache_stats.setdefault(
+            key, {"calls": 0, "input_tokens": 0, "cached_tokens": 0}
+        )
+        stats["calls"] += 1
+        stats["input_tokens"] += usage["input_tokens"]
+        stats["cached_tokens"] += usage["cached_tokens"]
+        openai_logger.info(
+            f"{key}: {usage['cached_tokens']}/{usage['input_tokens']} input tokens served from the prompt cache"
+        )
+
+    def get_prompt_cache_stats(self) -> dict[str, dict]:
+        """
+        Returns the accumulated prompt-cache usage and hit ratio per agent.
+        """
+        return {
+            key: {
+                **stats,
+                "hit_ratio": (
+                    round(stats["cached_tokens"] / stats["input_tokens"], 4)
+                    if stats["input_tokens"]
+                    else 0.0
+                ),
+            }
+            for key, stats in self.prompt_cache_stats.items()
+        }
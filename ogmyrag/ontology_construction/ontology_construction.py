@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import copy
 import logging
 from ..prompts import PROMPT
 from ..llm import OpenAIAsyncClient
-from ..util import get_formatted_ontology, get_formatted_openai_response, get_clean_json
+from ..util import (
+    get_formatted_ontology,
+    get_formatted_openai_response,
+    get_clean_json,
+    OntologyProvider,
+)
 from ..storage import AsyncMongoDBStorage
 from motor.motor_asyncio import AsyncIOMotorClient
 
@@ -51,7 +57,10 @@ class OntologyConstructionAgent(BaseAgent):
         )
 
         response = await self.agent_system.llm_client.fetch_response(
-            system_prompt=system_prompt, user_prompt=user_prompt, **self.agent_config
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            agent_name=self.agent_name,
+            **self.agent_config,
         )
         ontology_construction_logger.info(
             f"OntologyConstructionAgent\nOntology construction response details:\n{get_formatted_openai_response(response)}"
@@ -90,7 +99,10 @@ class OntologyEvaluationAgent(BaseAgent):
         )
 
         response = await self.agent_system.llm_client.fetch_response(
-            system_prompt=system_prompt, user_prompt=user_prompt, **self.agent_config
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            agent_name=self.agent_name,
+            **self.agent_config,
         )
         ontology_construction_logger.info(
             f"OntologyEvaluationAgent\nOntology evaluation response details:\n{get_formatted_openai_response(response)}"
@@ -132,7 +144,10 @@ class OntologyEnhancementAgent(BaseAgent):
         )
 
         response = await self.agent_system.llm_client.fetch_response(
-            system_prompt=system_prompt, user_prompt=user_prompt, **self.agent_config
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            agent_name=self.agent_name,
+            **self.agent_config,
         )
 
         ontology_construction_logger.info(
@@ -173,6 +188,10 @@ class OntologyConstructionSystem(BaseMultiAgentSystem):
             self.ontology_config = ontology_config
             self.ontology_evaluation_config = ontology_evaluation_config
             self.mongo_storage = AsyncMongoDBStorage(mongo_client)
+            self.ontology_provider = OntologyProvider(
+                async_mongo_storage=self.mongo_storage,
+                ontology_config=ontology_config,
+            )
             self.ontology_purpose = ontology_purpose
             self.agent_configs = agent_configs
         except Exception as e:
@@ -259,6 +278,7 @@ class OntologyConstructionSystem(BaseMultiAgentSystem):
             ontology_construction_logger.info(
                 f"OntologyConstructionSystem\nOntology is updated, current version: {new_version}"
             )
+        self.ontology_provider.invalidate()
 
     async def enhance_ontology_via_loop(self):
         """
@@ -411,27 +431,17 @@ class OntologyConstructionSystem(BaseMultiAgentSystem):
             ontology_construction_logger.info(
                 f"OntologyConstructionSystem\nOntology is updated, current version: {new_version}"
             )
+        self.ontology_provider.invalidate()
 
     async def get_current_onto(self) -> dict:
-        current_latest_onto = await (
-            self.mongo_storage.get_database(self.ontology_config["database_name"])
-            .get_collection(self.ontology_config["collection_name"])
-            .read_documents({"is_latest": True})
-        )
-        return (
-            current_latest_onto[0].get("ontology", "")
-            if current_latest_onto
-            else {"entities": {}, "relationships": {}}
-        )
+        try:
+            # The cached ontology is shared, so return a copy that callers may modify
+            return copy.deepcopy(await self.ontology_provider.get_ontology())
+        except LookupError:
+            return {"entities": {}, "relationships": {}}
 
     async def get_current_onto_version(self) -> str:
-        current_latest_onto = await (
-            self.mongo_storage.get_database(self.ontology_config["database_name"])
-            .get_collection(self.ontology_config["collection_name"])
-            .read_documents({"is_latest": True})
-        )
-        return (
-            current_latest_onto[0].get("version", "1.0.0")
-            if current_latest_onto
-            else "1.0.0"
-        )
+        try:
+            return await self.ontology_provider.get_version()
+        except LookupError:
+            return "1.0.0"
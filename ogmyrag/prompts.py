@@ -158,9 +158,6 @@ You understand the instructions. Now extract entities and relationships from the
 
 Ontology:
 {ontology}
-
-Source Text Publish Date:
-{publish_date}
 """
 
 PROMPT[
@@ -289,7 +286,7 @@ Guidelines
          - Politely reject and re-prompt with a relevant question tied to Malaysian listed companies.
 
    [2] Tool Use Logic
-      - You have access to the three tools:
+      - You have access to the three tools, where the GraphRAGAgent and VectorRAGAgent may also be called together:
       
          1. EntityValidationTool
             - Purpose: Validate whether a proper noun/phrase corresponds to an entity in the knowledge graph.
@@ -302,7 +299,7 @@ Guidelines
                - Step 2: Multiple similar entities may be returned. Depending on the context, choose one of the following actions:
                
                   1. If you are calling the GraphRAGAgent based on the user’s request
-                     - At this stage, you must confirm with the user whether the returned entities are the ones they intended. Based on the returned entities, select the entity with the highest similarity score that exceeds the similarity threshold of {similarity_threshold}.
+                     - At this stage, you must confirm with the user whether the returned entities are the ones they intended. Based on the returned entities, select the entity with the highest similarity score that exceeds the similarity threshold stated at the end of the input.
                      - Example:
                         - User request: "Which companies supply products/services to the company autocount berhad?"
                         - You decide to call the GraphRAGAgent as the initial tool. Therefore, you must first call the EntityValidationTool to verify potential entities before calling the GraphRAGAgent.
@@ -409,6 +406,23 @@ Guidelines
                         \"request\": \"your_query\"
                      }}
                   }}
+
+         4. GraphRAGAgent and VectorRAGAgent together
+            - Purpose: Run both retrievals concurrently when you already know that the request needs both the knowledge graph and semantic search (e.g., relationships between entities plus descriptive details about them).
+            - Usage:
+               - The entities must still be validated first with EntityValidationTool.
+               - Output format:
+                  {{
+                     \"type\": \"CALLING_GRAPH_AND_VECTOR_RAG_AGENTS\",
+                     \"payload\": {{
+                        \"graph_request\": \"your_query_for_graph_rag_agent\",
+                        \"validated_entities\": [
+                           \"entity_1\",
+                           \"entity_2\"
+                        ],
+                        \"vector_request\": \"your_query_for_vector_rag_agent\"
+                     }}
+                  }}
       
    [3] Response Generation Logic
       - Apart from generating output to call tool, you need to generate output in scenarios below.
@@ -492,6 +506,19 @@ Guidelines
                   \"request\": \"your_query\"
                }}
             }}
+
+         5. GraphRAGAgent and VectorRAGAgent together
+            {{
+               \"type\": \"CALLING_GRAPH_AND_VECTOR_RAG_AGENTS\",
+               \"payload\": {{
+                  \"graph_request\": \"your_query_for_graph_rag_agent\",
+                  \"validated_entities\": [
+                     \"entity_1\",
+                     \"entity_2\"
+                  ],
+                  \"vector_request\": \"your_query_for_vector_rag_agent\"
+               }}
+            }}
 """
 
 
@@ -924,12 +951,11 @@ Guidelines:
          
 You now understand the guidelines. Proceed to extend the ontology using the stated ontology purpose, the provided current ontology, and the given source text. Extract new entities and relationships strictly in accordance with the guidelines.
 
-Current Ontology:
-{ontology}
-
 Ontology Purpose:
 {ontology_purpose}
 
+Current Ontology:
+{ontology}
 """
 
 PROMPT[
@@ -1,6 +1,20 @@
-from .report_retrieval_util import get_formatted_company_data, chunk_markdown, clean_markdown_response
+from .report_retrieval_util import get_formatted_company_data, chunk_markdown, clean_markdown_response, needs_decomposition
 from .report_retrieval import ReportRetrievalManager
 from .retrieval_storage import RetrievalAsyncStorageManager
+from .company_catalog import CompanyCatalog, get_company_catalog
+from .company_detector import CompanyDetector, CompanyDetection, normalize_company_name
+from .bm25_index import BM25Index, get_bm25_index, reciprocal_rank_fusion
+from .reranker import BaseReranker, LexicalMMRReranker, CrossEncoderReranker, benchmark_rerankers
+from .context_packer import ContextPacker, get_simhash
+from .answer_cache import SemanticAnswerCache, DataVersionRegistry, get_data_versions
+from .embedding_batcher import EmbeddingBatcher
+from .chunk_metadata import (
+    ChunkMetadata,
+    build_chunk_filter,
+    build_chunk_metadata,
+    migrate_chunk_metadata,
+    parse_year,
+)
 from .report_chunker import (
     _text_of,
     _split_big_block, 
@@ -8,5 +22,6 @@ from .report_chunker import (
     chunk_html_dom,
     build_pinecone_items_from_chunks,
     index_markdown_with_pinecone,
-    rag_answer_with_company_detection
+    rag_answer_with_company_detection,
+    get_rag_path_counters
 )
\ No newline at end of file
@@ -0,0 +1,247 @@
+import asyncio
+import json
+import logging
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..storage.pinecone_storage import PineconeStorage
+from .company_catalog import CATALOG_ID_PREFIX, _iter_vectors
+from .company_detector import CompanyDetector
+
+retrieval_logger = logging.getLogger("retrieval")
+
+# Version key of the data that queries without a detected company are answered from
+ALL_COMPANIES = "__all__"
+
+
+def _get_cosine_similarity(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class DataVersionRegistry:
+    """
+    Per-company versions of the indexed report data of one Pinecone index. `index_markdown_with_pinecone`
+    stamps a new version on the company's catalog vector (`company::<name>`, metadata "data_version")
+    whenever it re-indexes the company's sections, so every process using the index sees it.
+
+    Versions read from Pinecone are reused for `refresh_interval` seconds, which bounds how long re-indexing
+    by another process goes unnoticed. The version of answers not tied to a company (`ALL_COMPANIES`) is
+    only bumped by this process; the answer cache TTL bounds their staleness.
+    """
+
+    def __init__(
+        self,
+        pine: PineconeStorage,
+        index_name: str,
+        namespace: str = "company-catalog",
+        refresh_interval: float = 60.0,
+    ):
+        self.pine = pine
+        self.index_name = index_name
+        self.namespace = namespace
+        self.refresh_interval = refresh_interval
+        # company -> (version, time.monotonic() of the read)
+        self._versions: Dict[str, Tuple[Any, float]] = {}
+        self._all_version = 0
+
+    async def get_versions(self, companies: Iterable[str]) -> Dict[str, Any]:
+        """
+        Returns the current version of each company, reading the versions older than `refresh_interval`
+        from the catalog namespace.
+        """
+        companies = list(companies)
+        now = time.monotonic()
+        stale = [
+            c for c in companies
+            if c != ALL_COMPANIES
+            and (c not in self._versions or now - self._versions[c][1] >= self.refresh_interval)
+        ]
+        if stale:
+            try:
+                fetched = await asyncio.to_thread(
+                    self.pine._get_index(self.index_name).fetch,
+                    ids=[f"{CATALOG_ID_PREFIX}{c}" for c in stale],
+                    namespace=self.namespace,
+                )
+                metadata_by_id = {
+                    vid: (
+                        rec.get("metadata") if isinstance(rec, dict)
+                        else getattr(rec, "metadata", None)
+                    ) or {}
+                    for vid, rec in _iter_vectors(fetched)
+                }
+                for company in stale:
+                    metadata = metadata_by_id.get(f"{CATALOG_ID_PREFIX}{company}") or {}
+                    self._versions[company] = (metadata.get("data_version", 0), now)
+            except Exception as e:
+                # Keep serving the last known versions; they are refreshed on the next lookup
+                retrieval_logger.warning("Failed to read data versions from the catalog: %s", e)
+
+        return {
+            c: self._all_version if c == ALL_COMPANIES else self._versions.get(c, (0, 0.0))[0]
+            for c in companies
+        }
+
+    def bump(self, company: str) -> float:
+        """
+        Marks a company's data as changed in this process and returns its new version, to be stored as
+        the "data_version" of its catalog vector (see `publish()`). Answers not tied to a company are
+        invalidated as well.
+        """
+        version = time.time()
+        self._versions[company] = (version, time.monotonic())
+        self._all_version += 1
+        return version
+
+    async def publish(self, company: str, version: float) -> None:
+        """
+        Stores a version on the existing catalog vector of a company, for the other processes.
+        """
+        try:
+            await asyncio.to_thread(
+                self.pine._get_index(self.index_name).update,
+                id=f"{CATALOG_ID_PREFIX}{company}",
+                set_metadata={"data_version": version},
+                namespace=self.namespace,
+            )
+        except Exception as e:
+            retrieval_logger.warning("Failed to publish the data version of %s: %s", company, e)
+
+
+_data_versions: Dict[Tuple[str, str], DataVersionRegistry] = {}
+
+
+def get_data_versions(
+    pine: PineconeStorage, index_name: str, namespace: str = "company-catalog"
+) -> DataVersionRegistry:
+    """
+    Returns the process-wide DataVersionRegistry of a Pinecone index and catalog namespace.
+    """
+    key = (index_name, namespace)
+    if key not in _data_versions:
+        _data_versions[key] = DataVersionRegistry(pine, index_name=index_name, namespace=namespace)
+    return _data_versions[key]
+
+
+class SemanticAnswerCache:
+    """
+    An in-memory LRU cache of final RAG answers.
+
+    A query is normalized with the catalog's CompanyDetector (company mentions replaced by "the company",
+    lowercased, whitespace collapsed) and embedded. A cached answer is reused when its filters and detected
+    companies are identical, the data versions of those companies are unchanged, and the cosine similarity
+    of the normalized query embeddings reaches `similarity_threshold`. Keeping the companies out of the
+    embedded text prevents "Acme's revenue" from matching "Beta's revenue". Entries expire after `ttl`
+    seconds, bounding staleness that the data versions cannot see.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], Awaitable[List[float]]],
+        data_versions: DataVersionRegistry,
+        max_entries: int = 1000,
+        similarity_threshold: float = 0.95,
+        ttl: Optional[float] = 3600.0,
+    ):
+        self.embed_fn = embed_fn
+        self.data_versions = data_versions
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self._entries: OrderedDict[int, dict] = OrderedDict()
+        self._next_id = 0
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "stale": 0}
+
+    async def _get_versions(self, companies: Tuple[str, ...]) -> Dict[str, Any]:
+        return await self.data_versions.get_versions(companies or (ALL_COMPANIES,))
+
+    async def _get_lookup(
+        self, query: str, detector: Optional[CompanyDetector]
+    ) -> Tuple[Tuple[str, ...], str, Optional[List[float]]]:
+        if detector is not None:
+            detection = detector.detect(query)
+            companies = tuple(sorted(detection.companies + detection.candidates))
+            normalized = detection.normalized_query
+        else:
+            companies, normalized = (), query
+        normalized = re.sub(r"\s+", " ", normalized.lower()).strip()
+        try:
+            embedding = await self.embed_fn(normalized)
+        except Exception as e:
+            retrieval_logger.warning("SemanticAnswerCache: failed to embed query, skipping cache: %s", e)
+            embedding = None
+        return companies, normalized, embedding
+
+    async def get(
+        self,
+        query: str,
+        filters: Dict[str, Any],
+        detector: Optional[CompanyDetector] = None,
+    ) -> Tuple[Optional[str], dict]:
+        """
+        Returns (cached answer or None, lookup). Pass the lookup to `put()` to store the answer of a miss
+        without embedding the query again.
+        """
+        companies, normalized, embedding = await self._get_lookup(query, detector)
+        filter_key = json.dumps(filters, sort_keys=True, default=str)
+        # Versions are taken before answering, so data re-indexed meanwhile does not validate the answer
+        versions = await self._get_versions(companies)
+        lookup = {
+            "companies": companies,
+            "filters": filter_key,
+            "embedding": embedding,
+            "versions": versions,
+        }
+        if embedding is None:
+            self.stats["misses"] += 1
+            return None, lookup
+
+        now = time.time()
+        best_id, best_score = None, 0.0
+        for entry_id, entry in list(self._entries.items()):
+            if entry["companies"] != companies or entry["filters"] != filter_key:
+                continue
+            if entry["versions"] != versions or (self.ttl and now - entry["created_at"] > self.ttl):
+                # The company was re-indexed (or the entry expired) since the answer was cached
+                del self._entries[entry_id]
+                self.stats["stale"] += 1
+                continue
+            score = _get_cosine_similarity(embedding, entry["embedding"])
+            if score > best_score:
+                best_id, best_score = entry_id, score
+
+        if best_id is None or best_score < self.similarity_threshold:
+            self.stats["misses"] += 1
+            return None, lookup
+
+        self.stats["hits"] += 1
+        self._entries.move_to_end(best_id)
+        retrieval_logger.info(
+            "SemanticAnswerCache hit (%.3f) for %r ~ %r", best_score, normalized, self._entries[best_id]["query"]
+        )
+        return self._entries[best_id]["answer"], lookup
+
+    def put(self, query: str, answer: str, lookup: dict) -> None:
+        if not answer or lookup.get("embedding") is None:
+            return
+        self._entries[self._next_id] = {
+            "query": query,
+            "answer": answer,
+            "companies": lookup["companies"],
+            "filters": lookup["filters"],
+            "embedding": lookup["embedding"],
+            "versions": lookup["versions"],
+            "created_at": time.time(),
+        }
+        self._next_id += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self.stats["stores"] += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,312 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .chunk_metadata import iter_chunk_metadata, parse_year
+from .report_retrieval_util import get_cache_path, write_json_atomically
+
+retrieval_logger = logging.getLogger("retrieval")
+
+# Letters and figures are split ("RM1,234.5" -> "rm", "1234.5"), and figures are kept whole without
+# their thousands separators
+_TOKEN_PATTERN = re.compile(r"[a-z]+|[0-9]+(?:[.,][0-9]+)*")
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "was", "were", "what", "which",
+    "who", "with", "how", "does", "do", "did", "its", "their",
+}
+
+
+def _get_tokens(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN_PATTERN.findall((text or "").lower()):
+        token = token.replace(",", "")
+        if token not in _STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def _matches_filter(metadata: Dict[str, Any], query_filter: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evaluates the subset of the Pinecone metadata filter used by the RAG path: equality, $eq, $in and $or.
+    """
+    for key, condition in (query_filter or {}).items():
+        if key == "$or":
+            if not any(_matches_filter(metadata, sub_filter) for sub_filter in condition):
+                return False
+            continue
+        value = metadata.get(key)
+        if isinstance(condition, dict):
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _get_section_key(metadata: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (
+        metadata.get("from_company"),
+        metadata.get("type"),
+        parse_year(metadata.get("year")) or 0,
+        metadata.get("section"),
+    )
+
+
+class BM25Index:
+    """
+    A local BM25 inverted index over report chunk text, complementing dense retrieval on exact figures,
+    ticker codes and names that embeddings tend to miss.
+
+    Chunks are replaced a section at a time, mirroring the delete-then-upsert of
+    `index_markdown_with_pinecone`. Each section is persisted to its own JSON file in `persist_dir` from a
+    worker thread, so re-indexing a section neither rewrites the whole corpus nor blocks the event loop.
+    The inverted index itself is rebuilt from the documents on load. An index whose files are missing
+    (e.g. on another host) can be rebuilt from the chunk metadata in Pinecone with `rebuild_from_pinecone()`.
+    """
+
+    def __init__(
+        self,
+        persist_dir: Optional[str] = None,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.persist_dir = persist_dir
+        self.k1 = k1
+        self.b = b
+
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._section_ids: Dict[Tuple[Any, ...], Set[str]] = {}
+        self._persist_lock = asyncio.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def _load(self) -> None:
+        if not self.persist_dir or not os.path.isdir(self.persist_dir):
+            return
+        for file_name in sorted(os.listdir(self.persist_dir)):
+            if not file_name.endswith(".json"):
+                continue
+            path = os.path.join(self.persist_dir, file_name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    documents = json.load(f)["documents"]
+                for doc_id, metadata in documents.items():
+                    self._add_document(doc_id, metadata)
+            except Exception as e:
+                retrieval_logger.warning("Ignoring unreadable BM25 section file %s: %s", path, e)
+        retrieval_logger.info(
+            "Loaded %d chunks into BM25 index from %s", len(self._documents), self.persist_dir
+        )
+
+    def _get_section_path(self, section_key: Tuple[Any, ...]) -> str:
+        digest = hashlib.sha1(
+            json.dumps(section_key, ensure_ascii=False, default=str).encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.persist_dir, f"{digest}.json")
+
+    async def _persist_sections(self, section_keys: Iterable[Tuple[Any, ...]]) -> None:
+        if not self.persist_dir:
+            return
+        async with self._persist_lock:
+            # Snapshot on the event loop, so the worker thread never reads documents being modified
+            snapshot = {
+                key: {doc_id: self._documents[doc_id] for doc_id in self._section_ids.get(key, ())}
+                for key in section_keys
+            }
+            await asyncio.to_thread(self._write_sections, snapshot)
+
+    def _write_sections(self, snapshot: Dict[Tuple[Any, ...], Dict[str, Dict[str, Any]]]) -> None:
+        try:
+            for key, documents in snapshot.items():
+                path = self._get_section_path(key)
+                if documents:
+                    write_json_atomically(path, {"section": list(key), "documents": documents})
+                elif os.path.exists(path):
+                    os.remove(path)
+        except Exception as e:
+            retrieval_logger.warning("Failed to persist BM25 index to %s: %s", self.persist_dir, e)
+
+    def _add_document(self, doc_id: str, metadata: Dict[str, Any]) -> None:
+        if doc_id in self._documents:
+            self._remove_document(doc_id)
+
+        term_counts = Counter(_get_tokens(metadata.get("text") or ""))
+        self._documents[doc_id] = metadata
+        self._section_ids.setdefault(_get_section_key(metadata), set()).add(doc_id)
+        self._lengths[doc_id] = sum(term_counts.values())
+        self._total_length += self._lengths[doc_id]
+        for term, count in term_counts.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+
+    def _remove_document(self, doc_id: str) -> None:
+        metadata = self._documents.pop(doc_id, None)
+        if metadata is None:
+            return
+        section_key = _get_section_key(metadata)
+        self._section_ids[section_key].discard(doc_id)
+        if not self._section_ids[section_key]:
+            del self._section_ids[section_key]
+        self._total_length -= self._lengths.pop(doc_id, 0)
+        for term in set(_get_tokens(metadata.get("text") or "")):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    async def replace_section(
+        self,
+        items: Iterable[Dict[str, Any]],
+        section_filter: Dict[str, Any],
+    ) -> None:
+        """
+        Replaces the chunks matching `section_filter` (see `build_chunk_filter`) with `items`, shaped as
+        produced by `build_pinecone_items_from_chunks` ({"id", "name", "metadata"}), and persists the
+        affected sections.
+        """
+        stale_ids = [
+            doc_id
+            for doc_id, metadata in self._documents.items()
+            if _matches_filter(metadata, section_filter)
+        ]
+        changed_sections = {_get_section_key(self._documents[doc_id]) for doc_id in stale_ids}
+        for doc_id in stale_ids:
+            self._remove_document(doc_id)
+
+        for item in items:
+            metadata = dict(item.get("metadata") or {})
+            metadata.setdefault("text", item.get("name") or "")
+            self._add_document(item["id"], metadata)
+            changed_sections.add(_get_section_key(metadata))
+
+        await self._persist_sections(changed_sections)
+        retrieval_logger.info(
+            "BM25 index updated for %s: -%d chunks, %d chunks in total",
+            section_filter, len(stale_ids), len(self._documents),
+        )
+
+    async def rebuild_from_pinecone(
+        self,
+        pine: Any,
+        index_name: str,
+        namespace: str = "",
+        batch_size: int = 100,
+    ) -> int:
+        """
+        Replaces the index with the chunks stored in a Pinecone namespace, e.g. on a new host or after the
+        persisted sections were lost. Returns the number of indexed chunks.
+        """
+        documents: Dict[str, Dict[str, Any]] = {}
+        async for batch in iter_chunk_metadata(pine, index_name, namespace, batch_size=batch_size):
+            for vector_id, metadata in batch:
+                if metadata.get("text"):
+                    documents[vector_id] = dict(metadata)
+
+        previous_sections = set(self._section_ids)
+        self._documents, self._postings, self._lengths, self._section_ids = {}, {}, {}, {}
+        self._total_length = 0
+        for doc_id, metadata in documents.items():
+            self._add_document(doc_id, metadata)
+
+        await self._persist_sections(previous_sections | set(self._section_ids))
+        retrieval_logger.info(
+            "BM25 index rebuilt from Pinecone index %s (namespace %r): %d chunks",
+            index_name, namespace, len(self._documents),
+        )
+        return len(self._documents)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        query_filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns the top-k chunks by BM25 score as Pinecone-like matches: [{"id", "score", "metadata"}].
+        """
+        if not self._documents:
+            return []
+
+        num_documents = len(self._documents)
+        average_length = self._total_length / num_documents or 1.0
+        scores: Dict[str, float] = {}
+
+        for term in set(_get_tokens(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (num_documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        matches = []
+        for doc_id, score in ranked:
+            metadata = self._documents[doc_id]
+            if not _matches_filter(metadata, query_filter):
+                continue
+            matches.append({"id": doc_id, "score": score, "metadata": metadata})
+            if len(matches) >= top_k:
+                break
+        return matches
+
+
+def reciprocal_rank_fusion(
+    result_lists: List[List[Dict[str, Any]]], k: int = 60, top_k: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Fuses ranked match lists (e.g. dense and BM25) by reciprocal rank: score(d) = sum(1 / (k + rank(d))).
+
+    Each fused match is the first occurrence of its id, with "rrf_score" added. The "score" of the first
+    list (the dense similarity) is kept so that score thresholds still apply.
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for matches in result_lists:
+        for rank, match in enumerate(matches, start=1):
+            doc_id = match.get("id")
+            if doc_id is None:
+                continue
+            if doc_id not in fused:
+                fused[doc_id] = {**match, "rrf_score": 0.0}
+            fused[doc_id]["rrf_score"] += 1.0 / (k + rank)
+
+    ranked = sorted(fused.values(), key=lambda m: m["rrf_score"], reverse=True)
+    return ranked[:top_k] if top_k else ranked
+
+
+_bm25_indexes: Dict[Tuple[str, str], BM25Index] = {}
+
+
+def get_bm25_index(
+    index_name: str, namespace: str = "", persist_dir: Optional[str] = None
+) -> BM25Index:
+    """
+    Returns the process-wide BM25Index of the chunks in a Pinecone index and namespace.
+
+    The index is persisted under `get_cache_path()` unless `persist_dir` is passed on the first call
+    (e.g. at startup), which should then point to storage kept across restarts.
+    """
+    key = (index_name, namespace)
+    if key not in _bm25_indexes:
+        _bm25_indexes[key] = BM25Index(
+            persist_dir=persist_dir or get_cache_path(
+                f"ogmyrag_bm25_{index_name}_{namespace or 'default'}"
+            )
+        )
+    return _bm25_indexes[key]
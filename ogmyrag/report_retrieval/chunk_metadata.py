@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, TypedDict
+
+from .company_detector import normalize_company_name
+
+retrieval_logger = logging.getLogger("retrieval")
+
+# Bumped whenever the chunk metadata layout changes; chunks without it use the legacy layout
+CHUNK_METADATA_VERSION = 2
+
+_YEAR_PATTERN = re.compile(r"(19|20)\d{2}")
+
+
+class ChunkMetadata(TypedDict, total=False):
+    """
+    Metadata stored with each report chunk vector, shared by indexing and querying.
+
+    Legacy chunks stored `year` as the year tag string (e.g. "_2024") and had neither `report_type_name`,
+    `company_key` nor `schema_version`; use `build_chunk_filter()` to match both layouts.
+    """
+
+    type: str                  # document type, e.g. "annual_report"
+    from_company: str          # canonical company name, as listed in the company catalog
+    company_key: str           # normalize_company_name(from_company), e.g. "acme"
+    report_type_name: str      # ReportType name, e.g. "ANNUAL"
+    year: int                  # report year, 0 if unknown (Pinecone metadata cannot hold nulls)
+    section: str
+    chunk: int                 # 1-based chunk number within the section
+    chunk_no: int              # same as `chunk`, under the name used by the query path
+    text: str
+    schema_version: int
+
+
+def parse_year(value: Any) -> Optional[int]:
+    """
+    Returns the year of a year tag ("_2024"), string ("2024", "FY2024") or number, or None.
+    """
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _YEAR_PATTERN.search(str(value))
+    return int(match.group(0)) if match else None
+
+
+def get_year_filter_values(year: Any) -> List[Any]:
+    """
+    Returns the stored `year` values a year may appear as: numeric (current layout) and the legacy
+    year tag and plain string forms. An unknown year ("" or "N/A") matches 0 and the legacy empty tag.
+    """
+    parsed = parse_year(year)
+    if parsed is None:
+        return [0, ""]
+    return [parsed, f"_{parsed}", str(parsed)]
+
+
+def build_chunk_metadata(
+    *,
+    company: str,
+    report_type: Any,
+    year_tag: str,
+    doc_type: str,
+    section: str,
+    chunk_no: int,
+    text: str,
+) -> ChunkMetadata:
+    return {
+        "type": doc_type,
+        "from_company": company,
+        "company_key": normalize_company_name(company),
+        "report_type_name": getattr(report_type, "name", str(report_type)),
+        "section": section,
+        "chunk": chunk_no,
+        "chunk_no": chunk_no,
+        "text": text,
+        "year": parse_year(year_tag) or 0,
+        "schema_version": CHUNK_METADATA_VERSION,
+    }
+
+
+def build_chunk_filter(
+    *,
+    company: Optional[str] = None,
+    doc_type: Optional[str] = None,
+    report_type_name: Optional[str] = None,
+    year: Any = None,
+    section: Optional[str] = None,
+    match_company_key: bool = False,
+) -> Dict[str, Any]:
+    """
+    Builds the Pinecone metadata filter of report chunks. Years match both the numeric and legacy layouts;
+    pass `year=""` to match chunks of reports without a year.
+
+    With `match_company_key`, `company` also matches current-layout chunks by `company_key`, so casing and
+    suffix variants of the name ("Acme Bhd" for "ACME_BERHAD") still match. Leave it off when deleting,
+    as distinct companies may share a key.
+
+    `report_type_name` only matches chunks indexed (or migrated with `migrate_chunk_metadata`) in the
+    current layout.
+    """
+    query_filter: Dict[str, Any] = {}
+    if company and match_company_key:
+        query_filter["$or"] = [
+            {"company_key": normalize_company_name(company)},
+            {"from_company": company},
+        ]
+    elif company:
+        query_filter["from_company"] = company
+    if doc_type:
+        query_filter["type"] = doc_type
+    if report_type_name:
+        query_filter["report_type_name"] = report_type_name
+    if year is not None:
+        query_filter["year"] = {"$in": get_year_filter_values(year)}
+    if section:
+        query_filter["section"] = section
+    return query_filter
+
+
+def get_migrated_chunk_metadata(vector_id: str, metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Returns the metadata fields to set on a legacy chunk, or None if it already uses the current layout.
+
+    The report type is recovered from the legacy id "<company>_<REPORT_TYPE><year_tag>_SECTION_<i>_CHUNK_<k>".
+    """
+    if metadata.get("schema_version") == CHUNK_METADATA_VERSION:
+        return None
+
+    updates: Dict[str, Any] = {"schema_version": CHUNK_METADATA_VERSION}
+    company = metadata.get("from_company")
+    if company:
+        updates["company_key"] = normalize_company_name(company)
+        prefix = f"{company}_"
+        if vector_id.startswith(prefix):
+            report_type_name = re.match(r"[A-Z]+", vector_id[len(prefix):])
+            if report_type_name:
+                updates["report_type_name"] = report_type_name.group(0)
+    updates["year"] = parse_year(metadata.get("year")) or 0
+    if "chunk" in metadata and "chunk_no" not in metadata:
+        updates["chunk_no"] = metadata["chunk"]
+    return updates
+
+
+async def iter_chunk_metadata(
+    pine: Any,
+    index_name: str,
+    namespace: str = "",
+    prefix: Optional[str] = None,
+    batch_size: int = 100,
+) -> AsyncIterator[List[Tuple[str, Dict[str, Any]]]]:
+    """
+    Yields the (vector id, metadata) pairs of a Pinecone namespace in batches of `batch_size`, listing and
+    fetching the vectors off the event loop.
+    """
+    index = pine._get_index(index_name)
+    list_kwargs = {"namespace": namespace, "limit": 99}
+    if prefix:
+        list_kwargs["prefix"] = prefix
+    pages = await asyncio.to_thread(lambda: list(index.list(**list_kwargs)))
+    ids = [vid for page in pages for vid in (page or []) if vid]
+
+    for i in range(0, len(ids), batch_size):
+        fetched = await asyncio.to_thread(index.fetch, ids=ids[i:i + batch_size], namespace=namespace)
+        vectors = (
+            fetched.get("vectors") if isinstance(fetched, dict)
+            else getattr(fetched, "vectors", None)
+        ) or {}
+        yield [
+            (
+                vector_id,
+                (
+                    record.get("metadata") if isinstance(record, dict)
+                    else getattr(record, "metadata", None)
+                ) or {},
+            )
+            for vector_id, record in vectors.items()
+        ]
+
+
+async def migrate_chunk_metadata(
+    pine: Any,
+    index_name: str,
+    namespace: str = "",
+    prefix: Optional[str] = None,
+    batch_size: int = 100,
+) -> int:
+    """
+    Rewrites the metadata of legacy chunks of a Pinecone namespace to the current layout in place,
+    without re-embedding. Returns the number of updated vectors.
+    """
+    index = pine._get_index(index_name)
+    checked = updated = 0
+    async for batch in iter_chunk_metadata(pine, index_name, namespace, prefix, batch_size):
+        updates = []
+        for vector_id, metadata in batch:
+            new_fields = get_migrated_chunk_metadata(vector_id, metadata)
+            if new_fields:
+                updates.append((vector_id, new_fields))
+
+        await asyncio.gather(*(
+            asyncio.to_thread(index.update, id=vector_id, set_metadata=new_fields, namespace=namespace)
+            for vector_id, new_fields in updates
+        ))
+        checked += len(batch)
+        updated += len(updates)
+        retrieval_logger.info(
+            "Migrated chunk metadata: %d vectors checked, %d updated", checked, updated
+        )
+    return updated
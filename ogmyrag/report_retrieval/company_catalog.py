@@ -0,0 +1,231 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..storage.pinecone_storage import PineconeStorage
+from .company_detector import CompanyDetector
+from .report_retrieval_util import get_cache_path, write_json_atomically
+
+retrieval_logger = logging.getLogger("retrieval")
+
+CATALOG_ID_PREFIX = "company::"
+
+
+class CompanyCatalog:
+    """
+    In-memory catalog of the company names stored in a Pinecone catalog namespace (one `company::<name>`
+    vector per company), persisted to a JSON file so a restarted process does not have to list the namespace.
+
+    The catalog is listed from Pinecone only when it is empty or older than `ttl` seconds. Companies indexed
+    through `index_markdown_with_pinecone` are added with `add_company()`, so new companies are visible
+    without waiting for the TTL.
+    """
+
+    def __init__(
+        self,
+        pine: PineconeStorage,
+        index_name: str,
+        namespace: str = "company-catalog",
+        ttl: float = 3600.0,
+        persist_path: Optional[str] = None,
+        retry_interval: float = 60.0,
+    ):
+        self.pine = pine
+        self.index_name = index_name
+        self.namespace = namespace
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.persist_path = persist_path or get_cache_path(
+            f"ogmyrag_company_catalog_{index_name}_{namespace}.json"
+        )
+
+        self._companies: set[str] = set()
+        self._sorted: List[str] = []
+        self._detector: Optional[CompanyDetector] = None
+        # Wall-clock time so that the TTL also holds for a catalog loaded from disk
+        self._refreshed_at = 0.0
+        # After a failed refresh, the namespace is not listed again before this time
+        self._retry_at = 0.0
+        self._lock = asyncio.Lock()
+        self._persist_lock = asyncio.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._set_companies(data.get("companies", []))
+            self._refreshed_at = float(data.get("refreshed_at", 0.0))
+            retrieval_logger.info(
+                "Loaded %d companies from catalog file %s", len(self._sorted), self.persist_path
+            )
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            retrieval_logger.warning("Ignoring unreadable catalog file %s: %s", self.persist_path, e)
+
+    async def _persist(self) -> None:
+        try:
+            async with self._persist_lock:
+                # Snapshot on the event loop, so the last write holds the latest catalog
+                data = {"companies": self._sorted, "refreshed_at": self._refreshed_at}
+                await asyncio.to_thread(write_json_atomically, self.persist_path, data)
+        except Exception as e:
+            # Persistence only saves a refresh after a restart
+            retrieval_logger.warning("Failed to persist catalog to %s: %s", self.persist_path, e)
+
+    def _set_companies(self, companies) -> None:
+        self._companies = {c.strip() for c in companies if isinstance(c, str) and c.strip()}
+        self._sorted = sorted(self._companies)
+        self._detector = None
+
+    def _is_fresh(self) -> bool:
+        # An empty catalog is fresh too, so an index without companies is not re-listed on every query
+        now = time.time()
+        return now - self._refreshed_at < self.ttl or now < self._retry_at
+
+    async def get_companies(self) -> List[str]:
+        """
+        Returns the sorted company names, listing the catalog namespace only if the cache is stale.
+        """
+        if self._is_fresh():
+            return self._sorted
+
+        async with self._lock:
+            # Another coroutine may have refreshed the catalog while waiting for the lock
+            if not self._is_fresh():
+                await self.refresh()
+        return self._sorted
+
+    async def get_detector(self) -> CompanyDetector:
+        """
+        Returns a CompanyDetector over the current companies, rebuilt only when the catalog changes.
+        """
+        companies = await self.get_companies()
+        if self._detector is None:
+            self._detector = CompanyDetector(companies)
+        return self._detector
+
+    async def refresh(self) -> None:
+        """
+        Re-lists the catalog namespace. On failure the previous catalog is kept, and `get_companies()`
+        does not retry before `retry_interval` seconds.
+        """
+        try:
+            companies = await self._fetch_companies()
+        except Exception:
+            retrieval_logger.exception("Catalog company extraction failed")
+            self._retry_at = time.time() + self.retry_interval
+            return
+
+        self._set_companies(companies)
+        self._refreshed_at = time.time()
+        await self._persist()
+        retrieval_logger.info("Catalog refreshed with %d companies", len(self._sorted))
+
+    async def add_company(self, company: str) -> None:
+        """
+        Adds a company upserted into the catalog namespace.
+        """
+        company = (company or "").strip()
+        if not company or company in self._companies:
+            return
+        self._set_companies(self._companies | {company})
+        await self._persist()
+
+    def invalidate(self) -> None:
+        """
+        Forces the next `get_companies()` to re-list the catalog namespace.
+        """
+        self._refreshed_at = 0.0
+        self._retry_at = 0.0
+
+    async def _fetch_companies(self) -> List[str]:
+        index = self.pine._get_index(self.index_name)
+
+        # pages: generator of lists of IDs
+        try:
+            pages = await asyncio.to_thread(
+                lambda: list(index.list(namespace=self.namespace, prefix=CATALOG_ID_PREFIX, limit=99))
+            )
+        except Exception as e:
+            retrieval_logger.warning(
+                "list(namespace=%r) failed: %s; falling back to list() without namespace",
+                self.namespace, e,
+            )
+            pages = await asyncio.to_thread(
+                lambda: list(index.list(prefix=CATALOG_ID_PREFIX, limit=1000))
+            )
+
+        # flatten list-of-lists → ids
+        ids = [vid for page in pages for vid in (page or []) if vid]
+
+        batches = [ids[i:i + 100] for i in range(0, len(ids), 100)]
+        fetched_batches = await asyncio.gather(
+            *(self._fetch_batch(index, batch_ids) for batch_ids in batches)
+        )
+
+        seen = set()
+        for fetched in fetched_batches:
+            for vid, rec in _iter_vectors(fetched):
+                name = _get_company_name(vid, rec)
+                if name:
+                    seen.add(name)
+        return sorted(seen)
+
+    async def _fetch_batch(self, index: Any, batch_ids: List[str]) -> Any:
+        try:
+            return await asyncio.to_thread(index.fetch, ids=batch_ids, namespace=self.namespace)
+        except Exception as e:
+            retrieval_logger.warning(
+                "fetch(namespace=%r) failed: %s; retrying without namespace", self.namespace, e
+            )
+            return await asyncio.to_thread(index.fetch, ids=batch_ids)
+
+
+def _iter_vectors(fetched: Any) -> List[Tuple[Any, Any]]:
+    vecs = (
+        fetched.get("vectors") if isinstance(fetched, dict)
+        else getattr(fetched, "vectors", None)
+    ) or {}
+
+    # normalize to an iterator of (id, record)
+    if isinstance(vecs, dict):
+        return list(vecs.items())                      # {id: {..}} or {id: Vector}
+    if isinstance(vecs, (list, tuple)):
+        return [(getattr(v, "id", None), v) for v in vecs]   # [Vector, ...]
+    return []
+
+
+def _get_company_name(vid: Any, rec: Any) -> str:
+    # metadata for dict or Vector object
+    meta = (
+        rec.get("metadata") if isinstance(rec, dict)
+        else getattr(rec, "metadata", None)
+    ) or {}
+    name = (meta.get("from_company") or "").strip()
+
+    # fallback: parse from the id like "company::ACME_INC"
+    if not name:
+        rid = vid if isinstance(vid, str) else getattr(rec, "id", None)
+        if isinstance(rid, str) and "::" in rid:
+            name = rid.split("::", 1)[1].strip()
+    return name
+
+
+_catalogs: Dict[Tuple[str, str], CompanyCatalog] = {}
+
+
+def get_company_catalog(
+    pine: PineconeStorage, index_name: str, namespace: str = "company-catalog"
+) -> CompanyCatalog:
+    """
+    Returns the process-wide CompanyCatalog of a Pinecone index and catalog namespace, so the
+    indexing and query paths share one catalog even when they use different PineconeStorage instances.
+    """
+    key = (index_name, namespace)
+    if key not in _catalogs:
+        _catalogs[key] = CompanyCatalog(pine, index_name=index_name, namespace=namespace)
+    return _catalogs[key]
@@ -0,0 +1,416 @@
+import difflib
+import math
+import re
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Trailing corporate suffixes ignored when matching company names
+CORPORATE_SUFFIXES = {
+    "holdings", "holding", "berhad", "bhd", "sdn", "ltd", "limited",
+    "plc", "inc", "co", "corp", "corporation", "company",
+}
+
+# Single words too generic to identify a company on their own
+GENERIC_TOKENS = {
+    "the", "and", "of", "for", "group", "bank", "banking", "international", "industries",
+    "industry", "technology", "technologies", "resources", "energy", "malaysia", "malaysian",
+    "global", "services", "service", "properties", "property", "capital", "asia", "pacific",
+    "development", "developments", "power", "health", "healthcare", "solutions", "systems",
+    "engineering", "construction", "plantations", "plantation", "trading", "investment",
+    "investments", "digital", "national", "united", "general", "first", "new",
+    "annual", "report", "company", "tech",
+}
+
+# Function words of questions, which never start or end a company name
+QUERY_STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "for", "in", "on", "at", "to", "by", "with", "from", "as",
+    "what", "which", "who", "whom", "whose", "how", "when", "where", "why", "is", "are", "was", "were",
+    "be", "been", "do", "does", "did", "has", "have", "had", "its", "their", "this", "that", "these",
+    "those", "much", "many", "between", "compare", "compared", "versus", "vs", "year", "years",
+}
+
+_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+(?:&[A-Za-z0-9]+)*")
+_POSSESSIVE_PATTERN = re.compile(r"^['’]s\b")
+
+
+def _get_tokens(text: str) -> List[str]:
+    return [t.lower() for t in _TOKEN_PATTERN.findall((text or "").replace("_", " "))]
+
+
+def _strip_suffixes(tokens: List[str]) -> List[str]:
+    end = len(tokens)
+    while end > 1 and tokens[end - 1] in CORPORATE_SUFFIXES:
+        end -= 1
+    return tokens[:end]
+
+
+def _get_trigrams(text: str) -> Set[str]:
+    padded = f" {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def normalize_company_name(name: str) -> str:
+    """
+    Lowercases a company name, drops punctuation and underscores and strips trailing corporate suffixes,
+    e.g. "ACME_HOLDINGS_BERHAD" and "Acme Holdings Bhd." both become "acme".
+    """
+    return " ".join(_strip_suffixes(_get_tokens(name)))
+
+
+@dataclass
+class CompanyDetection:
+    """
+    Result of `CompanyDetector.detect`.
+
+    Attributes:
+        companies: Canonical names of the detected companies, in order of mention.
+        normalized_query: The query with the company mentions replaced by "the company".
+        method: "exact", "fuzzy" or "none".
+        ambiguous: Whether a mention matches several companies, in which case `candidates` lists them.
+        candidates: Canonical names a mention could refer to when the detection is ambiguous.
+    """
+
+    companies: List[str] = field(default_factory=list)
+    normalized_query: str = ""
+    method: str = "none"
+    ambiguous: bool = False
+    candidates: List[str] = field(default_factory=list)
+
+
+class _TokenAutomaton:
+    """
+    Aho–Corasick automaton over token sequences, so that matches always fall on word boundaries.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, ...]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for pattern in patterns:
+            state = 0
+            for token in pattern:
+                if token not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][token] = len(self._goto) - 1
+                state = self._goto[state][token]
+            self._output[state].append(len(pattern))
+
+        # Breadth-first, so the failure state of a node is resolved before its children
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                if state:
+                    self._fail[child] = self._goto[fallback].get(token, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, tokens: List[str]) -> List[Tuple[int, int]]:
+        """
+        Returns the (start, end) token spans of all pattern occurrences.
+        """
+        spans = []
+        state = 0
+        for i, token in enumerate(tokens):
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            for length in self._output[state]:
+                spans.append((i + 1 - length, i + 1))
+        return spans
+
+
+class CompanyDetector:
+    """
+    Detects mentions of catalog companies in a query without an LLM call.
+
+    Each company is indexed under its normalized name, its distinctive words and its acronym. Queries are
+    matched with a token-level Aho–Corasick automaton, falling back to fuzzy matching (difflib) of the query
+    n-grams to catch misspellings. Fuzzy matching only compares n-grams that could be names with the aliases
+    sharing enough character trigrams with them. A mention matching several companies is reported as ambiguous
+    so that the caller can escalate only those queries to an LLM.
+
+    Detections are cached per query string, so the steps of one RAG request share a single detection.
+
+    Example:
+        detector = CompanyDetector(["ACME_HOLDINGS_BERHAD", "Beta Tech Sdn Bhd"])
+        detector.detect("What is Acme's revenue in 2024?")
+        # CompanyDetection(companies=["ACME_HOLDINGS_BERHAD"], normalized_query="What is the company's revenue in 2024?", ...)
+    """
+
+    def __init__(
+        self,
+        companies: Iterable[str],
+        fuzzy_cutoff: float = 0.85,
+        min_alias_chars: int = 4,
+        min_acronym_chars: int = 3,
+        max_shared_token_owners: int = 3,
+        max_fuzzy_candidates: int = 20,
+        max_cached_queries: int = 1024,
+    ):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.min_alias_chars = min_alias_chars
+        self.max_fuzzy_candidates = max_fuzzy_candidates
+        self.max_cached_queries = max_cached_queries
+        self._detections: OrderedDict[str, CompanyDetection] = OrderedDict()
+
+        # alias tokens -> canonical names, and alias tokens that only match upper-case mentions
+        self._aliases: Dict[Tuple[str, ...], Set[str]] = {}
+        self._acronyms: Set[Tuple[str, ...]] = set()
+        self._name_tokens: Dict[str, List[str]] = {}
+
+        token_owners: Dict[str, Set[str]] = {}
+        for company in companies:
+            tokens = _strip_suffixes(_get_tokens(company))
+            if not tokens:
+                continue
+            self._aliases.setdefault(tuple(tokens), set()).add(company)
+            self._name_tokens[company] = tokens
+            for token in set(tokens):
+                token_owners.setdefault(token, set()).add(company)
+
+            if len(tokens) >= min_acronym_chars:
+                acronym = ("".join(t[0] for t in tokens),)
+                if acronym not in self._aliases:
+                    self._acronyms.add(acronym)
+                self._aliases.setdefault(acronym, set()).add(company)
+
+        # A distinctive word identifies its company; one shared by a few companies makes the mention ambiguous
+        for token, owners in token_owners.items():
+            if (
+                len(owners) <= max_shared_token_owners
+                and len(token) >= min_alias_chars
+                and token not in GENERIC_TOKENS
+                and token not in CORPORATE_SUFFIXES
+            ):
+                self._aliases.setdefault((token,), set()).update(owners)
+
+        self._automaton = _TokenAutomaton(self._aliases.keys())
+        self._fuzzy_keys = {
+            " ".join(alias): alias
+            for alias in self._aliases
+            if alias not in self._acronyms and len(" ".join(alias)) >= min_alias_chars
+        }
+        self._max_alias_tokens = max((len(a) for a in self._aliases), default=0)
+
+        # Index of the fuzzy keys by (first letter, character trigram), narrowing the keys compared with each
+        # query n-gram (misspellings rarely change the first letter of a name)
+        self._fuzzy_key_list = list(self._fuzzy_keys)
+        self._trigram_index: Dict[Tuple[str, str], List[int]] = {}
+        for key_id, key in enumerate(self._fuzzy_key_list):
+            for trigram in _get_trigrams(key):
+                self._trigram_index.setdefault((key[0], trigram), []).append(key_id)
+        self._max_fuzzy_key_chars = max((len(k) for k in self._fuzzy_key_list), default=0)
+
+    def detect(self, query: str) -> CompanyDetection:
+        """
+        Returns the companies mentioned in a query. The returned detection is shared with later calls
+        for the same query and must not be modified.
+        """
+        query = query or ""
+        cached = self._detections.get(query)
+        if cached is not None:
+            self._detections.move_to_end(query)
+            return cached
+
+        detection = self._detect(query)
+        self._detections[query] = detection
+        while len(self._detections) > self.max_cached_queries:
+            self._detections.popitem(last=False)
+        return detection
+
+    def _detect(self, query: str) -> CompanyDetection:
+        matches = [(m.start(), m.end(), m.group(0)) for m in _TOKEN_PATTERN.finditer(query)]
+        tokens = [text.lower() for _, _, text in matches]
+
+        spans = self._get_exact_spans(tokens, matches)
+        method = "exact"
+        if not spans:
+            spans = self._get_fuzzy_spans(tokens)
+            method = "fuzzy"
+        if not spans:
+            return CompanyDetection(normalized_query=query)
+
+        companies: List[str] = []
+        candidates: List[str] = []
+        ambiguous = False
+        for _, _, owners in spans:
+            if len(owners) > 1:
+                ambiguous = True
+                candidates.extend(c for c in sorted(owners) if c not in candidates)
+            elif owners[0] not in companies:
+                companies.append(owners[0])
+
+        return CompanyDetection(
+            companies=companies,
+            normalized_query=self._get_normalized_query(query, matches, spans),
+            method=method,
+            ambiguous=ambiguous,
+            candidates=candidates,
+        )
+
+    def _get_exact_spans(
+        self, tokens: List[str], matches: List[Tuple[int, int, str]]
+    ) -> List[Tuple[int, int, List[str]]]:
+        spans = []
+        for start, end in self._automaton.find(tokens):
+            alias = tuple(tokens[start:end])
+            # Acronyms collide with ordinary words, so they must be written in upper case
+            if alias in self._acronyms and not matches[start][2].isupper():
+                continue
+            owners = sorted(self._aliases[alias])
+            if len(owners) == 1:
+                end = self._extend_span(tokens, start, end, owners[0])
+            spans.append((start, end, owners))
+        return _select_longest_spans(spans)
+
+    def _extend_span(self, tokens: List[str], start: int, end: int, company: str) -> int:
+        """
+        Extends a match on the first words of a name over the misspelled words that follow it,
+        e.g. "Malayan Bankng" for "Malayan Banking Berhad".
+        """
+        name_tokens = self._name_tokens[company]
+        matched = end - start
+        if tuple(tokens[start:end]) != tuple(name_tokens[:matched]):
+            return end
+        while (
+            end < len(tokens)
+            and matched < len(name_tokens)
+            and difflib.SequenceMatcher(None, tokens[end], name_tokens[matched]).ratio()
+            >= self.fuzzy_cutoff - 0.1
+        ):
+            end += 1
+            matched += 1
+        return end
+
+    def _get_fuzzy_spans(self, tokens: List[str]) -> List[Tuple[int, int, List[str]]]:
+        if not self._fuzzy_keys:
+            return []
+
+        # A ratio of at least `fuzzy_cutoff` bounds the length of the matching aliases
+        max_gram_chars = self._max_fuzzy_key_chars * (2 - self.fuzzy_cutoff) / self.fuzzy_cutoff
+
+        spans = []
+        for size in range(self._max_alias_tokens, 0, -1):
+            for start in range(len(tokens) - size + 1):
+                gram_tokens = _strip_suffixes(tokens[start : start + size])
+                if len(gram_tokens) != size and size > 1:
+                    continue
+                # Names neither start nor end with a function word or a number
+                if any(t in QUERY_STOPWORDS or t.isdigit() for t in (gram_tokens[0], gram_tokens[-1])):
+                    continue
+                gram = " ".join(gram_tokens)
+                if (
+                    len(gram) < self.min_alias_chars
+                    or len(gram) > max_gram_chars
+                    or (size == 1 and gram in GENERIC_TOKENS)
+                ):
+                    continue
+
+                candidate_keys = self._get_fuzzy_candidates(gram)
+                if not candidate_keys:
+                    continue
+                scored = sorted(
+                    (
+                        (difflib.SequenceMatcher(None, gram, key).ratio(), key)
+                        for key in difflib.get_close_matches(
+                            gram, candidate_keys, n=3, cutoff=self.fuzzy_cutoff
+                        )
+                    ),
+                    reverse=True,
+                )
+                if not scored:
+                    continue
+
+                best_score = scored[0][0]
+                owners: Set[str] = set()
+                # Near-equal matches of different companies make the mention ambiguous
+                for score, key in scored:
+                    if best_score - score <= 0.05:
+                        owners |= self._aliases[self._fuzzy_keys[key]]
+                spans.append((start, start + size, sorted(owners)))
+        return _select_longest_spans(spans)
+
+    def _get_fuzzy_candidates(self, gram: str) -> List[str]:
+        """
+        Returns the fuzzy keys sharing enough character trigrams with an n-gram to reach `fuzzy_cutoff`,
+        most shared first.
+
+        A ratio of at least `fuzzy_cutoff` bounds the length of a key and the characters left unmatched.
+        Each unmatched character of the n-gram breaks at most three of its trigrams, and each unmatched
+        character of the key at most two, which bounds the trigrams a close match may lose.
+        """
+        cutoff = self.fuzzy_cutoff
+        trigrams = _get_trigrams(gram)
+        min_shared: Dict[int, int] = {}
+        for length in range(
+            math.ceil(len(gram) * cutoff / (2 - cutoff)), math.floor(len(gram) * (2 - cutoff) / cutoff) + 1
+        ):
+            matched = math.ceil(cutoff * (len(gram) + length) / 2)
+            if matched <= min(len(gram), length):
+                min_shared[length] = max(
+                    1, len(trigrams) - 3 * (len(gram) - matched) - 2 * (length - matched)
+                )
+
+        shared = Counter(chain.from_iterable(
+            self._trigram_index.get((gram[0], trigram), ()) for trigram in trigrams
+        ))
+        scored = [
+            (count, key_id)
+            for key_id, count in shared.items()
+            if count >= min_shared.get(len(self._fuzzy_key_list[key_id]), len(trigrams) + 1)
+        ]
+        scored.sort(reverse=True)
+        return [self._fuzzy_key_list[key_id] for _, key_id in scored[: self.max_fuzzy_candidates]]
+
+    def _get_normalized_query(
+        self,
+        query: str,
+        matches: List[Tuple[int, int, str]],
+        spans: List[Tuple[int, int, List[str]]],
+    ) -> str:
+        parts = []
+        position = 0
+        for start, end, _ in spans:
+            # Also replace the corporate suffixes written after the mention, e.g. "Acme Holdings Berhad"
+            while end < len(matches) and matches[end][2].lower() in CORPORATE_SUFFIXES:
+                end += 1
+
+            char_start, char_end = matches[start][0], matches[end - 1][1]
+            # "the company" already carries the article, e.g. "the Acme Group"
+            prefix = re.sub(r"\bthe\s+$", "", query[position:char_start], flags=re.IGNORECASE)
+            preceding = ("".join(parts) + prefix).rstrip()
+            at_sentence_start = not preceding or preceding[-1] in ".?!"
+
+            parts.append(prefix)
+            parts.append("The company" if at_sentence_start else "the company")
+            position = char_end
+
+            possessive = _POSSESSIVE_PATTERN.match(query[position:])
+            if possessive:
+                parts.append("'s")
+                position += possessive.end()
+        parts.append(query[position:])
+        return "".join(parts)
+
+
+def _select_longest_spans(
+    spans: List[Tuple[int, int, List[str]]]
+) -> List[Tuple[int, int, List[str]]]:
+    """
+    Keeps the longest of overlapping spans, preferring the leftmost on ties.
+    """
+    selected: List[Tuple[int, int, List[str]]] = []
+    for span in sorted(spans, key=lambda s: (-(s[1] - s[0]), s[0])):
+        if all(span[1] <= other[0] or span[0] >= other[1] for other in selected):
+            selected.append(span)
+    return sorted(selected, key=lambda s: s[0])
+
@@ -0,0 +1,169 @@
+import hashlib
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from .report_retrieval_util import count_tokens, get_encoder
+
+retrieval_logger = logging.getLogger("retrieval")
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def get_simhash(text: str, shingle_size: int = 3, bits: int = 64) -> int:
+    """
+    Computes the SimHash of the word shingles of a text; near-duplicate texts differ in few bits.
+    """
+    words = _WORD_PATTERN.findall((text or "").lower())
+    shingles = [
+        " ".join(words[i : i + shingle_size])
+        for i in range(max(1, len(words) - shingle_size + 1))
+    ]
+    weights = [0] * bits
+    for shingle in shingles:
+        digest = int.from_bytes(
+            hashlib.blake2b(shingle.encode("utf-8"), digest_size=bits // 8).digest(), "big"
+        )
+        for bit in range(bits):
+            weights[bit] += 1 if digest >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def _get_hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _get_chunk_number(hit: Dict[str, Any]) -> Optional[int]:
+    meta = hit.get("metadata") or {}
+    for value in (hit.get("chunk_no"), meta.get("chunk_no"), meta.get("chunk")):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _get_section_key(hit: Dict[str, Any]) -> tuple:
+    return (hit.get("company"), hit.get("type"), hit.get("year"), hit.get("section"))
+
+
+def _join_overlapping(left: str, right: str, max_overlap: int = 600) -> str:
+    """
+    Joins consecutive chunks, dropping the text the chunker repeated at the start of `right`.
+    """
+    left, right = left.rstrip(), right.lstrip()
+    for size in range(min(len(left), len(right), max_overlap), 20, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return f"{left}\n\n{right}"
+
+
+class ContextPacker:
+    """
+    Packs retrieved hits into the answer context of one sub-query:
+        1) drops near-duplicate hits (SimHash of word shingles within `max_hamming_distance` bits),
+           keeping the better-ranked one;
+        2) merges consecutive chunks of the same section into a single span without the chunk overlap;
+        3) keeps spans in rank order until `token_budget` is reached, truncating the last span that fits partly.
+
+    Each packed span is hit-shaped ({"id", "text", "score", "company", "section", "year", ...}), with the ids
+    of its chunks joined in "id".
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 2500,
+        max_hamming_distance: int = 3,
+        min_partial_tokens: int = 100,
+        encoder_model: str = "gpt-4o",
+    ):
+        self.token_budget = token_budget
+        self.max_hamming_distance = max_hamming_distance
+        self.min_partial_tokens = min_partial_tokens
+        self.encoder = get_encoder(encoder_model)
+
+    def pack(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        unique = self._remove_near_duplicates(hits)
+        spans = self._merge_adjacent(unique)
+        packed = self._fit_budget(spans)
+        retrieval_logger.info(
+            "Context packed: %d hits → %d unique → %d spans → %d within %d tokens",
+            len(hits), len(unique), len(spans), len(packed), self.token_budget,
+        )
+        return packed
+
+    def _remove_near_duplicates(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        kept: List[Dict[str, Any]] = []
+        fingerprints: List[int] = []
+        for hit in hits:
+            fingerprint = get_simhash(hit.get("text") or "")
+            if any(
+                _get_hamming_distance(fingerprint, other) <= self.max_hamming_distance
+                for other in fingerprints
+            ):
+                continue
+            kept.append(hit)
+            fingerprints.append(fingerprint)
+        return kept
+
+    def _merge_adjacent(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Group the hits of each section by chunk number, remembering the best rank in the group
+        ranked = list(enumerate(hits))
+        by_section: Dict[tuple, List[tuple]] = {}
+        for rank, hit in ranked:
+            if _get_chunk_number(hit) is not None:
+                by_section.setdefault(_get_section_key(hit), []).append((rank, hit))
+
+        merged_into: Dict[int, int] = {}
+        spans: Dict[int, Dict[str, Any]] = {}
+        for members in by_section.values():
+            members.sort(key=lambda m: _get_chunk_number(m[1]))
+            run: List[tuple] = [members[0]]
+            for member in members[1:] + [None]:
+                if member is not None and _get_chunk_number(member[1]) == _get_chunk_number(run[-1][1]) + 1:
+                    run.append(member)
+                    continue
+                if len(run) > 1:
+                    best_rank = min(r for r, _ in run)
+                    spans[best_rank] = self._get_merged_span([h for _, h in run])
+                    for r, _ in run:
+                        merged_into[r] = best_rank
+                run = [member] if member is not None else []
+
+        packed = []
+        for rank, hit in ranked:
+            if rank not in merged_into:
+                packed.append(hit)
+            elif merged_into[rank] == rank:
+                packed.append(spans[rank])
+        return packed
+
+    def _get_merged_span(self, run: List[Dict[str, Any]]) -> Dict[str, Any]:
+        text = run[0].get("text") or ""
+        for hit in run[1:]:
+            text = _join_overlapping(text, hit.get("text") or "")
+        scores = [h.get("score") for h in run if h.get("score") is not None]
+        return {
+            **run[0],
+            "id": ", ".join(str(h.get("id")) for h in run),
+            "text": text,
+            "score": max(scores) if scores else None,
+            "chunk_no": f"{_get_chunk_number(run[0])}-{_get_chunk_number(run[-1])}",
+        }
+
+    def _fit_budget(self, spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        packed = []
+        remaining = self.token_budget
+        for span in spans:
+            tokens = count_tokens(self.encoder, span.get("text") or "")
+            if tokens <= remaining:
+                packed.append(span)
+                remaining -= tokens
+                continue
+            # Truncate the span to the remaining budget if a meaningful part still fits
+            if remaining >= self.min_partial_tokens:
+                text = span.get("text") or ""
+                cut = int(len(text) * remaining / tokens)
+                packed.append({**span, "text": text[:cut].rstrip() + " …"})
+            break
+        return packed
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+retrieval_logger = logging.getLogger("retrieval")
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embedding requests into batched embedding calls.
+
+    Requests arriving within `max_wait` seconds of each other (or until `max_batch_size` texts are pending)
+    are sent as one list to `embed_fn`, and identical texts are embedded once. This cuts the number of
+    embedding round trips when many queries run concurrently, e.g. in `GraphRetrievalSystem.rag_query_batch`.
+
+    Example:
+        batcher = EmbeddingBatcher(pine._embed_text)
+        embedding = await batcher.embed("What is the revenue of the company?")
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], Awaitable[List[List[float]]]],
+        max_batch_size: int = 64,
+        max_wait: float = 0.01,
+    ):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_timer: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {"requests": 0, "calls": 0}
+
+    async def embed(self, text: str) -> List[float]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((text, future))
+        self.stats["requests"] += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_timer is None:
+            self._flush_timer = self._spawn(self._flush_later())
+        return await future
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        # Tasks are referenced until done so that they are not garbage collected mid-flight
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_wait)
+        self._flush_timer = None
+        self._flush()
+
+    def _flush(self) -> None:
+        batch, self._pending = self._pending, []
+        if batch:
+            self._spawn(self._embed_batch(batch))
+
+    async def _embed_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        self.stats["calls"] += 1
+        try:
+            embeddings = await self.embed_fn(texts)
+            if not isinstance(embeddings, (list, tuple)) or len(embeddings) != len(texts):
+                raise ValueError(f"embed_fn returned {embeddings!r:.100} for {len(texts)} texts")
+            embeddings_by_text = dict(zip(texts, embeddings))
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(embeddings_by_text[text])
+        except BaseException as e:
+            # Every waiter must be resolved, otherwise its embed() call hangs forever
+            retrieval_logger.warning("Batched embedding of %d texts failed: %s", len(texts), e)
+            error = e if isinstance(e, Exception) else RuntimeError(f"Batched embedding was interrupted: {e!r}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            if not isinstance(e, Exception):
+                raise
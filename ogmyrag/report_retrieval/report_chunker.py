@@ -1,17 +1,75 @@
 import asyncio
 import json
+from collections import Counter
 from lxml import html as lxml_html
 from markdown import markdown
-from typing import Any, List, Dict, Optional
+from typing import Any, Awaitable, Callable, List, Dict, Optional, Tuple
 import hashlib
 import logging
 from ..storage.pinecone_storage import PineconeStorage
+from .company_catalog import CompanyCatalog, get_company_catalog
+from .bm25_index import BM25Index, get_bm25_index, reciprocal_rank_fusion
+from .reranker import BaseReranker, LexicalMMRReranker
+from .context_packer import ContextPacker
+from .report_retrieval_util import needs_decomposition
+from .answer_cache import get_data_versions
+from .chunk_metadata import build_chunk_filter, build_chunk_metadata
+from .company_detector import normalize_company_name
 from ogmyrag.base import PineconeStorageConfig
 
 query_logger = logging.getLogger("query")
 retrieval_logger = logging.getLogger("retrieval")
 graph_retrieval_logger = logging.getLogger("graph_retrieval")
 
+# How often rag_answer_with_company_detection takes each path, e.g. {"decomposition_skipped": 12, ...}
+_rag_path_counters: Counter = Counter()
+
+
+def get_rag_path_counters() -> Dict[str, int]:
+    """
+    Returns how often the RAG fast paths were taken since the process started:
+    decomposition_{skipped,llm}, synthesis_{skipped,llm} and company_detection_{exact,fuzzy,llm,none}.
+    """
+    return dict(_rag_path_counters)
+
+
+async def _create_chat_completion(
+    pine: PineconeStorage,
+    model: str,
+    messages: List[Dict[str, str]],
+    on_delta: Optional[Callable[[str], None]] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Returns the completion text and its token usage, streaming the text to `on_delta` if given.
+    """
+    usage = {"prompt_tokens": None, "completion_tokens": None, "total_tokens": None}
+
+    def _set_usage(u) -> None:
+        if u:
+            usage["prompt_tokens"] = getattr(u, "prompt_tokens", None)
+            usage["completion_tokens"] = getattr(u, "completion_tokens", None)
+            usage["total_tokens"] = getattr(u, "total_tokens", None)
+
+    if on_delta is None:
+        res = await pine.openai.chat.completions.create(model=model, messages=messages)
+        _set_usage(getattr(res, "usage", None))
+        return (res.choices[0].message.content or "").strip(), usage
+
+    stream = await pine.openai.chat.completions.create(
+        model=model,
+        messages=messages,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    parts: List[str] = []
+    async for chunk in stream:
+        _set_usage(getattr(chunk, "usage", None))
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            parts.append(delta)
+            on_delta(delta)
+    return "".join(parts).strip(), usage
+
 # ---------- tiny, fast DOM chunker ----------
 def _text_of(node) -> str:
     return " ".join(t.strip() for t in node.itertext() if t and t.strip())
@@ -118,7 +176,7 @@ def build_pinecone_items_from_chunks(
 ) -> List[Dict[str, Any]]:
     """
     Shapes chunks into items for PineconeStorage.create_vectors_without_namespace().
-    Each item: {'id', 'name', 'metadata'}  (NO 'namespace')
+    Each item: {'id', 'name', 'metadata'}  (NO 'namespace'); metadata follows ChunkMetadata.
     """
 
     items: List[Dict[str, Any]] = []
@@ -127,14 +185,15 @@ def build_pinecone_items_from_chunks(
         items.append({
             "id": vid,                 # Pinecone vector id
             "name": c["content"],      # text to embed
-            "metadata": {              # <-- exactly what you asked for   
-                "type": doc_type,
-                "from_company": company,
-                "year": year_tag,
-                "section": section,
-                "chunk": k,
-                "text": c["content"]
-            }
+            "metadata": build_chunk_metadata(
+                company=company,
+                report_type=report_type,
+                year_tag=year_tag,
+                doc_type=doc_type,
+                section=section,
+                chunk_no=k,
+                text=c["content"],
+            ),
         })
     return items
 
@@ -154,23 +213,23 @@ async def index_markdown_with_pinecone(
     min_chars: int = 400,
     overlap: int = 150,
     embed_batch: int = 16,          # controls concurrency inside create_vectors()
-    ensure_catalog: bool = True
+    ensure_catalog: bool = True,
+    update_bm25: bool = True,       # keep the local BM25 index of the default namespace in sync
+    bm25_index: Optional[BM25Index] = None,  # defaults to get_bm25_index(index_name)
 ) -> int:
     """
     Convert MD -> HTML once, chunk via DOM, then embed+upsert via PineconeStorage.
     Runs embeddings in parallel inside each batch (your class uses tqdm_asyncio.gather).
     Return: number of chunks indexed.
     """
-    # Hard-delete previous vectors for this section in the default namespace ("")
+    # Hard-delete previous vectors for this section in the default namespace (""), in either metadata layout
+    section_filter = build_chunk_filter(
+        company=company, doc_type=doc_type, year=year_tag, section=section
+    )
     try:
         await asyncio.to_thread(
-            pine.pinecone.Index(pinecone_config["index_name"]).delete,
-            filter={
-                "from_company": company,
-                "type": doc_type,
-                "year": year_tag,
-                "section": section,
-            },
+            pine._get_index(pinecone_config["index_name"]).delete,
+            filter=section_filter,
             namespace="",                  # default namespace
         )
     except Exception as e:
@@ -201,23 +260,38 @@ async def index_markdown_with_pinecone(
         await pine.get_index(pinecone_config["index_name"]).upsert_vectors(batch)  # <- uses your class; embeds concurrently + upserts
         total += len(batch)
 
+    # Cached answers about this company are stale from now on; the version reaches other processes
+    # through the company's catalog vector
+    data_versions = get_data_versions(pine, pinecone_config["index_name"])
+    data_version = data_versions.bump(company)
+
+    # Replace the section in the lexical index only once its vectors are in Pinecone
+    if update_bm25:
+        await (bm25_index or get_bm25_index(pinecone_config["index_name"])).replace_section(
+            items, section_filter
+        )
 
     # Only after successful chunk upserts, ensure company exists in catalog namespace
     if ensure_catalog and company:
         try:
             comp_vec = await pine._embed_text(company)  # match your index dims
             await asyncio.to_thread(
-                pine.pinecone.Index(pinecone_config["index_name"]).upsert,
+                pine._get_index(pinecone_config["index_name"]).upsert,
                 vectors=[{
                     "id": f"company::{company}",
                     "values": comp_vec,
-                    "metadata": {"from_company": company},
+                    "metadata": {"from_company": company, "data_version": data_version},
                 }],
                 namespace="company-catalog",
             )
-        except Exception:
-            # Non-fatal; catalog sync failure shouldn't break the main indexing flow
-            pass
+            await get_company_catalog(pine, pinecone_config["index_name"]).add_company(company)
+        except Exception as e:
+            # Non-fatal; catalog sync failure shouldn't break the main indexing flow, but the new data
+            # version must still reach other processes through the existing catalog vector
+            retrieval_logger.warning("Catalog upsert failed for %s: %s; publishing its data version only", company, e)
+            await data_versions.publish(company, data_version)
+    elif company:
+        await data_versions.publish(company, data_version)
         
     return total
 
@@ -235,7 +309,7 @@ async def rag_answer_with_company_detection(
     # optional extra narrowing (must match your stored metadata)
     doc_type: Optional[str] = None,
     report_type_name: Optional[str] = None,
-    year: Optional[str] = None,
+    year: Optional[int | str] = None,         # 2024, "2024" or the "_2024" year tag
     # tuning
     max_company_candidates: int = 500,        # cap company list to keep prompt small
     max_context_chars: int = 6000,            # cap context passed to the answer model
@@ -245,16 +319,44 @@ async def rag_answer_with_company_detection(
     return_hits: bool = False,
     hits_per_subquery: int = 5,
     hits_preview_chars: int = 240,
+    # streaming: receives the synthesized answer as it is generated
+    on_delta: Optional[Callable[[str], None]] = None,
+    # defaults to the process-wide catalog of the index and catalog namespace
+    company_catalog: Optional[CompanyCatalog] = None,
+    # hybrid retrieval: fuse dense matches with the local BM25 index by reciprocal rank
+    hybrid: bool = True,
+    bm25_index: Optional[BM25Index] = None,
+    rrf_k: int = 60,
+    # reranking: over-fetch `rerank_candidates` hits and keep the min(top_k, rerank_top_n) most relevant, diverse ones
+    rerank: bool = True,
+    reranker: Optional[BaseReranker] = None,
+    rerank_candidates: int = 30,
+    rerank_top_n: int = 5,
+    # context packing: drop near-duplicate hits, merge consecutive chunks and fit a per-sub-query token budget
+    pack_context: bool = True,
+    context_token_budget: int = 2500,
+    # None: decompose only when needs_decomposition() says the query is compound; True/False: always/never
+    decompose: Optional[bool] = None,
+    # query embedding, e.g. EmbeddingBatcher.embed to batch the embeddings of concurrent queries
+    embed_fn: Optional[Callable[[str], Awaitable[List[float]]]] = None,
 ) -> Dict[str, Any]:
     """
         End-to-end multi-step RAG (minimal-changes version):
         0) Receives a single query string (from user_query | query).
-        1) Read company names from Pinecone catalog namespace (1 vector per company).
+        1) Read company names from the cached catalog of the Pinecone catalog namespace (1 vector per company).
         2) Use a small LLM to (a) decompose the user query into sub-queries (if needed),
-            and (b) for each sub-query, detect/normalize a company mention.
-        3) For each sub-query, retrieve top-k chunks from data namespace with exact metadata filter (if detected).
+            and (b) for each sub-query, detect/normalize a company mention locally with the catalog's
+            CompanyDetector, escalating to the small LLM only when the mention is ambiguous.
+        3) For each sub-query, retrieve top-k chunks from data namespace with exact metadata filter (if detected),
+            fusing the dense matches with BM25 matches by reciprocal rank when `hybrid` is set.
+            With `rerank`, more candidates are fetched and reranked (LexicalMMRReranker by default) down to
+            min(top_k, rerank_top_n) hits before answer generation, whether or not the reranker succeeds.
+            With reranking, `top_k` only widens the fetch beyond `rerank_candidates`; the answer sees at most
+            `rerank_top_n` hits. The context is packed into `context_token_budget` tokens.
         4) For each sub-query, call a bigger LLM to produce a grounded answer using only retrieved chunks.
-        5) Synthesize a single final answer from all per-sub-query answers.
+        5) Synthesize a single final answer from all per-sub-query answers. Simple queries skip the
+            decomposition call (see `needs_decomposition`), and a single sub-answer is returned (and
+            streamed) as is, without a synthesis call.
         6) Return {"RAG_RESPONSE": <final answer string>}.
 
         Returns:
@@ -286,81 +388,12 @@ async def rag_answer_with_company_detection(
     graph_retrieval_logger.info("RAG start | query=%r | top_k=%d", user_query, top_k)
 
 
-    # ---------------- (1) List companies from the catalog namespace ----------------
-    companies: List[str] = []
-    try:
-        # pages: generator of lists of IDs
-        try:
-            pages = await asyncio.to_thread(
-                lambda: list(pine.pinecone.Index(pinecone_config["index_name"]).list(namespace=catalog_namespace, prefix="company::", limit=99))
-            )
-        except Exception as e:
-            query_logger.warning("list(namespace=%r) failed: %s; falling back to list() without namespace",
-                                    catalog_namespace, e)
-            graph_retrieval_logger.warning("list(namespace=%r) failed: %s; falling back to list() without namespace",
-                                    catalog_namespace, e)
-            pages = await asyncio.to_thread(
-                lambda: list(pine.pinecone.Index(pinecone_config["index_name"]).list(prefix="company::", limit=1000))
-            )
-
-        # flatten list-of-lists → ids
-        ids = [vid for page in pages for vid in (page or []) if vid]
-
-        seen = set()
-        for i in range(0, len(ids), 100):
-            batch_ids = ids[i:i+100]
-            try:
-                fetched = await asyncio.to_thread(
-                    pine.pinecone.Index(pinecone_config["index_name"]).fetch, ids=batch_ids, namespace=catalog_namespace
-                )
-            except Exception as e:
-                query_logger.warning(
-                    "fetch(namespace=%r) failed: %s; retrying without namespace",
-                    catalog_namespace, e
-                )
-                graph_retrieval_logger.warning(
-                    "fetch(namespace=%r) failed: %s; retrying without namespace",
-                    catalog_namespace, e
-                )
-                fetched = await asyncio.to_thread(pine.pinecone.Index(pinecone_config["index_name"]).fetch, ids=batch_ids)
-
-            vecs = (
-                fetched.get("vectors") if isinstance(fetched, dict)
-                else getattr(fetched, "vectors", None)
-            ) or {}
-
-            # normalize to an iterator of (id, record)
-            if isinstance(vecs, dict):
-                it = vecs.items()                      # {id: {..}} or {id: Vector}
-            elif isinstance(vecs, (list, tuple)):
-                it = [(getattr(v, "id", None), v) for v in vecs]   # [Vector, ...]
-            else:
-                it = []
-
-            for vid, rec in it:
-                # metadata for dict or Vector object
-                meta = (
-                    rec.get("metadata") if isinstance(rec, dict)
-                    else getattr(rec, "metadata", None)
-                ) or {}
-
-                name = (meta.get("from_company") or "").strip()
-
-                # fallback: parse from the id like "company::ACME_INC"
-                if not name:
-                    rid = vid if isinstance(vid, str) else getattr(rec, "id", None)
-                    if isinstance(rid, str) and "::" in rid:
-                        name = rid.split("::", 1)[1].strip()
-
-                if name:
-                    seen.add(name)
-
-        companies = sorted(seen)
-
-    except Exception as e:
-        query_logger.exception("Catalog company extraction failed")  # <- real stacktrace
-        graph_retrieval_logger.exception("Catalog company extraction failed")
-        companies = []
+    # ---------------- (1) List companies from the cached catalog ----------------
+    catalog = company_catalog or get_company_catalog(
+        pine, pinecone_config["index_name"], catalog_namespace
+    )
+    companies: List[str] = await catalog.get_companies()
+    detector = await catalog.get_detector()
 
     query_logger.info("Catalog companies (%d): %s", len(companies), companies)
     graph_retrieval_logger.info("Catalog companies (%d): %s", len(companies), companies)
@@ -369,48 +402,81 @@ async def rag_answer_with_company_detection(
     # NEW: ask a small model to break the single query into atomic sub-queries
     
     subqueries: List[str] = [user_query]  # default to single if decomposition fails
-    try:
-        decompose_system = (
-            """You will be given a single user query. Decide if it should be decomposed into multiple
-            atomic, answerable sub-queries. Output STRICT JSON with a single key:
-            {"subqueries": ["...", "...", "..."]}
-
-            Rules:
-            - If the query clearly asks multiple distinct things, split them.
-            - Keep each sub-query self-contained and grammatical.
-            - Preserve constraints (years, names, sections) inside each sub-query.
-            - If no decomposition is needed, return the original query as a one-element list.
-            - Do not add facts. Do not mention companies unless the user does.
-            """
-        )
-        dec = await pine.openai.chat.completions.create(
-            model=small_model,
-            messages=[
-                {"role": "system", "content": decompose_system},
-                {"role": "user", "content": user_query},
-            ],
-            response_format={"type": "json_object"},
-        )
-        raw = dec.choices[0].message.content or "{}"
-        obj = json.loads(raw)
-        sq = [s.strip() for s in (obj.get("subqueries") or []) if isinstance(s, str) and s.strip()]
-        if sq:
-            subqueries = sq
-    except Exception as e:
-        query_logger.warning("Query decomposition failed: %s; proceeding with single query.", e)
-        graph_retrieval_logger.warning("Query decomposition failed: %s; proceeding with single query.", e)
+    if decompose is None:
+        decompose = needs_decomposition(user_query, len(detector.detect(user_query).companies))
+    _rag_path_counters["decomposition_llm" if decompose else "decomposition_skipped"] += 1
+
+    if not decompose:
+        query_logger.info("Decomposition skipped for simple query.")
+        graph_retrieval_logger.info("Decomposition skipped for simple query.")
+    else:
+        try:
+            decompose_system = (
+                """You will be given a single user query. Decide if it should be decomposed into multiple
+                atomic, answerable sub-queries. Output STRICT JSON with a single key:
+                {"subqueries": ["...", "...", "..."]}
+
+                Rules:
+                - If the query clearly asks multiple distinct things, split them.
+                - Keep each sub-query self-contained and grammatical.
+                - Preserve constraints (years, names, sections) inside each sub-query.
+                - If no decomposition is needed, return the original query as a one-element list.
+                - Do not add facts. Do not mention companies unless the user does.
+                """
+            )
+            dec = await pine.openai.chat.completions.create(
+                model=small_model,
+                messages=[
+                    {"role": "system", "content": decompose_system},
+                    {"role": "user", "content": user_query},
+                ],
+                response_format={"type": "json_object"},
+            )
+            raw = dec.choices[0].message.content or "{}"
+            obj = json.loads(raw)
+            sq = [s.strip() for s in (obj.get("subqueries") or []) if isinstance(s, str) and s.strip()]
+            if sq:
+                subqueries = sq
+        except Exception as e:
+            query_logger.warning("Query decomposition failed: %s; proceeding with single query.", e)
+            graph_retrieval_logger.warning("Query decomposition failed: %s; proceeding with single query.", e)
 
     query_logger.info("Sub-queries (%d): %s", len(subqueries), subqueries)
     graph_retrieval_logger.info("Sub-queries (%d): %s", len(subqueries), subqueries)
     
+    # Shared by all sub-queries; the Pinecone index client is cached by PineconeStorage
+    index_operator = pine.get_index(pinecone_config["index_name"])
+    lexical_index = (bm25_index or get_bm25_index(pinecone_config["index_name"], data_namespace)) if hybrid else None
+    active_reranker = (reranker or LexicalMMRReranker()) if rerank else None
+    fetch_k = max(top_k, rerank_candidates) if active_reranker else top_k
+    # Reranked or not (e.g. when the reranker fails), the answer sees the same number of hits
+    keep_k = min(top_k, rerank_top_n) if active_reranker else top_k
+    packer = ContextPacker(token_budget=context_token_budget) if pack_context else None
+    if lexical_index is not None and not len(lexical_index):
+        empty_index_note = (
+            f"BM25 index of {pinecone_config['index_name']} is empty; hybrid retrieval uses dense matches only. "
+            "Populate it with BM25Index.rebuild_from_pinecone()."
+        )
+        query_logger.warning(empty_index_note)
+        graph_retrieval_logger.warning(empty_index_note)
+
     # ---------------- helper: per-subquery RAG ----------------
     async def _run_rag_for_one_subquery(one_query: str) -> Dict[str, Any]:
         company_used: Optional[str] = None
         detect_usage = {"prompt_tokens": None, "completion_tokens": None, "total_tokens": None}
         search_query = one_query
-
-        # ---- (2b) Detect/normalize company with a small LLM (per sub-query) ----
-        if companies:
+        detection_method = "none"
+
+        # ---- (2b) Detect/normalize company locally, with a small LLM for ambiguous mentions ----
+        detection = detector.detect(one_query)
+        if detection.companies and not detection.ambiguous:
+            company_used = detection.companies[0]
+            search_query = detection.normalized_query or one_query
+            detection_method = detection.method
+        elif detection.ambiguous:
+            # Only the companies the mention may refer to are sent to the LLM
+            detection_method = "llm"
+            candidate_companies = detection.companies + detection.candidates
             detect_system = (
                 """You will be given a user query and a list of CANONICAL company names.
                 Return strict JSON with two keys:
@@ -434,7 +500,7 @@ async def rag_answer_with_company_detection(
             )
             detect_msgs = [
                 {"role": "system", "content": detect_system},
-                {"role": "user", "content": f"COMPANIES: {companies}\n\nQUERY: {one_query}"},
+                {"role": "user", "content": f"COMPANIES: {candidate_companies}\n\nQUERY: {one_query}"},
             ]
             try:
                 det = await pine.openai.chat.completions.create(
@@ -451,9 +517,18 @@ async def rag_answer_with_company_detection(
                 raw = det.choices[0].message.content or "{}"
                 obj = json.loads(raw)
 
-                found = (obj.get("companies") or [])
-                if found:
-                    company_used = str(found[0]).strip()
+                # Map the LLM's answer back to a canonical candidate; names it made up are dropped
+                candidates_by_key = {normalize_company_name(c): c for c in candidate_companies}
+                for name in obj.get("companies") or []:
+                    company_used = candidates_by_key.get(normalize_company_name(str(name)))
+                    if company_used:
+                        break
+                else:
+                    if obj.get("companies"):
+                        query_logger.warning(
+                            "Ignoring companies not among the candidates for sub-query %r: %s",
+                            one_query, obj.get("companies"),
+                        )
 
                 llm_norm = (obj.get("normalized_query") or "").strip()
                 search_query = llm_norm or one_query
@@ -463,8 +538,13 @@ async def rag_answer_with_company_detection(
                 company_used = None
                 search_query = one_query
 
-        query_logger.info("Detected company for sub-query %r: %r", one_query, company_used)
-        graph_retrieval_logger.info("Detected company for sub-query %r: %r", one_query, company_used)
+        _rag_path_counters[f"company_detection_{detection_method}"] += 1
+        query_logger.info(
+            "Detected company for sub-query %r: %r (%s)", one_query, company_used, detection_method
+        )
+        graph_retrieval_logger.info(
+            "Detected company for sub-query %r: %r (%s)", one_query, company_used, detection_method
+        )
 
         if search_query != one_query:
             query_logger.info("Search query normalized: %r → %r", one_query, search_query)
@@ -474,27 +554,26 @@ async def rag_answer_with_company_detection(
             graph_retrieval_logger.info("Search query unchanged for this sub-query.")
 
         # ---- (3) Retrieve top-k chunks from data namespace ----
-        flt: Dict[str, Any] = {}
-        if company_used:
-            flt["from_company"] = company_used
-        if doc_type:
-            flt["type"] = doc_type
-        if report_type_name:
-            flt["report_type_name"] = report_type_name
-        if year:
-            flt["year"] = year
+        # Years match both the numeric and the legacy "_2024" layout of the chunk metadata
+        flt = build_chunk_filter(
+            company=company_used,
+            doc_type=doc_type,
+            report_type_name=report_type_name,
+            year=year or None,
+            match_company_key=True,
+        )
 
         query_logger.info("Query filter (sub-query): %s", flt or "{}")
         graph_retrieval_logger.info("Query filter (sub-query): %s", flt or "{}")
 
         try:
-            q_emb = await pine._embed_text(search_query)
-            result = pine.pinecone.Index(pinecone_config["index_name"]).query(
-                vector=q_emb,
-                top_k=top_k,
+            q_emb = await (embed_fn or pine._embed_text)(search_query)
+            result = await index_operator.query_by_vector(
+                q_emb,
+                top_k=fetch_k,
                 include_metadata=True,
+                query_filter=flt or None,
                 namespace=data_namespace,
-                filter=flt or None,
             )
             matches = (result.get("matches") if isinstance(result, dict)
                        else getattr(result, "matches", [])) or []
@@ -503,25 +582,64 @@ async def rag_answer_with_company_detection(
             graph_retrieval_logger.warning("Vector query failed: %s", e)
             matches = []
 
+        if lexical_index is not None:
+            dense = [
+                {"id": m.get("id"), "score": m.get("score"), "metadata": m.get("metadata") or {}}
+                for m in matches
+            ]
+            # BM25 scores are not comparable to similarities, so lexical-only hits carry no "score"
+            lexical = [
+                {"id": m["id"], "score": None, "bm25_score": m["score"], "metadata": m["metadata"]}
+                for m in lexical_index.search(search_query, top_k=fetch_k, query_filter=flt or None)
+            ]
+            matches = reciprocal_rank_fusion([dense, lexical], k=rrf_k)
+            query_logger.info(
+                "Hybrid retrieval: %d dense + %d lexical → %d fused", len(dense), len(lexical), len(matches)
+            )
+            graph_retrieval_logger.info(
+                "Hybrid retrieval: %d dense + %d lexical → %d fused", len(dense), len(lexical), len(matches)
+            )
+
         hits: List[Dict[str, Any]] = []
         for m in matches:
             meta = m.get("metadata") or {}
             hit = {
                 "id": m.get("id"),
                 "score": m.get("score"),
+                "rrf_score": m.get("rrf_score"),
                 "text": meta.get("text") or meta.get("chunk_text") or "",
                 "section": meta.get("section"),
                 "company": meta.get("from_company"),
                 "type": meta.get("type"),
-                "chunk_no": meta.get("chunk_no"),
+                "chunk_no": meta.get("chunk_no", meta.get("chunk")),
                 "year": meta.get("year"),
                 "metadata": meta,
             }
-            if score_threshold is None or (hit["score"] is not None and hit["score"] >= score_threshold):
+            if (
+                score_threshold is None
+                or (hit["score"] is not None and hit["score"] >= score_threshold)
+                # lexical-only hits have no similarity to threshold on
+                or (hit["score"] is None and hit["rrf_score"] is not None)
+            ):
                 hits.append(hit)
-        hits.sort(key=lambda h: (h["score"] is not None, h["score"]), reverse=True)
-        hits = hits[:top_k]
+        if lexical_index is not None:
+            hits.sort(key=lambda h: h["rrf_score"] or 0.0, reverse=True)
+        else:
+            hits.sort(key=lambda h: (h["score"] is not None, h["score"]), reverse=True)
+        hits = hits[:fetch_k]
 
+        if active_reranker is not None and hits:
+            candidates = len(hits)
+            try:
+                hits = await active_reranker.rerank(search_query, hits, keep_k)
+            except Exception as e:
+                query_logger.warning("Reranking failed: %s; keeping retrieval order.", e)
+                graph_retrieval_logger.warning("Reranking failed: %s; keeping retrieval order.", e)
+                hits = hits[:keep_k]
+            query_logger.info("Reranked %d candidates → %d hits", candidates, len(hits))
+            graph_retrieval_logger.info("Reranked %d candidates → %d hits", candidates, len(hits))
+
+        context_hits = packer.pack(hits) if packer is not None else hits
 
         # build (bounded) context string WITH year/date
         context = "\n\n".join(
@@ -531,7 +649,7 @@ async def rag_answer_with_company_detection(
                 f"as_of_year={h.get('year')} · as_of_date={h.get('as_of_date') or ''}\n"
                 f"{(h.get('text') or '').strip()}"
             )
-            for i, h in enumerate(hits, start=1)
+            for i, h in enumerate(context_hits, start=1)
         )
 
         # ---- (4) Grounded answer using ONLY the retrieved chunks ----
@@ -609,23 +727,19 @@ async def rag_answer_with_company_detection(
             - If nothing can be answered for any company/person, output exactly: "Not found in provided documents."
             """
         )
-        user_msg = f"Question:\n{search_query}\n\nContext (top-{top_k}):\n{context}"
+        user_msg = f"Question:\n{search_query}\n\nContext (top-{len(context_hits)}):\n{context}"
 
         answer_usage = {"prompt_tokens": None, "completion_tokens": None, "total_tokens": None}
 
         try:
-            ans = await pine.openai.chat.completions.create(
-                model=answer_model,
-                messages=[{"role": "system", "content": sys_prompt},
-                          {"role": "user", "content": user_msg}],
+            answer, answer_usage = await _create_chat_completion(
+                pine,
+                answer_model,
+                [{"role": "system", "content": sys_prompt},
+                 {"role": "user", "content": user_msg}],
+                # A single sub-answer is the final answer, so it is streamed directly
+                on_delta=on_delta if len(subqueries) == 1 else None,
             )
-            u = getattr(ans, "usage", None)
-            if u:
-                answer_usage["prompt_tokens"] = getattr(u, "prompt_tokens", None)
-                answer_usage["completion_tokens"] = getattr(u, "completion_tokens", None)
-                answer_usage["total_tokens"] = getattr(u, "total_tokens", None)
-
-            answer = (ans.choices[0].message.content or "").strip()
         except Exception as e:
             query_logger.warning("Answer generation failed: %s", e)
             graph_retrieval_logger.warning("Answer generation failed: %s", e)
@@ -635,6 +749,7 @@ async def rag_answer_with_company_detection(
             "subquery": one_query,
             "normalized_search_query": search_query,
             "company_used": company_used,
+            "company_detection": detection_method,
             "hits": hits,
             "answer": answer,
             "usage": {"detect": detect_usage, "answer": answer_usage},
@@ -669,67 +784,75 @@ async def rag_answer_with_company_detection(
     per_sub_results: List[Dict[str, Any]] = [ordered[i] for i in range(len(subqueries)) if i in ordered]
 
     # ---------------- (5) Synthesize a single final answer ----------------
-    try:
-        synthesis_system = (
-            """ROLE: Strict Combiner (non-interactive). You will be given a list of sub-queries and their grounded sub-answers. Produce ONE final answer by merging their content for the original user query.
-
-            NON-INTERACTION HARD RULES:
-            - You are NOT a chat agent. Do not address the user or yourself.
-            - Do not ask questions, give advice, apologize, or suggest next steps.
-            - Do not add prefaces/epilogues (e.g., “Here is the answer,” “In summary”).
-            - Do not include placeholders, TODOs, system notes, emojis, or chit-chat.
-            - Do not output role labels or meta commentary.
-            - Do not add or modify links/citations.
-            - Use third-person, content-only prose; avoid first/second-person pronouns.
-
-            SYNTHESIS RULES:
-            - Use ONLY the text of the sub-answers. Do NOT invent, infer, calculate, explain, or add commentary.
-            - Remove redundancies and duplicates; keep the most specific wording when texts overlap.
-            - Preserve original facts, wording (where possible), numbers, and dates without changing meaning.
-            - Maintain existing structure from sub-answers (paragraphs/bullets/headings) where feasible; introduce minimal structure only to deduplicate and improve clarity.
-            - If sub-answers conflict, include both statements without resolving the conflict.
-            - Keep any “Not found in provided documents.” lines present in the sub-answers; deduplicate identical lines.
-
-            READABILITY & STRUCTURE:
-            - Organize content into clean blocks with a single blank line between blocks.
-            - Group related lines together (e.g., by entity, topic, or timeframe). If multiple entities appear, use the exact entity name as a simple header line followed by its content.
-            - Prefer concise bullet lists for enumerations; keep paragraph form for narrative blocks. Do not change the factual content.
-            - Normalize whitespace (no double spaces, no repeated blank lines). Keep original capitalization and punctuation of facts.
-            - Preserve original numbers, dates, and units exactly as written.
-            - Avoid dangling or orphaned labels; if a heading has no remaining content after merging, remove the heading.
-            - Place any “Not found in provided documents.” line at the end of the relevant block for that entity/topic (and deduplicate).
-
-            OUTPUT:
-            - Plain text only: the single combined final answer.
-            - No greetings, sign-offs, labels, or extra commentary.
-            - If nothing remains after merging and there are no “Not found in provided documents.” lines, output exactly: “Not found in provided documents.”"""
-        )
-        synthesis_input = {
-            "original_query": user_query,
-            "sub_answers": [
-                {
-                    "subquery": r.get("subquery"),
-                    "answer": r.get("answer"),
-                    "company_used": r.get("company_used"),
-                }
-                for r in per_sub_results
-            ],
-        }
-        syn = await pine.openai.chat.completions.create(
-            model=answer_model,
-            messages=[
+    if len(per_sub_results) == 1:
+        # The only sub-answer is the final answer; it was already streamed if the query was not decomposed
+        _rag_path_counters["synthesis_skipped"] += 1
+        final_answer = per_sub_results[0].get("answer") or "Failed to generate an answer."
+        if on_delta is not None and len(subqueries) != 1:
+            on_delta(final_answer)
+    else:
+        _rag_path_counters["synthesis_llm"] += 1
+        try:
+            synthesis_system = (
+                """ROLE: Strict Combiner (non-interactive). You will be given a list of sub-queries and their grounded sub-answers. Produce ONE final answer by merging their content for the original user query.
+
+                NON-INTERACTION HARD RULES:
+                - You are NOT a chat agent. Do not address the user or yourself.
+                - Do not ask questions, give advice, apologize, or suggest next steps.
+                - Do not add prefaces/epilogues (e.g., “Here is the answer,” “In summary”).
+                - Do not include placeholders, TODOs, system notes, emojis, or chit-chat.
+                - Do not output role labels or meta commentary.
+                - Do not add or modify links/citations.
+                - Use third-person, content-only prose; avoid first/second-person pronouns.
+
+                SYNTHESIS RULES:
+                - Use ONLY the text of the sub-answers. Do NOT invent, infer, calculate, explain, or add commentary.
+                - Remove redundancies and duplicates; keep the most specific wording when texts overlap.
+                - Preserve original facts, wording (where possible), numbers, and dates without changing meaning.
+                - Maintain existing structure from sub-answers (paragraphs/bullets/headings) where feasible; introduce minimal structure only to deduplicate and improve clarity.
+                - If sub-answers conflict, include both statements without resolving the conflict.
+                - Keep any “Not found in provided documents.” lines present in the sub-answers; deduplicate identical lines.
+
+                READABILITY & STRUCTURE:
+                - Organize content into clean blocks with a single blank line between blocks.
+                - Group related lines together (e.g., by entity, topic, or timeframe). If multiple entities appear, use the exact entity name as a simple header line followed by its content.
+                - Prefer concise bullet lists for enumerations; keep paragraph form for narrative blocks. Do not change the factual content.
+                - Normalize whitespace (no double spaces, no repeated blank lines). Keep original capitalization and punctuation of facts.
+                - Preserve original numbers, dates, and units exactly as written.
+                - Avoid dangling or orphaned labels; if a heading has no remaining content after merging, remove the heading.
+                - Place any “Not found in provided documents.” line at the end of the relevant block for that entity/topic (and deduplicate).
+
+                OUTPUT:
+                - Plain text only: the single combined final answer.
+                - No greetings, sign-offs, labels, or extra commentary.
+                - If nothing remains after merging and there are no “Not found in provided documents.” lines, output exactly: “Not found in provided documents.”"""
+            )
+            synthesis_input = {
+                "original_query": user_query,
+                "sub_answers": [
+                    {
+                        "subquery": r.get("subquery"),
+                        "answer": r.get("answer"),
+                        "company_used": r.get("company_used"),
+                    }
+                    for r in per_sub_results
+                ],
+            }
+            synthesis_msgs = [
                 {"role": "system", "content": synthesis_system},
                 {"role": "user", "content": json.dumps(synthesis_input, ensure_ascii=False)},
-            ],
-        )
-        final_answer = (syn.choices[0].message.content or "").strip()
-    except Exception as e:
-        query_logger.warning("Synthesis failed: %s; concatenating sub-answers.", e)
-        graph_retrieval_logger.warning("Synthesis failed: %s; concatenating sub-answers.", e)
-        final_answer = "\n\n".join(
-            f"### {r.get('subquery')}\n{r.get('answer')}" for r in per_sub_results
-        )
-        
+            ]
+            # Per-sub-query answers run concurrently, so only the synthesized answer is streamed
+            final_answer, _ = await _create_chat_completion(
+                pine, answer_model, synthesis_msgs, on_delta=on_delta
+            )
+        except Exception as e:
+            query_logger.warning("Synthesis failed: %s; concatenating sub-answers.", e)
+            graph_retrieval_logger.warning("Synthesis failed: %s; concatenating sub-answers.", e)
+            final_answer = "\n\n".join(
+                f"### {r.get('subquery')}\n{r.get('answer')}" for r in per_sub_results
+            )
+
     query_logger.info("Final synthesized answer:\n%s", final_answer)
     graph_retrieval_logger.info("Final synthesized answer:\n%s", final_answer)
 
@@ -1,6 +1,9 @@
 from ..util import get_clean_json
 from typing import Any, List
+import json
+import os
 import re
+import tempfile
 
 
 from ..util import get_normalized_string, get_formatted_current_datetime
@@ -98,4 +101,60 @@ def chunk_markdown_financial(
     - Keeps lists and tables intact whenever possible.
     - Falls back to sentence/row splitting if a single segment is too large.
     """
-    
\ No newline at end of file
+    
+
+_QUESTION_WORDS = re.compile(
+    r"\b(what|who|whom|whose|which|when|where|why|how|list|describe|explain|summari[sz]e|provide|give)\b",
+    re.IGNORECASE,
+)
+_MULTI_ASK_PATTERNS = re.compile(
+    r"\b(compare|comparison|versus|vs\.?|respectively|as well as|along with|in addition|also|both)\b"
+    r"|;|\n\s*(?:\d+[.)]|[-*•])\s+",
+    re.IGNORECASE,
+)
+
+
+def needs_decomposition(query: str, num_companies: int = 0) -> bool:
+    """
+    Cheap check of whether a RAG query asks several distinct things and is worth an LLM decomposition call.
+
+    A query is considered compound if it has several question marks, mentions several companies, uses
+    comparison/enumeration cues, or joins several question clauses with "and". Single, direct questions
+    are answered without decomposition.
+    """
+    query = (query or "").strip()
+    if not query:
+        return False
+    if query.count("?") > 1 or num_companies > 1:
+        return True
+    if _MULTI_ASK_PATTERNS.search(query):
+        return True
+    # "What is X and who is Y" asks two things; "What are the revenue and profit" usually asks one
+    clauses = re.split(r"\band\b|,", query, flags=re.IGNORECASE)
+    return sum(1 for clause in clauses if _QUESTION_WORDS.search(clause)) > 1
+
+
+def get_cache_path(name: str) -> str:
+    """
+    Returns the path of a local cache file or directory, under $OGMYRAG_CACHE_DIR if set and the
+    temp directory otherwise.
+    """
+    return os.path.join(os.getenv("OGMYRAG_CACHE_DIR") or tempfile.gettempdir(), name)
+
+
+def write_json_atomically(path: str, data: Any) -> None:
+    """
+    Writes `data` as JSON to a temporary file next to `path` and renames it into place, so that readers
+    (including other processes) never see a partially written file.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
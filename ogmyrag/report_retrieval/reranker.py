@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import math
+import statistics
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from .bm25_index import _get_tokens
+from .report_retrieval_util import count_tokens, get_encoder
+
+retrieval_logger = logging.getLogger("retrieval")
+
+
+class BaseReranker:
+    """
+    Reorders retrieved hits ({"id", "text", "score", ...}) by relevance to a query and keeps the best `top_n`.
+    """
+
+    async def rerank(
+        self, query: str, hits: List[Dict[str, Any]], top_n: int
+    ) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class LexicalMMRReranker(BaseReranker):
+    """
+    A CPU-cheap reranker: scores each hit by BM25-style query-term coverage (IDF over the candidates)
+    blended with its retrieval rank, then selects hits by maximal marginal relevance so that overlapping
+    chunks do not crowd out other evidence.
+
+    Parameters:
+        lambda_mult: Trade-off between relevance (1.0) and diversity (0.0) in MMR selection.
+        rank_weight: Weight of the retrieval rank prior in the relevance score.
+    """
+
+    def __init__(self, lambda_mult: float = 0.7, rank_weight: float = 0.3):
+        self.lambda_mult = lambda_mult
+        self.rank_weight = rank_weight
+
+    async def rerank(
+        self, query: str, hits: List[Dict[str, Any]], top_n: int
+    ) -> List[Dict[str, Any]]:
+        if len(hits) <= 1:
+            return hits[:top_n]
+
+        query_terms = set(_get_tokens(query))
+        hit_terms = [Counter(_get_tokens(h.get("text") or "")) for h in hits]
+
+        # IDF over the candidate set favours query terms that discriminate between the hits
+        document_frequency = Counter(t for terms in hit_terms for t in terms if t in query_terms)
+        idf = {
+            t: math.log(1 + (len(hits) - df + 0.5) / (df + 0.5))
+            for t, df in document_frequency.items()
+        }
+        coverage = [
+            sum(idf.get(t, 0.0) * terms[t] / (terms[t] + 1.2) for t in query_terms)
+            for terms in hit_terms
+        ]
+        max_coverage = max(coverage) or 1.0
+        relevance = [
+            (1 - self.rank_weight) * c / max_coverage + self.rank_weight * (1 - rank / len(hits))
+            for rank, c in enumerate(coverage)
+        ]
+
+        term_sets = [set(terms) for terms in hit_terms]
+        selected: List[int] = []
+        remaining = list(range(len(hits)))
+        while remaining and len(selected) < top_n:
+            def mmr(i: int) -> float:
+                redundancy = max((_get_jaccard(term_sets[i], term_sets[j]) for j in selected), default=0.0)
+                return self.lambda_mult * relevance[i] - (1 - self.lambda_mult) * redundancy
+
+            best = max(remaining, key=mmr)
+            selected.append(best)
+            remaining.remove(best)
+
+        return [{**hits[i], "rerank_score": relevance[i]} for i in selected]
+
+
+class CrossEncoderReranker(BaseReranker):
+    """
+    Reranks with a local cross-encoder (requires the optional `sentence-transformers` package).
+    Scoring runs in a worker thread so that the event loop is not blocked.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        max_text_chars: int = 2000,
+        batch_size: int = 16,
+    ):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as e:
+            raise ImportError(
+                "CrossEncoderReranker requires sentence-transformers: pip install sentence-transformers"
+            ) from e
+        self.model = CrossEncoder(model_name)
+        self.max_text_chars = max_text_chars
+        self.batch_size = batch_size
+
+    async def rerank(
+        self, query: str, hits: List[Dict[str, Any]], top_n: int
+    ) -> List[Dict[str, Any]]:
+        if not hits:
+            return []
+        pairs = [(query, (h.get("text") or "")[: self.max_text_chars]) for h in hits]
+        scores = await asyncio.to_thread(self.model.predict, pairs, batch_size=self.batch_size)
+        ranked = sorted(zip(hits, scores), key=lambda x: float(x[1]), reverse=True)
+        return [{**h, "rerank_score": float(s)} for h, s in ranked[:top_n]]
+
+
+def _get_jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+async def benchmark_rerankers(
+    cases: Sequence[Dict[str, Any]],
+    rerankers: Dict[str, Optional[BaseReranker]],
+    top_n: int = 5,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Compares rerankers on retrieved candidates, e.g. collected with
+    `rag_answer_with_company_detection(..., return_hits=True, hits_per_subquery=<over-fetch>)`.
+
+    Parameters:
+        cases: [{"query": str, "hits": [{"id", "text", ...}], "relevant_ids": [str] (optional)}]
+        rerankers: Name -> reranker. None is the current path, which keeps the first `top_n` hits.
+        top_n: Number of hits kept for the answer prompt.
+
+    Returns:
+        Name -> {"mean_ms", "p95_ms", "mean_context_tokens", "recall"}, where recall is only reported
+        for cases with `relevant_ids`.
+    """
+    encoder = get_encoder()
+    summary: Dict[str, Dict[str, float]] = {}
+
+    for name, reranker in rerankers.items():
+        latencies, context_tokens, recalls = [], [], []
+        for case in cases:
+            start = time.perf_counter()
+            if reranker is None:
+                kept = case["hits"][:top_n]
+            else:
+                kept = await reranker.rerank(case["query"], case["hits"], top_n)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            context_tokens.append(
+                sum(count_tokens(encoder, h.get("text") or "") for h in kept)
+            )
+            relevant = set(case.get("relevant_ids") or [])
+            if relevant:
+                recalls.append(len(relevant & {h.get("id") for h in kept}) / len(relevant))
+
+        summary[name] = {
+            "mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+            "p95_ms": (
+                statistics.quantiles(latencies, n=20)[-1] if len(latencies) >= 2
+                else (latencies[0] if latencies else 0.0)
+            ),
+            "mean_context_tokens": statistics.fmean(context_tokens) if context_tokens else 0.0,
+            "recall": statistics.fmean(recalls) if recalls else float("nan"),
+        }
+        retrieval_logger.info("Reranker benchmark %s: %s", name, summary[name])
+
+    return summary
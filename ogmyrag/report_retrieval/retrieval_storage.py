@@ -44,6 +44,7 @@ class RetrievalAsyncStorageManager:
         from the “raw” collection (e.g. 'annual_reports').
         """
         query = {"company": company, "year": str(year)}
+        await self.storage.ensure_indexes("raw_reports", self.storage_config["database_name"], collection_name)
         return await self.storage.get_database(self.storage_config["database_name"]).get_collection(collection_name).read_documents(query=query)
     
     
@@ -81,7 +82,9 @@ class RetrievalAsyncStorageManager:
         
         retrieval_logger.info("Extracting all the processed content.")
 
-        results = await self.storage.get_database(self.storage_config["database_name"]).get_collection(collection_name).read_documents(query=query)
+        results = await self.storage.get_database(self.storage_config["database_name"]).get_collection(collection_name).read_documents(
+            query=query, projection={"name": 1, "section": 1, "content": 1}
+        )
         
         if not results:
             retrieval_logger.warning("No processed content found for %s %s (year: %s)",
@@ -132,14 +135,13 @@ class RetrievalAsyncStorageManager:
         """
         Check if a document exists in the current collection.
         """
-        count = await self.storage.get_database(self.storage_config["database_name"]).get_collection(collection_name).collection.count_documents(query)
-        return count > 0
+        return await self.storage.get_database(self.storage_config["database_name"]).get_collection(collection_name).exists(query)
     
     async def retrieve_toc(self, query: dict, collection_name: str):
-        results = await self.storage.get_database(self.storage_config["database_name"]).get_collection(collection_name).read_documents(query=query)
-        return results[0].get("content", "[]")
+        result = await self.storage.get_database(self.storage_config["database_name"]).get_collection(collection_name).find_one(query=query, projection={"content": 1})
+        return result.get("content", "[]")
     
     async def retrieve_section(self, query: dict, collection_name: str):
-        results = await self.storage.get_database(self.storage_config["database_name"]).get_collection(collection_name).read_documents(query=query)
-        return results[0]["content"] 
+        result = await self.storage.get_database(self.storage_config["database_name"]).get_collection(collection_name).find_one(query=query, projection={"content": 1})
+        return result["content"] 
     
@@ -106,8 +106,8 @@ class AsyncStorageManager:
             "filename": pdf.name,
             "year": year,
         }
-        docs = await self.storage.get_database(self.storage_config["database_name"]).get_collection(report_type.collection).read_documents(query=key)
-        return len(docs) > 0
+        await self.storage.ensure_indexes("raw_reports", self.storage_config["database_name"], report_type.collection)
+        return await self.storage.get_database(self.storage_config["database_name"]).get_collection(report_type.collection).exists(query=key)
     
     async def save(self, announcement: Announcement, report_type: ReportType, year: int):
         """
@@ -179,7 +179,7 @@ class AsyncStorageManager:
         else:
             query["year"] = "N/A"
 
-        docs = await self.storage.get_database(self.storage_config["database_name"]).get_collection(report_type.collection).read_documents(query=query)
+        docs = await self.storage.get_database(self.storage_config["database_name"]).get_collection(report_type.collection).read_documents(query=query, projection={"file_id": 1, "filename": 1})
 
         if not docs:
             scraper_logger.warning("No documents found for %s %s %s", company, report_type.keyword, str(year))
@@ -1,4 +1,5 @@
 from .mongodb_storage import MongoDBStorage, AsyncMongoDBStorage, AsyncCollectionHandler
+from .mongodb_indexes import MONGO_INDEX_REGISTRY, MONGO_QUERY_SHAPES
 from .pinecone_storage import PineconeStorage
 from .neo4j_storage import AsyncNeo4jStorage
 from .storage_util import DatabaseError
\ No newline at end of file
@@ -0,0 +1,210 @@
+import argparse
+import asyncio
+import logging
+from typing import Any
+from pymongo import ASCENDING, IndexModel
+
+logger = logging.getLogger("mongodb")
+
+# Declarative index registry keyed by collection role.
+# A role is bound to a concrete database/collection at runtime, since several collections
+# (e.g. the entity and relationship caches) are created per company.
+MONGO_INDEX_REGISTRY: dict[str, list[IndexModel]] = {
+    "ontology": [
+        IndexModel([("is_latest", ASCENDING)], name="is_latest_1"),
+    ],
+    "disclosures": [
+        IndexModel(
+            [
+                ("from_company", ASCENDING),
+                ("type", ASCENDING),
+                ("published_at", ASCENDING),
+                ("is_parsed", ASCENDING),
+            ],
+            name="from_company_1_type_1_published_at_1_is_parsed_1",
+        ),
+    ],
+    "constraints": [
+        IndexModel(
+            [
+                ("from_company", ASCENDING),
+                ("type", ASCENDING),
+                ("published_at", ASCENDING),
+            ],
+            name="from_company_1_type_1_published_at_1",
+        ),
+    ],
+    "entities": [
+        IndexModel(
+            [("status", ASCENDING), ("originated_from", ASCENDING)],
+            name="status_1_originated_from_1",
+        ),
+    ],
+    "relationships": [
+        IndexModel(
+            [("status", ASCENDING), ("originated_from", ASCENDING)],
+            name="status_1_originated_from_1",
+        ),
+        IndexModel([("source_id", ASCENDING)], name="source_id_1"),
+        IndexModel([("target_id", ASCENDING)], name="target_id_1"),
+    ],
+    "entity_cache": [
+        IndexModel([("last_modified_at", ASCENDING)], name="last_modified_at_1"),
+    ],
+    "relationship_cache": [
+        IndexModel([("last_modified_at", ASCENDING)], name="last_modified_at_1"),
+        IndexModel(
+            [
+                ("source_id", ASCENDING),
+                ("target_id", ASCENDING),
+                ("type", ASCENDING),
+            ],
+            name="source_id_1_target_id_1_type_1",
+        ),
+    ],
+    "entities_deduplication_pending_tasks": [
+        IndexModel(
+            [
+                ("pending", ASCENDING),
+                ("type", ASCENDING),
+                ("from_company", ASCENDING),
+            ],
+            name="pending_1_type_1_from_company_1",
+        ),
+    ],
+    "raw_reports": [
+        IndexModel([("company", ASCENDING), ("year", ASCENDING)], name="company_1_year_1"),
+        IndexModel([("filename", ASCENDING), ("year", ASCENDING)], name="filename_1_year_1"),
+    ],
+}
+
+# Known query shapes per role, used to verify through explain() that the registry covers them.
+# Only the field names matter to the planner, so the values are placeholders.
+MONGO_QUERY_SHAPES: dict[str, list[dict[str, Any]]] = {
+    "ontology": [
+        {"filter": {"is_latest": True}},
+    ],
+    "disclosures": [
+        {
+            "filter": {
+                "from_company": "",
+                "type": "",
+                "published_at": "",
+                "is_parsed": False,
+            }
+        },
+        {"filter": {"from_company": "", "type": "", "is_parsed": False}},
+    ],
+    "constraints": [
+        {"filter": {"from_company": "", "type": "CONSTRAINTS", "published_at": ""}},
+    ],
+    "entities": [
+        {"filter": {"status": "", "originated_from": {"$in": [""]}}},
+    ],
+    "relationships": [
+        {"filter": {"status": "", "originated_from": {"$in": [""]}}},
+        {"filter": {"source_id": ""}},
+        {"filter": {"target_id": ""}},
+    ],
+    "entity_cache": [
+        {"filter": {}, "sort": [("last_modified_at", ASCENDING)], "limit": 1},
+    ],
+    "relationship_cache": [
+        {"filter": {}, "sort": [("last_modified_at", ASCENDING)], "limit": 1},
+        {"filter": {"source_id": "", "target_id": "", "type": ""}},
+    ],
+    "entities_deduplication_pending_tasks": [
+        {"filter": {"pending": True, "type": "UPSERT", "from_company": ""}},
+    ],
+    "raw_reports": [
+        {"filter": {"company": "", "year": ""}},
+        {"filter": {"filename": "", "year": 0}},
+    ],
+}
+
+
+def get_plan_stages(plan: dict[str, Any]) -> list[str]:
+    """
+    Returns every stage name of an explain() plan tree, depth first.
+    """
+    stages = [plan.get("stage", "")]
+    for key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(key), dict):
+            stages.extend(get_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(get_plan_stages(child))
+    return stages
+
+
+def get_missing_index_reason(explain_result: dict[str, Any]) -> str | None:
+    """
+    Inspects the winning plan of an explain() result.
+
+    Returns:
+        A short reason if the query scans the whole collection or sorts in memory, else None.
+    """
+    winning_plan = explain_result.get("queryPlanner", {}).get("winningPlan", {})
+    stages = get_plan_stages(winning_plan)
+    if "COLLSCAN" in stages:
+        return "COLLSCAN"
+    if "SORT" in stages:
+        return "IN_MEMORY_SORT"
+    return None
+
+
+def parse_bindings(raw_bindings: list[str]) -> dict[str, tuple[str, str]]:
+    """
+    Parses `role=database.collection` pairs into a role-to-(database, collection) mapping.
+    """
+    bindings = {}
+    for raw_binding in raw_bindings:
+        role, _, target = raw_binding.partition("=")
+        database_name, _, collection_name = target.partition(".")
+        if not role or not database_name or not collection_name:
+            raise ValueError(
+                f"Invalid binding '{raw_binding}', expected role=database.collection"
+            )
+        if role not in MONGO_INDEX_REGISTRY:
+            raise ValueError(f"Unknown collection role '{role}'")
+        bindings[role] = (database_name, collection_name)
+    return bindings
+
+
+async def _main(args: argparse.Namespace):
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from .mongodb_storage import AsyncMongoDBStorage
+
+    storage = AsyncMongoDBStorage(AsyncIOMotorClient(args.uri))
+    bindings = parse_bindings(args.bind)
+
+    if args.apply:
+        for role, (database_name, collection_name) in bindings.items():
+            await storage.ensure_indexes(role, database_name, collection_name)
+
+    missing = await storage.report_missing_indexes(bindings)
+    if not missing:
+        print("All known query shapes are served by an index.")
+    for item in missing:
+        print(
+            f"[{item['reason']}] {item['database_name']}.{item['collection_name']} "
+            f"({item['role']}): filter={item['filter']} sort={item.get('sort')}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Report MongoDB query shapes that are not served by an index."
+    )
+    parser.add_argument("--uri", required=True, help="MongoDB connection string")
+    parser.add_argument(
+        "--bind",
+        action="append",
+        default=[],
+        help="Binds a role to a collection, e.g. entities=ogmyrag.entities (repeatable)",
+    )
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Create the registered indexes before reporting",
+    )
+    asyncio.run(_main(parser.parse_args()))
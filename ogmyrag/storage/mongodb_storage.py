@@ -5,7 +5,7 @@ from bson.objectid import ObjectId
 from pymongo.errors import (
     PyMongoError,
 )
-from pymongo import MongoClient, UpdateOne
+from pymongo import MongoClient, UpdateOne, IndexModel
 from pymongo.database import Database
 from pymongo.collection import Collection
 from pymongo.client_session import ClientSession
@@ -17,6 +17,12 @@ from motor.motor_asyncio import (
 )
 from pymongo.results import UpdateResult, BulkWriteResult, DeleteResult
 from .storage_util import DatabaseError
+from ..base import MongoStorageConfig
+from .mongodb_indexes import (
+    MONGO_INDEX_REGISTRY,
+    MONGO_QUERY_SHAPES,
+    get_missing_index_reason,
+)
 
 logger = logging.getLogger("mongodb")
 
@@ -38,14 +44,39 @@ class CollectionHandler:
             raise DatabaseError("Create document failed") from e
 
     def read_documents(
-        self, query: dict | None = None, session: ClientSession | None = None
+        self,
+        query: dict | None = None,
+        session: ClientSession | None = None,
+        projection: dict[str, Any] | None = None,
     ) -> list[dict[str, Any]]:
         try:
-            return list(self.collection.find(query or {}, session=session))
+            return list(
+                self.collection.find(query or {}, projection, session=session)
+            )
         except PyMongoError as e:
             logger.error(f"Read failed: {e}")
             raise DatabaseError("Read documents failed") from e
 
+    def find_one(
+        self,
+        query: dict | None = None,
+        projection: dict[str, Any] | None = None,
+        session: ClientSession | None = None,
+    ) -> dict[str, Any] | None:
+        try:
+            return self.collection.find_one(query or {}, projection, session=session)
+        except PyMongoError as e:
+            logger.error(f"Read failed: {e}")
+            raise DatabaseError("Find one document failed") from e
+
+    def exists(self, query: dict, session: ClientSession | None = None) -> bool:
+        try:
+            cursor = self.collection.find(query, {"_id": 1}, session=session).limit(1)
+            return next(cursor, None) is not None
+        except PyMongoError as e:
+            logger.error(f"Read failed: {e}")
+            raise DatabaseError("Exists check failed") from e
+
     def update_document(
         self,
         query: dict[str, Any],
@@ -144,16 +175,80 @@ class AsyncCollectionHandler:
         limit: int = 1000,
         sort: list[tuple[str, int]] | None = None,
         session: AsyncIOMotorClientSession | None = None,
+        projection: dict[str, Any] | None = None,
     ) -> list[dict[str, Any]]:
+        """
+        Reads documents matching the query.
+
+        Args:
+            query: The filter to select documents.
+            limit: The maximum number of documents to return.
+            sort: An optional list of (field, direction) pairs.
+            session: An optional client session.
+            projection: An optional projection (e.g. {"content": 0} or {"name": 1}) so only the
+                        required fields are transferred and decoded.
+
+        Returns:
+            The matching documents.
+
+        Raises:
+            DatabaseError: If the read operation fails.
+        """
         try:
-            cursor = self.collection.find(query or {}, session=session)
+            cursor = self.collection.find(query or {}, projection, session=session)
             if sort:
                 cursor = cursor.sort(sort)
+            if limit:
+                # Lets the server stop early instead of only truncating on the client side
+                cursor = cursor.limit(limit)
             return await cursor.to_list(length=limit)
         except PyMongoError as e:
             logger.error(f"Error reading async documents: {e}")
             raise DatabaseError("Read documents failed") from e
 
+    async def find_one(
+        self,
+        query: dict | None = None,
+        projection: dict[str, Any] | None = None,
+        sort: list[tuple[str, int]] | None = None,
+        session: AsyncIOMotorClientSession | None = None,
+    ) -> dict[str, Any] | None:
+        """
+        Reads the first document matching the query, or None if there is no match.
+
+        Args:
+            query: The filter to select the document.
+            projection: An optional projection limiting the returned fields.
+            sort: An optional list of (field, direction) pairs deciding which document is first.
+            session: An optional client session.
+
+        Raises:
+            DatabaseError: If the read operation fails.
+        """
+        try:
+            cursor = self.collection.find(query or {}, projection, session=session)
+            if sort:
+                cursor = cursor.sort(sort)
+            documents = await cursor.limit(1).to_list(length=1)
+            return documents[0] if documents else None
+        except PyMongoError as e:
+            logger.error(f"Error reading async document: {e}")
+            raise DatabaseError("Find one document failed") from e
+
+    async def exists(
+        self, query: dict, session: AsyncIOMotorClientSession | None = None
+    ) -> bool:
+        """
+        Checks whether at least one document matches the query.
+        Only the `_id` of a single document is fetched, unlike `count_documents` which scans every match.
+
+        Raises:
+            DatabaseError: If the read operation fails.
+        """
+        return (
+            await self.find_one(query=query, projection={"_id": 1}, session=session)
+        ) is not None
+
     async def update_document(
         self,
         query: dict,
@@ -306,6 +401,47 @@ class AsyncCollectionHandler:
             query = {}
         return await self.collection.count_documents(query)
 
+    async def create_indexes(self, indexes: list[IndexModel]) -> list[str]:
+        """
+        Creates the given indexes. Indexes that already exist with the same specification are left untouched.
+
+        Returns:
+            The names of the indexes.
+
+        Raises:
+            DatabaseError: If the index creation fails.
+        """
+        if not indexes:
+            return []
+        try:
+            return await self.collection.create_indexes(indexes)
+        except PyMongoError as e:
+            logger.error(f"Error creating indexes: {e}")
+            raise DatabaseError("Create indexes failed") from e
+
+    async def explain(
+        self,
+        query: dict | None = None,
+        sort: list[tuple[str, int]] | None = None,
+        limit: int = 0,
+    ) -> dict[str, Any]:
+        """
+        Returns the explain() output of a find with the given shape.
+
+        Raises:
+            DatabaseError: If the explain operation fails.
+        """
+        try:
+            cursor = self.collection.find(query or {})
+            if sort:
+                cursor = cursor.sort(sort)
+            if limit:
+                cursor = cursor.limit(limit)
+            return await cursor.explain()
+        except PyMongoError as e:
+            logger.error(f"Error explaining query: {e}")
+            raise DatabaseError("Explain query failed") from e
+
 
 class AsyncDatabaseHandler:
     """Handles operations for a specific async database."""
@@ -323,12 +459,105 @@ class AsyncMongoDBStorage:
 
     def __init__(self, client: AsyncIOMotorClient):
         self.client = client
+        # (database_name, collection_name) pairs whose registered indexes were already ensured
+        self._ensured_indexes: set[tuple[str, str]] = set()
         logger.info("AsyncMongoStorage initialized with a shared async client.")
 
     def get_database(self, db_name: str) -> AsyncDatabaseHandler:
         """Returns a handler for a specific database."""
         return AsyncDatabaseHandler(self.client[db_name])
 
+    async def ensure_indexes(
+        self, role: str, database_name: str, collection_name: str
+    ) -> list[str]:
+        """
+        Applies the registered indexes of a collection role to a concrete collection.
+        Idempotent: each collection is only sent to the server once per storage instance.
+
+        Args:
+            role: A key of MONGO_INDEX_REGISTRY.
+            database_name: The database holding the collection.
+            collection_name: The collection to index.
+
+        Returns:
+            The names of the indexes created or confirmed, empty if already ensured.
+
+        Raises:
+            ValueError: If the role is not registered.
+            DatabaseError: If the index creation fails.
+        """
+        if role not in MONGO_INDEX_REGISTRY:
+            raise ValueError(f"Unknown collection role '{role}'")
+
+        key = (database_name, collection_name)
+        if key in self._ensured_indexes:
+            return []
+
+        names = await (
+            self.get_database(database_name)
+            .get_collection(collection_name)
+            .create_indexes(MONGO_INDEX_REGISTRY[role])
+        )
+        self._ensured_indexes.add(key)
+        logger.info(
+            f"Ensured indexes {names} on {database_name}.{collection_name} ({role})."
+        )
+        return names
+
+    async def ensure_registered_indexes(
+        self, bindings: dict[str, MongoStorageConfig]
+    ) -> None:
+        """
+        Applies the registered indexes to every bound collection.
+
+        Args:
+            bindings: A mapping from role to its storage config. Configs without a
+                      collection_name (per-company collections) are skipped.
+        """
+        for role, config in bindings.items():
+            if config.get("collection_name"):
+                await self.ensure_indexes(
+                    role, config["database_name"], config["collection_name"]
+                )
+
+    async def report_missing_indexes(
+        self, bindings: dict[str, tuple[str, str]]
+    ) -> list[dict[str, Any]]:
+        """
+        Runs explain() on every known query shape of the bound roles and reports the ones
+        that scan the whole collection or sort in memory.
+
+        Args:
+            bindings: A mapping from role to a (database_name, collection_name) pair.
+
+        Returns:
+            One entry per offending query shape, with the role, collection, filter, sort and reason.
+        """
+        missing = []
+        for role, (database_name, collection_name) in bindings.items():
+            collection = self.get_database(database_name).get_collection(
+                collection_name
+            )
+            for shape in MONGO_QUERY_SHAPES.get(role, []):
+                explain_result = await collection.explain(
+                    query=shape["filter"],
+                    sort=shape.get("sort"),
+                    limit=shape.get("limit", 0),
+                )
+                reason = get_missing_index_reason(explain_result)
+                if reason:
+                    missing.append(
+                        {
+                            "role": role,
+                            "database_name": database_name,
+                            "collection_name": collection_name,
+                            "filter": shape["filter"],
+                            "sort": shape.get("sort"),
+                            "reason": reason,
+                        }
+                    )
+        return missing
+
     @asynccontextmanager
     async def with_transaction(self):
         """An async context manager to handle a transaction, initiated from the client."""
@@ -1,14 +1,70 @@
+import asyncio
+import json
 import logging
-from collections import defaultdict
-from neo4j import AsyncGraphDatabase
+import re
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable
+from neo4j import AsyncGraphDatabase, Query, READ_ACCESS, WRITE_ACCESS
+from neo4j.exceptions import Neo4jError
 
 neo4j_logger = logging.getLogger("neo4j")
 
+# Clauses that modify the graph. Queries containing them are never cached and bump the graph version.
+WRITE_CLAUSE_PATTERN = re.compile(
+    r"\b(CREATE|MERGE|DELETE|DETACH|SET|REMOVE|DROP|FOREACH|LOAD\s+CSV)\b", re.I
+)
+# Procedure calls may have side effects or non-deterministic output, so their results are not cached.
+CALL_CLAUSE_PATTERN = re.compile(r"\bCALL\b", re.I)
+# String literals, escaped identifiers and comments, whose contents are not Cypher keywords
+NON_CLAUSE_TEXT_PATTERN = re.compile(
+    r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`|//[^\n]*|/\*.*?\*/", re.S
+)
+
+
+def strip_non_clause_text(query: str) -> str:
+    """
+    Blanks out string literals, backtick-quoted identifiers and comments, so that e.g.
+    `WHERE c.name = 'SET Holdings Berhad'` is not mistaken for a SET clause.
+    """
+    return NON_CLAUSE_TEXT_PATTERN.sub(" ", query)
+
+
+def is_write_query(query: str) -> bool:
+    return bool(WRITE_CLAUSE_PATTERN.search(strip_non_clause_text(query)))
+
+
+def is_call_query(query: str) -> bool:
+    return bool(CALL_CLAUSE_PATTERN.search(strip_non_clause_text(query)))
+
 
 class AsyncNeo4jStorage:
-    def __init__(self, uri: str, user: str, password: str):
+    def __init__(
+        self,
+        uri: str,
+        user: str,
+        password: str,
+        result_cache_max_bytes: int = 32 * 1024 * 1024,
+        result_cache_ttl: float = 300.0,
+    ):
+        """
+        Args:
+            result_cache_max_bytes: Upper bound on the total (JSON-serialized) size of cached query results. 0 disables the cache.
+            result_cache_ttl: Seconds a cached result stays valid. Writes made through this instance invalidate it immediately,
+                              the TTL bounds staleness caused by writes from other processes.
+        """
         self.driver = AsyncGraphDatabase.driver(uri, auth=(user, password))
 
+        # Bumped by every write made through this instance, invalidating all cached results
+        self.graph_version = 0
+        self.result_cache_max_bytes = result_cache_max_bytes
+        self.result_cache_ttl = result_cache_ttl
+        self._result_cache: OrderedDict[tuple, dict] = OrderedDict()
+        self._result_cache_bytes = 0
+        # Query key -> {"task", "waiters"} of the executions shared by concurrent identical queries
+        self._inflight_queries: dict[tuple, dict] = {}
+        self.result_cache_stats = {"hits": 0, "misses": 0, "shared": 0, "evictions": 0}
+
     async def connect(self):
         try:
             await self.driver.verify_connectivity()
@@ -24,6 +80,48 @@ class AsyncNeo4jStorage:
         except Exception as e:
             neo4j_logger.error(f"Error closing connection: {e}")
 
+    def _bump_graph_version(self) -> None:
+        self.graph_version += 1
+        self.clear_result_cache()
+
+    def clear_result_cache(self) -> None:
+        self._result_cache.clear()
+        self._result_cache_bytes = 0
+
+    def _get_cached_result(self, key: tuple) -> Any:
+        entry = self._result_cache.get(key)
+        if entry is None:
+            return None
+        if (
+            entry["graph_version"] != self.graph_version
+            or time.monotonic() - entry["cached_at"] > self.result_cache_ttl
+        ):
+            self._result_cache_bytes -= self._result_cache.pop(key)["size"]
+            return None
+        self._result_cache.move_to_end(key)
+        return entry["records"]
+
+    def _set_cached_result(self, key: tuple, records: Any, graph_version: int) -> None:
+        if graph_version != self.graph_version:
+            # The graph changed while the query was running
+            return
+        size = len(json.dumps(records, default=str))
+        if size > self.result_cache_max_bytes:
+            return
+        if key in self._result_cache:
+            self._result_cache_bytes -= self._result_cache.pop(key)["size"]
+        self._result_cache[key] = {
+            "records": records,
+            "size": size,
+            "graph_version": graph_version,
+            "cached_at": time.monotonic(),
+        }
+        self._result_cache_bytes += size
+        while self._result_cache_bytes > self.result_cache_max_bytes:
+            _, evicted = self._result_cache.popitem(last=False)
+            self._result_cache_bytes -= evicted["size"]
+            self.result_cache_stats["evictions"] += 1
+
     async def upsert_entities(self, entities: list[dict]):
         """
         Upserts a list of entities with potentially mixed labels into Neo4j.
@@ -69,6 +167,8 @@ class AsyncNeo4jStorage:
         except Exception as e:
             neo4j_logger.error(f"Failed to batch upsert entities: {str(e)}")
             raise
+        finally:
+            self._bump_graph_version()
 
     async def upsert_relationships(self, relationships: list[dict]):
         if not relationships:
@@ -110,6 +210,8 @@ class AsyncNeo4jStorage:
         except Exception as e:
             neo4j_logger.error(f"Failed to batch upsert relationships: {str(e)}")
             raise
+        finally:
+            self._bump_graph_version()
 
     async def update_node(self, node_id: str, properties: dict):
         try:
@@ -125,6 +227,8 @@ class AsyncNeo4jStorage:
         except Exception as e:
             neo4j_logger.error(f"Failed to update node {node_id}: {str(e)}")
             raise
+        finally:
+            self._bump_graph_version()
 
     async def delete_node(self, node_id: str):
         try:
@@ -140,10 +244,144 @@ class AsyncNeo4jStorage:
         except Exception as e:
             neo4j_logger.error(f"Failed to delete node {node_id}: {str(e)}")
             raise
+        finally:
+            self._bump_graph_version()
 
     async def run_query(self, query: str, parameters=None):
+        """
+        Runs a Cypher query and returns its records as dictionaries.
+
+        Read-only results are cached per (query, parameters) until the graph version changes, and
+        identical queries running concurrently share a single execution. The returned records may be
+        shared with other callers and must not be modified.
+        """
+        return await self._run_with_result_cache(
+            query=query,
+            parameters=parameters,
+            variant=("all",),
+            runner=lambda: self._run_query(
+                query, parameters, read_only=not is_write_query(query)
+            ),
+        )
+
+    async def run_bounded_query(
+        self,
+        query: str,
+        parameters=None,
+        max_rows: int = 200,
+        max_bytes: int = 100_000,
+        timeout: float = 30.0,
+    ) -> dict:
+        """
+        Runs a Cypher query with a server-side timeout, streaming records until a row or byte budget is reached.
+
+        Records are pulled in batches of at most `max_rows + 1`, so a query without LIMIT stops
+        producing rows on the server shortly after the budget is exhausted. Results are cached like `run_query`.
+        The query runs in a READ_ACCESS session, so it is routed to read replicas in a cluster and any write is rejected.
+
+        Args:
+            max_rows: The maximum number of records to return.
+            max_bytes: The maximum total size of the returned records, measured as JSON.
+            timeout: The transaction timeout in seconds, enforced by the server.
+
+        Returns:
+            A dictionary with "records", "truncated" (bool), "truncation_reason"
+            ("ROW_LIMIT", "BYTE_LIMIT", "TIMEOUT" or None) and "num_bytes".
+        """
+        return await self._run_with_result_cache(
+            query=query,
+            parameters=parameters,
+            variant=("bounded", max_rows, max_bytes),
+            runner=lambda: self._run_bounded_query(
+                query, parameters, max_rows, max_bytes, timeout
+            ),
+        )
+
+    async def _run_with_result_cache(
+        self,
+        query: str,
+        parameters: dict | None,
+        variant: tuple,
+        runner: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        is_write = is_write_query(query)
+        if (
+            is_write
+            or self.result_cache_max_bytes <= 0
+            or is_call_query(query)
+        ):
+            try:
+                return await runner()
+            finally:
+                if is_write:
+                    self._bump_graph_version()
+
+        key = (
+            query.strip(),
+            json.dumps(parameters or {}, sort_keys=True, default=str),
+            variant,
+        )
+        cached_records = self._get_cached_result(key)
+        if cached_records is not None:
+            self.result_cache_stats["hits"] += 1
+            neo4j_logger.debug("Served Cypher query from the result cache.")
+            return cached_records
+
+        # The query runs in its own task so that cancelling one caller (e.g. a disconnected client or a
+        # missed deadline) does not cancel the result other callers are waiting on
+        entry = self._inflight_queries.get(key)
+        if entry is None:
+            self.result_cache_stats["misses"] += 1
+            entry = {
+                "task": asyncio.create_task(self._run_and_cache_result(key, runner)),
+                "waiters": 0,
+            }
+            self._inflight_queries[key] = entry
+            entry["task"].add_done_callback(
+                lambda _: self._discard_inflight_query(key, entry)
+            )
+        else:
+            self.result_cache_stats["shared"] += 1
+
+        entry["waiters"] += 1
         try:
-            async with self.driver.session() as session:
+            return await asyncio.shield(entry["task"])
+        except asyncio.CancelledError:
+            if entry["waiters"] == 1 and not entry["task"].done():
+                # The last waiting caller was cancelled, so nobody needs the result anymore
+                self._discard_inflight_query(key, entry)
+                entry["task"].cancel()
+            raise
+        finally:
+            entry["waiters"] -= 1
+
+    async def _run_and_cache_result(
+        self, key: tuple, runner: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        graph_version = self.graph_version
+        records = await runner()
+        # Timeouts are usually transient (e.g. server load), so they are not cached
+        if not (
+            isinstance(records, dict)
+            and records.get("truncation_reason") == "TIMEOUT"
+        ):
+            self._set_cached_result(key, records, graph_version)
+        return records
+
+    def _discard_inflight_query(self, key: tuple, entry: dict) -> None:
+        # Later identical queries start a new execution instead of joining a finished or cancelled one
+        if self._inflight_queries.get(key) is entry:
+            del self._inflight_queries[key]
+        task = entry["task"]
+        if task.done() and not task.cancelled():
+            # Avoid "exception was never retrieved" warnings when every caller was cancelled
+            task.exception()
+
+    async def _run_query(self, query: str, parameters=None, read_only: bool = False):
+        try:
+            async with self.driver.session(
+                default_access_mode=READ_ACCESS if read_only else WRITE_ACCESS
+            ) as session:
                 result = await session.run(query, parameters or {})
                 records = []
                 async for record in result:
@@ -151,4 +389,96 @@ class AsyncNeo4jStorage:
                 return records
         except Exception as e:
             neo4j_logger.error(f"Failed to run custom query: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    async def _run_bounded_query(
+        self,
+        query: str,
+        parameters: dict | None,
+        max_rows: int,
+        max_bytes: int,
+        timeout: float,
+    ) -> dict:
+        records = []
+        num_bytes = 0
+        truncation_reason = None
+        try:
+            async with self.driver.session(
+                default_access_mode=READ_ACCESS, fetch_size=min(max_rows + 1, 1000)
+            ) as session:
+                result = await session.run(
+                    Query(query, timeout=timeout), parameters or {}
+                )
+                async for record in result:
+                    if len(records) >= max_rows:
+                        truncation_reason = "ROW_LIMIT"
+                        break
+                    data = record.data()
+                    size = len(json.dumps(data, ensure_ascii=False, default=str))
+                    if num_bytes + size > max_bytes:
+                        truncation_reason = "BYTE_LIMIT"
+                        break
+                    records.append(data)
+                    num_bytes += size
+        except Neo4jError as e:
+            if "TransactionTimedOut" not in (e.code or ""):
+                neo4j_logger.error(f"Failed to run bounded query: {e}")
+                raise
+            neo4j_logger.warning(
+                f"Bounded query timed out after {timeout}s with {len(records)} record(s) streamed."
+            )
+            truncation_reason = "TIMEOUT"
+        except Exception as e:
+            neo4j_logger.error(f"Failed to run bounded query: {e}")
+            raise
+
+        if truncation_reason:
+            neo4j_logger.info(
+                f"Bounded query truncated ({truncation_reason}) at {len(records)} record(s), {num_bytes} bytes."
+            )
+        return {
+            "records": records,
+            "truncated": truncation_reason is not None,
+            "truncation_reason": truncation_reason,
+            "num_bytes": num_bytes,
+        }
+
+    async def validate_query(self, query: str, parameters=None) -> dict:
+        """
+        Validates a Cypher query with EXPLAIN, which plans the query without executing it.
+
+        Returns:
+            A dictionary with "valid" (bool), "errors" (list[str]) and "warnings" (list[str]).
+            Syntax/semantic errors and write clauses are errors; planner notifications such as
+            cartesian products or unknown labels, relationship types and properties are warnings.
+        """
+        if is_write_query(query):
+            return {
+                "valid": False,
+                "errors": ["The query contains a write clause; only read queries are allowed."],
+                "warnings": [],
+            }
+        try:
+            async with self.driver.session(default_access_mode=READ_ACCESS) as session:
+                result = await session.run("EXPLAIN " + query, parameters or {})
+                summary = await result.consume()
+        except Neo4jError as e:
+            return {"valid": False, "errors": [e.message or str(e)], "warnings": []}
+        except Exception as e:
+            neo4j_logger.error(f"Failed to validate query: {e}")
+            raise
+
+        # The planner's query type ("r", "rw", "w" or "s") also catches writes hidden from the clause pattern,
+        # e.g. in procedure calls
+        if summary.query_type and summary.query_type != "r":
+            return {
+                "valid": False,
+                "errors": [f"The query is not read-only (query type '{summary.query_type}'); only read queries are allowed."],
+                "warnings": [],
+            }
+
+        warnings = [
+            f"{notification.get('title', '')} {notification.get('description', '')}".strip()
+            for notification in (summary.notifications or [])
+        ]
+        return {"valid": True, "errors": [], "warnings": warnings}
@@ -109,6 +109,28 @@ class IndexOperator:
             pinecone_logger.error(f"Error during query on index '{self.index_name}': {e}")
             raise
 
+    async def query_by_vector(
+        self,
+        vector: list[float],
+        top_k: int = 5,
+        include_metadata: bool = True,
+        query_filter: dict | None = None,
+        namespace: str = ""
+    ) -> dict:
+        """
+        Performs a similarity search with an already computed embedding, without blocking the event loop.
+        """
+        try:
+            result = await asyncio.to_thread(
+                self.index.query,
+                vector=vector, top_k=top_k, include_metadata=include_metadata,
+                filter=query_filter or None, namespace=namespace
+            )
+            return result
+        except Exception as e:
+            pinecone_logger.error(f"Error during query on index '{self.index_name}': {e}")
+            raise
+
     async def delete_vectors(self, ids: list[str], namespace: str = "") -> None:
         """
         Deletes one or more vectors from the index by their IDs.
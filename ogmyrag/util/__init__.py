@@ -3,6 +3,8 @@ from .string_util import (
     get_formatted_ontology,
     get_formatted_report_definitions,
     get_formatted_openai_response,
+    get_prompt_cache_usage,
+    get_token_usage,
     get_formatted_entities_and_relationships,
     get_sliced_ontology,
 )
@@ -18,3 +20,7 @@ from .common_util import (
 )
 
 from .vector_db_util import get_formatted_similar_entities
+
+from .ontology_provider import OntologyProvider
+
+from .json_stream_util import JSONFieldStreamExtractor
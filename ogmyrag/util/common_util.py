@@ -6,8 +6,14 @@ from ..storage import AsyncMongoDBStorage
 from ..base import MongoStorageConfig
 
 
-def limit_concurrency(max_concurrent_tasks: int):
-    semaphore = asyncio.Semaphore(max_concurrent_tasks)
+def limit_concurrency(
+    max_concurrent_tasks: int = 0, semaphore: asyncio.Semaphore | None = None
+):
+    """
+    Limits the concurrent calls of a coroutine function to `max_concurrent_tasks`, or to the slots of
+    `semaphore` when given, so that several functions can share one limit.
+    """
+    semaphore = semaphore or asyncio.Semaphore(max_concurrent_tasks)
 
     def decorator(func):
         @wraps(func)
@@ -117,7 +123,9 @@ async def fetch_reports_along_with_constraints(
                 constraints_config["database_name"]
             )
             .get_collection(constraints_config["collection_name"])
-            .read_documents(query={"from_company": from_company})
+            .read_documents(
+                query={"from_company": from_company}, projection={"content": 1}
+            )
         )
         for file in files:
             to_process["files"][file["name"]] = file["content"]
@@ -189,6 +197,7 @@ async def get_company_reports(
         .get_collection(company_disclosures_config["collection_name"])
         .read_documents(
             query={"from_company": from_company, "type": type, "is_parsed": is_parsed},
+            projection={"name": 1, "is_parsed": 1, "published_at": 1},
         )
     )
     return [
@@ -0,0 +1,79 @@
+import json
+import re
+
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class JSONFieldStreamExtractor:
+    """
+    Incrementally extracts the string value of one field from a JSON document that is being streamed.
+
+    Agents answer in JSON (e.g. {"type": "RESPONSE_GENERATION", "payload": {"response": "..."}}), so the
+    raw text deltas of a streamed response cannot be shown to users directly. `feed()` receives the raw
+    deltas and returns only the newly decoded characters of the field, handling escape sequences split
+    across deltas. Nothing is returned if the document does not contain the field.
+    """
+
+    def __init__(self, field: str = "response"):
+        self._pattern = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self._buffer = ""
+        self._position: int | None = None
+        self.done = False
+
+    def feed(self, delta: str) -> str:
+        if self.done or not delta:
+            return ""
+        self._buffer += delta
+
+        if self._position is None:
+            match = self._pattern.search(self._buffer)
+            if match is None:
+                return ""
+            self._position = match.end()
+
+        output = []
+        buffer, i = self._buffer, self._position
+        while i < len(buffer):
+            char = buffer[i]
+            if char == '"':
+                self.done = True
+                i += 1
+                break
+            if char != "\\":
+                output.append(char)
+                i += 1
+                continue
+
+            # Wait for the rest of an escape sequence split across deltas
+            if i + 1 >= len(buffer):
+                break
+            escape = buffer[i + 1]
+            if escape == "u":
+                if i + 6 > len(buffer):
+                    break
+                code = buffer[i : i + 6]
+                # A surrogate pair is decoded together with its low half
+                if 0xD800 <= int(code[2:], 16) <= 0xDBFF:
+                    if i + 12 > len(buffer):
+                        break
+                    code = buffer[i : i + 12]
+                try:
+                    output.append(json.loads(f'"{code}"'))
+                except ValueError:
+                    output.append(code)
+                i += len(code)
+            else:
+                output.append(_ESCAPES.get(escape, escape))
+                i += 2
+
+        self._position = i
+        return "".join(output)
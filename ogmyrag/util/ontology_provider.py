@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import time
+from typing import Any
+from ..base import MongoStorageConfig
+from ..storage import AsyncMongoDBStorage
+from .string_util import get_formatted_ontology, get_sliced_ontology
+
+logger = logging.getLogger("mongodb")
+
+
+class OntologyProvider:
+    """
+    Shared cache of the latest ontology and its rendered prompt strings.
+
+    The cached entry is keyed by the `_id` of the latest ontology document (a new document is
+    inserted for every version). Staleness is detected either by a cheap `_id`-only lookup at most
+    once every `version_check_interval` seconds, or immediately through a change stream when
+    `start_watching()` is used. All rendered variants are dropped together when the version changes.
+
+    The returned ontology is shared between callers and must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        async_mongo_storage: AsyncMongoDBStorage,
+        ontology_config: MongoStorageConfig,
+        version_check_interval: float = 30.0,
+    ):
+        self.async_mongo_storage = async_mongo_storage
+        self.ontology_config = ontology_config
+        self.version_check_interval = version_check_interval
+
+        self._ontology: dict | None = None
+        self._version_key: Any = None
+        self._version: str | None = None
+        self._checked_at = 0.0
+        self._rendered: dict[tuple, Any] = {}
+        self._lock = asyncio.Lock()
+        self._watch_task: asyncio.Task | None = None
+
+    def _get_collection(self):
+        return self.async_mongo_storage.get_database(
+            self.ontology_config["database_name"]
+        ).get_collection(self.ontology_config["collection_name"])
+
+    def invalidate(self) -> None:
+        """
+        Forces the next access to re-check the version of the latest ontology.
+        """
+        self._checked_at = 0.0
+
+    def _is_fresh(self) -> bool:
+        if self._ontology is None or not self._checked_at:
+            return False
+        if self._watch_task is not None and not self._watch_task.done():
+            # The change stream invalidates the cache as soon as a new version is written
+            return True
+        return time.monotonic() - self._checked_at < self.version_check_interval
+
+    async def _refresh_if_stale(self) -> None:
+        if self._is_fresh():
+            return
+
+        async with self._lock:
+            # Another coroutine may have refreshed the cache while waiting for the lock
+            if self._is_fresh():
+                return
+
+            await self.async_mongo_storage.ensure_registered_indexes(
+                {"ontology": self.ontology_config}
+            )
+            latest = await self._get_collection().find_one(
+                query={"is_latest": True}, projection={"_id": 1, "version": 1}
+            )
+            if latest is None:
+                raise LookupError("Failed to fetch latest ontology")
+
+            if latest["_id"] != self._version_key or self._ontology is None:
+                document = await self._get_collection().find_one(
+                    query={"_id": latest["_id"]}, projection={"ontology": 1}
+                )
+                if document is None:
+                    raise LookupError("Failed to fetch latest ontology")
+
+                self._ontology = document.get("ontology", {})
+                self._version_key = latest["_id"]
+                self._version = latest.get("version", "1.0.0")
+                self._rendered = {}
+                logger.info(f"OntologyProvider\nLoaded ontology version {self._version}")
+
+            self._checked_at = time.monotonic()
+
+    async def get_ontology(self) -> dict:
+        """
+        Returns the latest ontology.
+        """
+        await self._refresh_if_stale()
+        return self._ontology
+
+    async def get_version(self) -> str:
+        """
+        Returns the version of the latest ontology.
+        """
+        await self._refresh_if_stale()
+        return self._version
+
+    async def get_formatted_ontology(
+        self,
+        exclude_entity_fields: list[str] = [],
+        exclude_relationship_fields: list[str] = [],
+        include_entities: bool = True,
+        include_relationships: bool = True,
+    ) -> str:
+        """
+        Returns the latest ontology rendered by `get_formatted_ontology`, memoized per variant.
+        """
+        await self._refresh_if_stale()
+        key = (
+            "formatted",
+            tuple(exclude_entity_fields),
+            tuple(exclude_relationship_fields),
+            include_entities,
+            include_relationships,
+        )
+        if key not in self._rendered:
+            self._rendered[key] = get_formatted_ontology(
+                data=self._ontology,
+                exclude_entity_fields=exclude_entity_fields,
+                exclude_relationship_fields=exclude_relationship_fields,
+                include_entities=include_entities,
+                include_relationships=include_relationships,
+            )
+        return self._rendered[key]
+
+    async def get_sliced_ontologies(
+        self, num_of_relationships_per_slice: int
+    ) -> list[dict]:
+        """
+        Returns the latest ontology split into slices of at most `num_of_relationships_per_slice`
+        relationships each (see `get_sliced_ontology`), memoized per slice size.
+        """
+        await self._refresh_if_stale()
+        key = ("sliced", num_of_relationships_per_slice)
+        if key not in self._rendered:
+            num_of_relationships = len(self._ontology.get("relationships", {}))
+            self._rendered[key] = [
+                get_sliced_ontology(
+                    ontology=self._ontology,
+                    i=i,
+                    k=min(i + num_of_relationships_per_slice, num_of_relationships),
+                )
+                for i in range(
+                    0, num_of_relationships, num_of_relationships_per_slice
+                )
+            ]
+        return self._rendered[key]
+
+    async def get_formatted_sliced_ontologies(
+        self,
+        num_of_relationships_per_slice: int,
+        exclude_entity_fields: list[str] = [],
+        exclude_relationship_fields: list[str] = [],
+    ) -> list[str]:
+        """
+        Returns the rendered slices of the latest ontology, memoized per slice size and variant.
+        """
+        sliced_ontologies = await self.get_sliced_ontologies(
+            num_of_relationships_per_slice
+        )
+        key = (
+            "formatted_sliced",
+            num_of_relationships_per_slice,
+            tuple(exclude_entity_fields),
+            tuple(exclude_relationship_fields),
+        )
+        if key not in self._rendered:
+            self._rendered[key] = [
+                get_formatted_ontology(
+                    data=sliced_ontology,
+                    exclude_entity_fields=exclude_entity_fields,
+                    exclude_relationship_fields=exclude_relationship_fields,
+                )
+                for sliced_ontology in sliced_ontologies
+            ]
+        return self._rendered[key]
+
+    def start_watching(self) -> None:
+        """
+        Invalidates the cache through a MongoDB change stream instead of periodic version checks.
+        Requires a replica set; if the stream fails, the provider falls back to version checks.
+        """
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def stop_watching(self) -> None:
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def _watch(self) -> None:
+        pipeline = [
+            {"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}
+        ]
+        try:
+            async with self._get_collection().collection.watch(pipeline) as stream:
+                async for _ in stream:
+                    self.invalidate()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(
+                f"OntologyProvider\nChange stream stopped, falling back to version checks: {e}"
+            )
+        finally:
+            self.invalidate()
+            self._watch_task = None
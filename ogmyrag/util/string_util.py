@@ -125,6 +125,58 @@ def get_formatted_entities_and_relationships(data: dict):
     return "\n".join(output)
 
 
+def get_prompt_cache_usage(response_obj) -> dict:
+    """
+    Returns the prompt-cache usage of an OpenAI response.
+
+    Supports both the Responses API (`usage.input_tokens_details.cached_tokens`) and the
+    Chat Completions API (`usage.prompt_tokens_details.cached_tokens`).
+
+    Returns:
+    - A dictionary with "input_tokens", "cached_tokens" and "hit_ratio".
+    """
+    usage = getattr(response_obj, "usage", None)
+    if usage is None:
+        return {"input_tokens": 0, "cached_tokens": 0, "hit_ratio": 0.0}
+
+    input_tokens = getattr(usage, "input_tokens", None)
+    details = getattr(usage, "input_tokens_details", None)
+    if input_tokens is None:
+        input_tokens = getattr(usage, "prompt_tokens", 0)
+        details = getattr(usage, "prompt_tokens_details", None)
+
+    input_tokens = input_tokens or 0
+    cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+
+    return {
+        "input_tokens": input_tokens,
+        "cached_tokens": cached_tokens,
+        "hit_ratio": round(cached_tokens / input_tokens, 4) if input_tokens else 0.0,
+    }
+
+
+def get_token_usage(response_obj) -> dict:
+    """
+    Returns the token usage of an OpenAI response from either the Responses API or the Chat Completions API.
+
+    Returns:
+    - A dictionary with "input_tokens", "cached_tokens" and "output_tokens".
+    """
+    usage = getattr(response_obj, "usage", None)
+    output_tokens = 0
+    if usage is not None:
+        output_tokens = getattr(usage, "output_tokens", None)
+        if output_tokens is None:
+            output_tokens = getattr(usage, "completion_tokens", 0)
+
+    prompt_cache_usage = get_prompt_cache_usage(response_obj)
+    return {
+        "input_tokens": prompt_cache_usage["input_tokens"],
+        "cached_tokens": prompt_cache_usage["cached_tokens"],
+        "output_tokens": output_tokens or 0,
+    }
+
+
 def get_formatted_openai_response(response_obj):
     try:
         # Use model_dump() for Pydantic-based objects (OpenAI Python SDK >= 1.0.0)
@@ -137,4 +189,7 @@ def get_formatted_openai_response(response_obj):
             else vars(response_obj)
         )
 
-    return json.dumps(response_dict, indent=2, sort_keys=False)
+    # Surface the prompt-cache hit first so it is visible without scrolling through the payload
+    response_dict = {"prompt_cache": get_prompt_cache_usage(response_obj), **response_dict}
+
+    return json.dumps(response_dict, indent=2, sort_keys=False, default=str)